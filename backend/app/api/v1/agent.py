@@ -1,5 +1,6 @@
 """Agent-specific API endpoints for LLM reasoning."""
 
+import json
 import logging
 from typing import Annotated
 from uuid import UUID
@@ -16,9 +17,11 @@ from app.services.agent_tools import (
     analyze_anomaly_tool,
     analyze_anomaly_with_cluster_context,
     detect_anomaly_tool,
+    get_similar_log_context,
     search_logs,
     summarize_range,
 )
+from app.services.llm_reasoning_service import llm_reasoning_service
 
 logger = logging.getLogger(__name__)
 
@@ -83,8 +86,11 @@ async def agent_analyze_anomaly_stream(
 ) -> StreamingResponse:
     """Stream analysis results for an anomalous log entry.
 
-    This endpoint provides streaming support for real-time reasoning analysis.
-    Results are streamed as they become available.
+    Without root cause analysis, the explanation is streamed token by token
+    as ``{"delta": ...}`` events while OpenAI generates it. Every stream ends
+    with one event carrying the complete result, in the same shape as the
+    non-streaming endpoint. Structured root cause analysis is JSON and is
+    sent only as that final event.
 
     Args:
         log_message: The log message to analyze
@@ -96,20 +102,45 @@ async def agent_analyze_anomaly_stream(
         Streaming response with analysis results
     """
     try:
-        # For now, return the result as JSON (streaming can be enhanced later with OpenAI streaming)
-        result = analyze_anomaly_tool.invoke(
-            {
-                "log_message": log_message,
-                "log_level": log_level,
-                "log_service": log_service,
-                "include_root_cause": include_root_cause,
-            }
-        )
+        if include_root_cause:
+            result = analyze_anomaly_tool.invoke(
+                {
+                    "log_message": log_message,
+                    "log_level": log_level,
+                    "log_service": log_service,
+                    "include_root_cause": include_root_cause,
+                }
+            )
 
-        import json
+            async def generate():
+                yield f"data: {json.dumps(result)}\n\n"
 
-        async def generate():
-            yield f"data: {json.dumps(result)}\n\n"
+        else:
+            context_logs = get_similar_log_context(log_message) or None
+
+            async def generate():
+                chunks = []
+                try:
+                    async for delta in llm_reasoning_service.stream_anomaly_analysis(
+                        log_message=log_message,
+                        log_level=log_level,
+                        log_service=log_service,
+                        context_logs=context_logs,
+                    ):
+                        chunks.append(delta)
+                        yield f"data: {json.dumps({'delta': delta})}\n\n"
+                except Exception as e:
+                    logger.error(f"Error streaming LLM analysis: {e}", exc_info=True)
+
+                explanation = "".join(chunks)
+                result = {
+                    "explanation": explanation or "Analysis failed",
+                    "root_causes": [],
+                    "remediation_steps": [],
+                    "severity": "MEDIUM",
+                    "severity_reason": "Standard analysis completed",
+                }
+                yield f"data: {json.dumps(result)}\n\n"
 
         http_requests_total.labels(
             method="POST", endpoint="/api/v1/agent/analyze-anomaly/stream", status=200
@@ -282,8 +313,6 @@ async def root_cause_analysis(
         # Parse context if provided
         context_dict = None
         if context:
-            import json
-
             try:
                 context_dict = json.loads(context)
             except json.JSONDecodeError:
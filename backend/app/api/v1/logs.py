@@ -250,6 +250,7 @@ async def _semantic_search(
         limit=limit + offset,  # Get more results to account for offset
         filter_conditions=filter_conditions,
         score_threshold=similarity_threshold,
+        payload_fields=[],  # Full entries are loaded from PostgreSQL
     )
 
     # Apply offset
@@ -7,11 +7,14 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Priority batches run up to embedding_parallel_batches worker threads, each
+# holding a session; keep enough warm connections for two batches in flight.
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=10,
+    pool_size=max(10, settings.embedding_parallel_batches * 2),
     max_overflow=20,
+    pool_recycle=settings.database_pool_recycle_seconds,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
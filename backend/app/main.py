@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import re
 from contextlib import asynccontextmanager, suppress
 
 import sentry_sdk
@@ -23,10 +24,12 @@ from app.observability.otel import (
 )
 from app.services.ingestion_service import ingestion_service
 from app.services.kafka_service import kafka_service
+from app.services.llm_reasoning_service import llm_reasoning_service
 from app.services.qdrant_service import qdrant_service
 
 # Development origin regex pattern for CORS
 DEVELOPMENT_ORIGIN_REGEX = r"https?://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|host\.docker\.internal|192\.168\.\d+\.\d+|10\.\d+\.\d+\.\d+|172\.(?:1[6-9]|2\d|3[01])\.\d+\.\d+):\d+"
+DEVELOPMENT_ORIGIN_PATTERN = re.compile(DEVELOPMENT_ORIGIN_REGEX)
 
 # Sensitive header names to sanitize in logs
 SENSITIVE_HEADERS = {
@@ -101,6 +104,7 @@ async def lifespan(_app: FastAPI):
     ingestion_task.cancel()
     with suppress(asyncio.CancelledError):
         await ingestion_task
+    await llm_reasoning_service.aclose()
 
 
 app = FastAPI(
@@ -207,10 +211,7 @@ async def cors_debug_middleware(request: Request, call_next):
         is_allowed = origin in cors_origins
         if not is_allowed and settings.debug:
             # Check regex pattern for development
-            import re
-
-            pattern = DEVELOPMENT_ORIGIN_REGEX
-            is_allowed = bool(re.match(pattern, origin))
+            is_allowed = bool(DEVELOPMENT_ORIGIN_PATTERN.match(origin))
 
         if not is_allowed:
             logger.warning(
@@ -238,10 +239,7 @@ async def cors_debug_middleware(request: Request, call_next):
             explicit_allowed = origin in cors_origins
             regex_allowed = False
             if settings.debug:
-                import re
-
-                pattern = DEVELOPMENT_ORIGIN_REGEX
-                regex_allowed = bool(re.match(pattern, origin))
+                regex_allowed = bool(DEVELOPMENT_ORIGIN_PATTERN.match(origin))
 
             response.headers["X-Origin-Allowed"] = str(explicit_allowed or regex_allowed).lower()
             response.headers["X-Origin-Method"] = (
@@ -321,10 +319,7 @@ async def cors_diagnostic(request: Request):
             origin_method = "explicit"
         elif settings.debug:
             # Check regex pattern for development
-            import re
-
-            pattern = DEVELOPMENT_ORIGIN_REGEX
-            if re.match(pattern, origin):
+            if DEVELOPMENT_ORIGIN_PATTERN.match(origin):
                 origin_allowed = True
                 origin_method = "regex"
 
@@ -1,10 +1,18 @@
 """Pydantic models for log normalization."""
 
+import re
 from datetime import datetime
 from typing import Any
+from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field, field_validator
 
+# ISO timestamps that datetime.fromisoformat parses exactly like the
+# strptime formats below ("%Y-%m-%dT%H:%M:%S[.%f]" / "%Y-%m-%d %H:%M:%S")
+ISO_TIMESTAMP_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?| \d{2}:\d{2}:\d{2})"
+)
+
 
 class RawLogEntry(BaseModel):
     """Raw log entry from Kafka (logs-raw topic)."""
@@ -26,6 +34,13 @@ class RawLogEntry(BaseModel):
         if isinstance(v, datetime):
             return v
         if isinstance(v, str):
+            # Fast path: fromisoformat avoids re-parsing a format string per call
+            if ISO_TIMESTAMP_PATTERN.fullmatch(v):
+                try:
+                    return datetime.fromisoformat(v)
+                except ValueError:
+                    return None
+
             # Try common timestamp formats
             for fmt in [
                 "%Y-%m-%dT%H:%M:%S.%f",
@@ -43,6 +58,9 @@ class RawLogEntry(BaseModel):
 class ProcessedLogEntry(BaseModel):
     """Processed log entry after PII redaction and normalization."""
 
+    # Database id, assigned once so a retried save of this entry is skipped
+    # rather than stored twice; not part of the published payload
+    id: UUID = Field(default_factory=uuid4, exclude=True)
     timestamp: datetime
     level: str
     service: str
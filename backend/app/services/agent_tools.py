@@ -18,6 +18,38 @@ from app.services.qdrant_service import qdrant_service
 logger = logging.getLogger(__name__)
 
 
+def get_similar_log_context(log_message: str) -> list[dict[str, Any]]:
+    """Find similar logs in Qdrant to use as LLM prompt context.
+
+    Args:
+        log_message: The log message to find neighbours for
+
+    Returns:
+        Up to 5 similar logs as level/message/service dicts (empty on failure)
+    """
+    try:
+        # Generate embedding for the log message to find similar logs
+        from app.services.embedding_service import embedding_service
+
+        embedding_result = embedding_service.generate_embedding(log_message)
+        if embedding_result and embedding_result.get("embedding"):
+            similar_logs = qdrant_service.search_vectors(
+                query_embedding=embedding_result["embedding"],
+                limit=5,
+            )
+            return [
+                {
+                    "level": log.get("level", "N/A"),
+                    "message": log.get("message", ""),
+                    "service": log.get("service", "N/A"),
+                }
+                for log in similar_logs
+            ]
+    except Exception as e:
+        logger.warning(f"Failed to retrieve context logs: {e}")
+    return []
+
+
 @tool
 def analyze_anomaly_tool(
     log_message: str,
@@ -41,29 +73,7 @@ def analyze_anomaly_tool(
         remediation steps, and severity assessment
     """
     try:
-        # Get similar logs for context from Qdrant
-        context_logs = []
-        try:
-            # Generate embedding for the log message to find similar logs
-            from app.services.embedding_service import embedding_service
-
-            embedding_result = embedding_service.generate_embedding(log_message)
-            if embedding_result and embedding_result.get("embedding"):
-                query_embedding = embedding_result["embedding"]
-                similar_logs = qdrant_service.search_vectors(
-                    query_embedding=query_embedding,
-                    limit=5,
-                )
-                context_logs = [
-                    {
-                        "level": log.get("level", "N/A"),
-                        "message": log.get("message", ""),
-                        "service": log.get("service", "N/A"),
-                    }
-                    for log in similar_logs
-                ]
-        except Exception as e:
-            logger.warning(f"Failed to retrieve context logs: {e}")
+        context_logs = get_similar_log_context(log_message)
 
         if include_root_cause:
             result = llm_reasoning_service.analyze_anomaly_with_root_cause(
@@ -317,6 +327,7 @@ def search_logs(
                         similar_logs = qdrant_service.search_vectors(
                             query_embedding=query_embedding,
                             limit=limit,
+                            payload_fields=[],  # Entries are loaded from PostgreSQL
                         )
 
                         # Get log entries from database
@@ -424,6 +424,114 @@ class AnomalyDetectionService:
             if db:
                 db.close()
 
+    def _score_vector(
+        self,
+        vector: np.ndarray,
+        all_vectors: np.ndarray,
+        level_weight: float,
+        method: str,
+    ) -> tuple[float, bool] | None:
+        """Score one embedding against the stored embeddings with a detection method.
+
+        Args:
+            vector: Embedding of the log entry being scored
+            all_vectors: Stored embeddings to compare against
+            level_weight: Anomaly weight of the entry's log level
+            method: Detection method to use (IsolationForest, Z-score, IQR)
+
+        Returns:
+            (normalized anomaly score, is_anomaly), or None if the method cannot
+            score this distribution
+        """
+        return self._score_vectors(
+            vector.reshape(1, -1), all_vectors, np.array([level_weight]), method
+        )[0]
+
+    def _score_vectors(
+        self,
+        vectors: np.ndarray,
+        all_vectors: np.ndarray,
+        level_weights: np.ndarray,
+        method: str,
+    ) -> list[tuple[float, bool] | None]:
+        """Score a batch of embeddings against the stored embeddings in one pass.
+
+        IsolationForest is fitted once on the stored embeddings plus the whole
+        batch and scores every row with a single call; Z-score and IQR compute
+        all centroid distances at once.
+
+        Args:
+            vectors: Embeddings being scored, one row per log entry
+            all_vectors: Stored embeddings to compare against
+            level_weights: Anomaly weight of each entry's log level
+            method: Detection method to use (IsolationForest, Z-score, IQR)
+
+        Returns:
+            (normalized anomaly score, is_anomaly) per row, or None for every row
+            if the method cannot score this distribution
+        """
+
+        def level_adjusted(threshold: float) -> np.ndarray:
+            # INFO logs (weight=0.3) need ~3x the score of ERROR logs
+            return np.divide(
+                threshold,
+                level_weights,
+                out=np.full(len(level_weights), np.inf),
+                where=level_weights > 0,
+            )
+
+        if method == "IsolationForest":
+            # Train on all data including the scored points
+            isolation_forest = IsolationForest(contamination=0.1, random_state=42)
+            predictions = isolation_forest.fit_predict(np.vstack([all_vectors, vectors]))
+            statistical_anomaly = predictions[-len(vectors) :] == -1
+            normalized_scores = -isolation_forest.score_samples(vectors)
+
+            # Calculate median score for level-based threshold
+            median_score = float(np.median(-isolation_forest.score_samples(all_vectors)))
+            exceeds_threshold = normalized_scores > level_adjusted(median_score)
+
+        elif method in ("Z-score", "IQR"):
+            centroid = np.mean(all_vectors, axis=0)
+            distances = np.linalg.norm(all_vectors - centroid, axis=1)
+            vector_distances = np.linalg.norm(vectors - centroid, axis=1)
+
+            if method == "Z-score":
+                std_distance = np.std(distances)
+                if std_distance == 0:
+                    return [None] * len(vectors)
+                threshold = 3.0
+                normalized_scores = np.abs((vector_distances - np.mean(distances)) / std_distance)
+                statistical_anomaly = normalized_scores > threshold
+                exceeds_threshold = normalized_scores > level_adjusted(threshold)
+            else:
+                q1, q3 = np.percentile(distances, [25, 75])
+                iqr = q3 - q1
+                if iqr == 0:
+                    return [None] * len(vectors)
+                lower_bound = q1 - 1.5 * iqr
+                upper_bound = q3 + 1.5 * iqr
+                below = vector_distances < lower_bound
+                above = vector_distances > upper_bound
+                statistical_anomaly = below | above
+                normalized_scores = np.where(
+                    below,
+                    (lower_bound - vector_distances) / iqr,
+                    np.where(above, (vector_distances - upper_bound) / iqr, 0.0),
+                )
+                exceeds_threshold = normalized_scores > level_adjusted(1.0)
+
+        else:
+            logger.error(f"Unknown detection method: {method}")
+            return [None] * len(vectors)
+
+        # ERROR/WARN are always flagged if statistical anomaly; others need higher scores
+        is_anomaly = statistical_anomaly & ((level_weights >= 0.8) | exceeds_threshold)
+        return [
+            (float(score), bool(flag))
+            for score, flag in zip(normalized_scores, is_anomaly, strict=True)
+        ]
+
     def score_log_entry(
         self,
         log_id: UUID,
@@ -474,77 +582,10 @@ class AnomalyDetectionService:
                 [emb["vector"] for emb in all_embeddings_data if emb.get("vector")]
             )
 
-            statistical_anomaly = False
-            normalized_score = 0.0
-
-            if method == "IsolationForest":
-                # Train on all data including this point
-                isolation_forest = IsolationForest(contamination=0.1, random_state=42)
-                all_vectors_with_new = np.vstack([all_vectors, vector.reshape(1, -1)])
-                predictions = isolation_forest.fit_predict(all_vectors_with_new)
-                score = isolation_forest.score_samples(vector.reshape(1, -1))[0]
-                statistical_anomaly = bool(predictions[-1] == -1)
-                normalized_score = -score
-
-                # Calculate median score for level-based threshold
-                all_scores = -isolation_forest.score_samples(all_vectors)
-                median_score = float(np.median(all_scores))
-                level_adjusted_threshold = (
-                    median_score / level_weight if level_weight > 0 else float("inf")
-                )
-
-                is_anomaly = statistical_anomaly and (
-                    level_weight >= 0.8 or normalized_score > level_adjusted_threshold
-                )
-
-            elif method == "Z-score":
-                centroid = np.mean(all_vectors, axis=0)
-                distance = np.linalg.norm(vector - centroid)
-                mean_distance = np.mean(np.linalg.norm(all_vectors - centroid, axis=1))
-                std_distance = np.std(np.linalg.norm(all_vectors - centroid, axis=1))
-                if std_distance == 0:
-                    return None
-                z_score = abs((distance - mean_distance) / std_distance)
-                normalized_score = z_score
-                threshold = 3.0
-                statistical_anomaly = bool(z_score > threshold)
-
-                level_adjusted_threshold = (
-                    threshold / level_weight if level_weight > 0 else float("inf")
-                )
-                is_anomaly = statistical_anomaly and (
-                    level_weight >= 0.8 or z_score > level_adjusted_threshold
-                )
-
-            elif method == "IQR":
-                centroid = np.mean(all_vectors, axis=0)
-                distances = np.linalg.norm(all_vectors - centroid, axis=1)
-                distance = np.linalg.norm(vector - centroid)
-                q1 = np.percentile(distances, 25)
-                q3 = np.percentile(distances, 75)
-                iqr = q3 - q1
-                if iqr == 0:
-                    return None
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-                statistical_anomaly = bool(distance < lower_bound or distance > upper_bound)
-                if distance < lower_bound:
-                    normalized_score = (lower_bound - distance) / iqr
-                elif distance > upper_bound:
-                    normalized_score = (distance - upper_bound) / iqr
-                else:
-                    normalized_score = 0.0
-
-                level_adjusted_score_threshold = (
-                    1.0 / level_weight if level_weight > 0 else float("inf")
-                )
-                is_anomaly = statistical_anomaly and (
-                    level_weight >= 0.8 or normalized_score > level_adjusted_score_threshold
-                )
-
-            else:
-                logger.error(f"Unknown detection method: {method}")
+            scored = self._score_vector(vector, all_vectors, level_weight, method)
+            if scored is None:
                 return None
+            normalized_score, is_anomaly = scored
 
             # Store result
             existing = db.query(AnomalyResult).filter(AnomalyResult.log_entry_id == log_id).first()
@@ -582,6 +623,127 @@ class AnomalyDetectionService:
             if created_session and db:
                 db.close()
 
+    def score_log_entries_bulk(
+        self,
+        entries: list[tuple[UUID, list[float]]],
+        method: str = "IsolationForest",
+        db: Session | None = None,
+    ) -> dict[UUID, dict[str, Any] | None]:
+        """Score a batch of freshly embedded log entries in one pass.
+
+        Unlike calling score_log_entry per entry, the stored embeddings are
+        fetched once, log levels and existing results are loaded with one
+        query each, the whole batch is scored with one model fit, and all
+        results are committed together. The entries' own embeddings are used
+        directly instead of being read back from Qdrant, and any of them
+        already stored there are left out of the reference set.
+
+        Args:
+            entries: (log_id, embedding) pairs to score
+            method: Detection method to use (IsolationForest, Z-score, IQR)
+            db: Optional database session
+
+        Returns:
+            Mapping of log_id to the score_log_entry result, or None where an
+            entry could not be scored
+        """
+        results: dict[UUID, dict[str, Any] | None] = {log_id: None for log_id, _ in entries}
+        if not entries:
+            return results
+
+        created_session = False
+        if db is None:
+            db = next(get_db())
+            created_session = True
+
+        try:
+            point_ids, all_vectors = self.qdrant_service.get_embedding_matrix(dtype=np.float64)
+            # The batch may already be in Qdrant (vectors are upserted without
+            # waiting), and _score_vectors adds it again; drop it from the
+            # reference set so scores do not depend on upsert timing
+            batch_ids = {str(log_id) for log_id in results}
+            keep = np.array([str(point_id) not in batch_ids for point_id in point_ids], dtype=bool)
+            if not keep.all():
+                all_vectors = all_vectors[keep]
+            if len(all_vectors) < 2:
+                logger.warning("Not enough embeddings for real-time scoring")
+                return results
+
+            log_ids = list(results)
+            log_levels = dict(
+                db.query(LogEntry.id, LogEntry.level).filter(LogEntry.id.in_(log_ids)).all()
+            )
+            existing_results = {
+                anomaly_result.log_entry_id: anomaly_result
+                for anomaly_result in db.query(AnomalyResult)
+                .filter(AnomalyResult.log_entry_id.in_(log_ids))
+                .all()
+            }
+
+            scored_entries = []
+            for log_id, embedding in entries:
+                if log_id not in log_levels:
+                    logger.warning(f"Log entry not found for log_id: {log_id}")
+                    continue
+                scored_entries.append((log_id, embedding))
+
+            if scored_entries:
+                level_weights = np.array(
+                    [
+                        LOG_LEVEL_ANOMALY_WEIGHTS.get(
+                            (log_levels[log_id] or "INFO").upper(), DEFAULT_LEVEL_WEIGHT
+                        )
+                        for log_id, _ in scored_entries
+                    ]
+                )
+                scores = self._score_vectors(
+                    np.array([embedding for _, embedding in scored_entries]),
+                    all_vectors,
+                    level_weights,
+                    method,
+                )
+            else:
+                scores = []
+
+            for (log_id, _), scored in zip(scored_entries, scores, strict=True):
+                if scored is None:
+                    continue
+                normalized_score, is_anomaly = scored
+
+                existing = existing_results.get(log_id)
+                if existing:
+                    existing.anomaly_score = normalized_score
+                    existing.is_anomaly = is_anomaly
+                    existing.detection_method = method
+                else:
+                    db.add(
+                        AnomalyResult(
+                            log_entry_id=log_id,
+                            anomaly_score=normalized_score,
+                            is_anomaly=is_anomaly,
+                            detection_method=method,
+                        )
+                    )
+
+                results[log_id] = {
+                    "log_id": str(log_id),
+                    "anomaly_score": normalized_score,
+                    "is_anomaly": is_anomaly,
+                    "method": method,
+                }
+
+            db.commit()
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in bulk real-time scoring: {e}", exc_info=True)
+            if db:
+                db.rollback()
+            return dict.fromkeys(results)
+        finally:
+            if created_session and db:
+                db.close()
+
 
 # Global instance
 anomaly_detection_service = AnomalyDetectionService()
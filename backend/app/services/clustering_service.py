@@ -69,11 +69,15 @@ class ClusteringService:
                 f"min_samples={min_samples}, sample_size={sample_size}"
             )
 
-            # Extract embeddings from Qdrant
+            # Extract embeddings from Qdrant straight into one array
+            # (float32 halves memory versus the float64 default)
             logger.info("Extracting embeddings from Qdrant...")
-            embeddings_data = self.qdrant_service.get_all_embeddings(limit=sample_size)
+            dtype = np.float32 if self.settings.clustering_use_float32 else np.float64
+            point_ids, vectors_array = self.qdrant_service.get_embedding_matrix(
+                limit=sample_size, dtype=dtype
+            )
 
-            if not embeddings_data:
+            if not point_ids:
                 logger.warning("No embeddings found in Qdrant")
                 return {
                     "n_clusters": 0,
@@ -83,26 +87,7 @@ class ClusteringService:
                     "error": "No embeddings found",
                 }
 
-            # Filter out points without vectors
-            valid_embeddings = [
-                (UUID(emb["id"]), emb["vector"])
-                for emb in embeddings_data
-                if emb.get("vector") is not None
-            ]
-
-            if not valid_embeddings:
-                logger.warning("No valid embeddings found")
-                return {
-                    "n_clusters": 0,
-                    "n_outliers": 0,
-                    "cluster_assignments": {},
-                    "cluster_metadata": {},
-                    "error": "No valid embeddings found",
-                }
-
-            log_ids, vectors = zip(*valid_embeddings, strict=True)
-            log_ids = list(log_ids)
-            vectors_array = np.array(vectors)
+            log_ids = [UUID(str(point_id)) for point_id in point_ids]
 
             logger.info(f"Clustering {len(vectors_array)} embeddings...")
 
@@ -127,10 +112,6 @@ class ClusteringService:
                 vectors_array = vectors_array[indices]
                 log_ids = [log_ids[i] for i in indices]
 
-            # Convert to float32 to reduce memory usage (float64 is default)
-            if self.settings.clustering_use_float32:
-                vectors_array = vectors_array.astype(np.float32)
-
             # Configure and run HDBSCAN with memory-optimized settings
             hdbscan_params = {
                 "min_cluster_size": min_cluster_size,
@@ -379,6 +360,8 @@ class ClusteringService:
                     log_level=log_entry.level,
                     log_service=log_entry.service,
                     context_logs=context_logs,
+                    # Root cause analysis already provides the explanation
+                    include_reasoning=root_cause_result is None,
                 )
 
                 # Get or create anomaly result
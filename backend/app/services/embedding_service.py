@@ -3,7 +3,9 @@
 import contextlib
 import hashlib
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from typing import Any
 
@@ -78,6 +80,8 @@ class EmbeddingService:
         # In production, consider using Redis or database for persistence
         self._daily_spending: dict[date, float] = {}
         self._current_date = date.today()
+        # Sub-batches record their cost from executor threads concurrently
+        self._spending_lock = threading.Lock()
 
         # Retry configuration
         self.max_retries = 3
@@ -91,7 +95,8 @@ class EmbeddingService:
 
         # Batch processing configuration
         # OpenAI allows up to 2048 inputs per request
-        self.max_batch_size = 2048
+        self.max_batch_size = min(settings.embedding_request_batch_size, 2048)
+        self.max_concurrent_requests = settings.embedding_max_concurrent_requests
 
     def _get_text_hash(self, text: str) -> str:
         """Generate hash for text to use as cache key.
@@ -124,15 +129,16 @@ class EmbeddingService:
             Current daily spending in USD
         """
         today = date.today()
-        if today != self._current_date:
-            # Date changed, reset spending for new day
-            logger.info(
-                f"Date changed from {self._current_date} to {today}. Resetting daily spending."
-            )
-            self._current_date = today
-            self._daily_spending[today] = 0.0
+        with self._spending_lock:
+            if today != self._current_date:
+                # Date changed, reset spending for new day
+                logger.info(
+                    f"Date changed from {self._current_date} to {today}. Resetting daily spending."
+                )
+                self._current_date = today
+                self._daily_spending[today] = 0.0
 
-        return self._daily_spending.get(today, 0.0)
+            return self._daily_spending.get(today, 0.0)
 
     def _record_spending(self, cost: float) -> None:
         """Record spending for the current day.
@@ -141,20 +147,19 @@ class EmbeddingService:
             cost: Cost in USD to add to daily spending
         """
         today = date.today()
-        if today != self._current_date:
-            # Date changed, reset spending for new day
-            self._current_date = today
-            self._daily_spending[today] = 0.0
+        with self._spending_lock:
+            if today != self._current_date:
+                # Date changed, reset spending for new day
+                self._current_date = today
+                self._daily_spending[today] = 0.0
 
-        current_spending = self._daily_spending.get(today, 0.0)
-        self._daily_spending[today] = current_spending + cost
+            daily_total = self._daily_spending.get(today, 0.0) + cost
+            self._daily_spending[today] = daily_total
 
-        # Update Prometheus metric
-        openai_daily_spending_usd.labels(model=self.model).set(self._daily_spending[today])
+            # Update Prometheus metric
+            openai_daily_spending_usd.labels(model=self.model).set(daily_total)
 
-        logger.debug(
-            f"Recorded spending: ${cost:.6f}. Daily total: ${self._daily_spending[today]:.6f} USD"
-        )
+        logger.debug(f"Recorded spending: ${cost:.6f}. Daily total: ${daily_total:.6f} USD")
 
     def _check_budget(self, estimated_cost: float = 0.0) -> None:
         """Check if we're within budget before generating embeddings.
@@ -375,28 +380,28 @@ class EmbeddingService:
         if not texts:
             return []
 
-        # Separate texts into cached and uncached
+        # Separate texts into cached and uncached; repeated uncached texts
+        # (common for templated log messages) are only sent once
         results: list[dict[str, Any] | None] = [None] * len(texts)
-        uncached_indices: list[int] = []
-        uncached_texts: list[str] = []
+        uncached_positions: dict[str, list[int]] = {}
 
-        if use_cache:
-            for i, text in enumerate(texts):
-                text_hash = self._get_text_hash(text)
-                if text_hash in self._embedding_cache:
-                    cached_result = self._embedding_cache[text_hash]
+        for i, text in enumerate(texts):
+            if text in uncached_positions:
+                uncached_positions[text].append(i)
+                continue
+            if use_cache:
+                cached_result = self._embedding_cache.get(self._get_text_hash(text))
+                if cached_result is not None:
                     results[i] = {
                         **cached_result,
                         "timestamp": datetime.utcnow(),
                         "cached": True,
                     }
                     openai_embedding_cache_hits_total.inc()
-                else:
-                    uncached_indices.append(i)
-                    uncached_texts.append(text)
-        else:
-            uncached_indices = list(range(len(texts)))
-            uncached_texts = texts
+                    continue
+            uncached_positions[text] = [i]
+
+        uncached_texts = list(uncached_positions)
 
         # Process uncached texts in batches
         if uncached_texts:
@@ -406,92 +411,112 @@ class EmbeddingService:
             estimated_cost = self._calculate_cost(total_estimated_tokens)
             self._check_budget(estimated_cost)
 
-            # Split into batches if needed
-            for batch_start in range(0, len(uncached_texts), self.max_batch_size):
-                batch_end = min(batch_start + self.max_batch_size, len(uncached_texts))
-                batch_texts = uncached_texts[batch_start:batch_end]
-                batch_indices = uncached_indices[batch_start:batch_end]
-
-                start_time = time.time()
-                try:
-                    response = self._retry_with_backoff(
-                        self.client.embeddings.create,
-                        model=self.model,
-                        input=batch_texts,
+            # Split into sub-batches and send them concurrently; the OpenAI
+            # client is synchronous, so each request runs on its own thread
+            sub_batches = [
+                uncached_texts[batch_start : batch_start + self.max_batch_size]
+                for batch_start in range(0, len(uncached_texts), self.max_batch_size)
+            ]
+            max_workers = min(len(sub_batches), self.max_concurrent_requests)
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    sub_results = list(
+                        executor.map(
+                            lambda batch_texts: self._embed_sub_batch(batch_texts, use_cache),
+                            sub_batches,
+                        )
                     )
+            else:
+                sub_results = [
+                    self._embed_sub_batch(batch_texts, use_cache) for batch_texts in sub_batches
+                ]
+
+            batch_results = [result for sub_result in sub_results for result in sub_result]
+            for positions, result in zip(uncached_positions.values(), batch_results, strict=True):
+                if result is None:
+                    continue
+                results[positions[0]] = result
+                # Repeats in the same batch reuse the result like a cache hit
+                for idx in positions[1:]:
+                    results[idx] = {**result, "cached": True}
 
-                    if not response:
-                        # Mark batch as failed
-                        for idx in batch_indices:
-                            results[idx] = None
-                        continue
-
-                    duration = time.time() - start_time
-
-                    # Extract usage information
-                    usage = response.usage
-                    total_tokens = usage.total_tokens if usage else 0
-                    cost = self._calculate_cost(total_tokens)
-
-                    # Update metrics
-                    openai_embeddings_total.labels(model=self.model, status="success").inc()
-                    openai_embedding_duration_seconds.labels(model=self.model).observe(duration)
-                    openai_embedding_cost_usd.labels(model=self.model).inc(cost)
-                    openai_embedding_tokens_total.labels(model=self.model).inc(total_tokens)
-
-                    # Record spending for budget tracking
-                    self._record_spending(cost)
-
-                    # Process results
-                    # OpenAI returns embeddings in order, but we need to map them
-                    # to the original indices
-                    embeddings_dict = {item.index: item.embedding for item in response.data}
-
-                    # Calculate cost per item (approximate)
-                    cost_per_item = cost / len(batch_texts) if batch_texts else 0
-                    tokens_per_item = total_tokens // len(batch_texts) if batch_texts else 0
-
-                    for local_idx, global_idx in enumerate(batch_indices):
-                        embedding = embeddings_dict.get(local_idx)
-                        if embedding:
-                            result = {
-                                "embedding": embedding,
-                                "model": self.model,
-                                "timestamp": datetime.utcnow(),
-                                "cost_usd": cost_per_item,
-                                "tokens": tokens_per_item,
-                                "cached": False,
-                            }
-                            results[global_idx] = result
-
-                            # Cache the result
-                            if use_cache:
-                                text_hash = self._get_text_hash(batch_texts[local_idx])
-                                self._embedding_cache[text_hash] = result.copy()
-
-                    logger.debug(
-                        f"Generated {len(batch_texts)} embeddings in batch: "
-                        f"{total_tokens} tokens, ${cost:.6f}, {duration:.3f}s"
-                    )
+        return results
 
-                except BudgetExceededError:
-                    # Budget exceeded - mark remaining batches as failed
-                    logger.warning(
-                        f"Budget exceeded during batch processing. "
-                        f"Marking {len(batch_indices)} items as failed."
-                    )
-                    for idx in batch_indices:
-                        results[idx] = None
-                    # Stop processing remaining batches
-                    break
-                except Exception as e:
-                    duration = time.time() - start_time
-                    openai_embeddings_total.labels(model=self.model, status="error").inc()
-                    openai_embedding_duration_seconds.labels(model=self.model).observe(duration)
-                    logger.error(f"Error generating batch embeddings: {e}", exc_info=True)
-                    # Mark batch as failed
-                    for idx in batch_indices:
-                        results[idx] = None
+    def _embed_sub_batch(
+        self, batch_texts: list[str], use_cache: bool
+    ) -> list[dict[str, Any] | None]:
+        """Generate embeddings for one sub-batch with a single OpenAI request.
+
+        Args:
+            batch_texts: Texts to embed (at most max_batch_size)
+            use_cache: Whether to cache the generated embeddings
+
+        Returns:
+            Embedding results aligned with batch_texts, None for failed items
+        """
+        results: list[dict[str, Any] | None] = [None] * len(batch_texts)
+        start_time = time.time()
+        try:
+            response = self._retry_with_backoff(
+                self.client.embeddings.create,
+                model=self.model,
+                input=batch_texts,
+            )
+
+            if not response:
+                return results
+
+            duration = time.time() - start_time
+
+            # Extract usage information
+            usage = response.usage
+            total_tokens = usage.total_tokens if usage else 0
+            cost = self._calculate_cost(total_tokens)
+
+            # Update metrics
+            openai_embeddings_total.labels(model=self.model, status="success").inc()
+            openai_embedding_duration_seconds.labels(model=self.model).observe(duration)
+            openai_embedding_cost_usd.labels(model=self.model).inc(cost)
+            openai_embedding_tokens_total.labels(model=self.model).inc(total_tokens)
+
+            # Record spending for budget tracking
+            self._record_spending(cost)
+
+            # Process results
+            # OpenAI returns embeddings in order, but we need to map them
+            # to the original indices
+            embeddings_dict = {item.index: item.embedding for item in response.data}
+
+            # Calculate cost per item (approximate)
+            cost_per_item = cost / len(batch_texts) if batch_texts else 0
+            tokens_per_item = total_tokens // len(batch_texts) if batch_texts else 0
+
+            for local_idx, text in enumerate(batch_texts):
+                embedding = embeddings_dict.get(local_idx)
+                if embedding:
+                    result = {
+                        "embedding": embedding,
+                        "model": self.model,
+                        "timestamp": datetime.utcnow(),
+                        "cost_usd": cost_per_item,
+                        "tokens": tokens_per_item,
+                        "cached": False,
+                    }
+                    results[local_idx] = result
+
+                    # Cache the result
+                    if use_cache:
+                        self._embedding_cache[self._get_text_hash(text)] = result.copy()
+
+            logger.debug(
+                f"Generated {len(batch_texts)} embeddings in batch: "
+                f"{total_tokens} tokens, ${cost:.6f}, {duration:.3f}s"
+            )
+        except Exception as e:
+            duration = time.time() - start_time
+            openai_embeddings_total.labels(model=self.model, status="error").inc()
+            openai_embedding_duration_seconds.labels(model=self.model).observe(duration)
+            logger.error(f"Error generating batch embeddings: {e}", exc_info=True)
 
         return results
 
@@ -14,6 +14,7 @@ import time
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import UTC, datetime
 from uuid import UUID
 
 from app.config import get_settings
@@ -107,7 +108,6 @@ class IngestionService:
         self._queue_lock = threading.Lock()
 
         # Batch processing state
-        self._last_batch_time = time.time()
         self._batch_processor_running = False
 
     def _is_priority_log(self, level: str | None) -> bool:
@@ -127,50 +127,99 @@ class IngestionService:
 
         return level.upper() in [lvl.upper() for lvl in self._settings.embedding_log_levels]
 
+    def _prepare_raw_log(
+        self, raw_data: dict, now: datetime | None = None
+    ) -> tuple[RawLogEntry, dict, str]:
+        """Parse a raw log and extract its metadata and the message to redact.
+
+        ``now`` is the timestamp used when the log carries none.
+        """
+        extracted_message = _extract_log_message(raw_data)
+        extracted_timestamp = _extract_timestamp(raw_data)
+        extracted_service = _extract_service_name(raw_data)
+
+        raw_log = RawLogEntry(
+            timestamp=extracted_timestamp,
+            message=extracted_message,
+            level=raw_data.get("level"),
+            service=extracted_service or raw_data.get("service"),
+            metadata=raw_data.get("metadata", {}),
+            raw_log=json.dumps(raw_data),
+            log_type=raw_data.get("log_type"),
+        )
+
+        extracted = metadata_extractor.extract_metadata(raw_log, now)
+
+        message_to_redact = raw_log.message if raw_log.message else ""
+        if not message_to_redact and raw_log.raw_log:
+            try:
+                raw_parsed = json.loads(raw_log.raw_log)
+                message_to_redact = _extract_log_message(raw_parsed)
+            except json.JSONDecodeError:
+                message_to_redact = raw_log.raw_log
+
+        return raw_log, extracted, message_to_redact
+
+    @staticmethod
+    def _build_processed_log(
+        raw_log: RawLogEntry, extracted: dict, redacted_message: str, pii_entities: dict
+    ) -> ProcessedLogEntry:
+        """Combine extracted metadata and the redacted message into a processed log."""
+        return ProcessedLogEntry(
+            timestamp=extracted["timestamp"],
+            level=extracted["level"],
+            service=extracted["service"],
+            message=redacted_message,
+            raw_log=raw_log.raw_log,
+            metadata=extracted["metadata"],
+            pii_redacted=len(pii_entities) > 0,
+            pii_entities=pii_entities,
+        )
+
     def process_raw_log(self, raw_data: dict) -> ProcessedLogEntry | None:
         """Process a single raw log entry through the pipeline."""
         try:
-            extracted_message = _extract_log_message(raw_data)
-            extracted_timestamp = _extract_timestamp(raw_data)
-            extracted_service = _extract_service_name(raw_data)
-
-            raw_log = RawLogEntry(
-                timestamp=extracted_timestamp,
-                message=extracted_message,
-                level=raw_data.get("level"),
-                service=extracted_service or raw_data.get("service"),
-                metadata=raw_data.get("metadata", {}),
-                raw_log=json.dumps(raw_data),
-                log_type=raw_data.get("log_type"),
-            )
+            raw_log, extracted, message_to_redact = self._prepare_raw_log(raw_data)
+            redacted_message, pii_entities = pii_service.redact_pii(message_to_redact)
+            return self._build_processed_log(raw_log, extracted, redacted_message, pii_entities)
+        except Exception as e:
+            logger.error(f"Error processing raw log: {e}")
+            return None
 
-            extracted = metadata_extractor.extract_metadata(raw_log)
+    def process_raw_logs(self, raw_logs: list[dict]) -> list[ProcessedLogEntry | None]:
+        """Process several raw log entries, redacting PII for all of them in one batch.
 
-            message_to_redact = raw_log.message if raw_log.message else ""
-            if not message_to_redact and raw_log.raw_log:
-                try:
-                    raw_parsed = json.loads(raw_log.raw_log)
-                    message_to_redact = _extract_log_message(raw_parsed)
-                except json.JSONDecodeError:
-                    message_to_redact = raw_log.raw_log
+        Returns one entry per input, with None for logs that failed to process.
+        """
+        # One clock read for every log in the batch that lacks a timestamp
+        batch_now = datetime.now(UTC).replace(tzinfo=None)
 
-            redacted_message, pii_entities = pii_service.redact_pii(message_to_redact)
+        prepared: list[tuple[RawLogEntry, dict, str] | None] = []
+        for raw_data in raw_logs:
+            try:
+                prepared.append(self._prepare_raw_log(raw_data, batch_now))
+            except Exception as e:
+                logger.error(f"Error processing raw log: {e}")
+                prepared.append(None)
 
-            processed_log = ProcessedLogEntry(
-                timestamp=extracted["timestamp"],
-                level=extracted["level"],
-                service=extracted["service"],
-                message=redacted_message,
-                raw_log=raw_log.raw_log,
-                metadata=extracted["metadata"],
-                pii_redacted=len(pii_entities) > 0,
-                pii_entities=pii_entities,
-            )
+        redactions = iter(
+            pii_service.redact_pii_batch([item[2] for item in prepared if item is not None])
+        )
 
-            return processed_log
-        except Exception as e:
-            logger.error(f"Error processing raw log: {e}")
-            return None
+        processed_logs: list[ProcessedLogEntry | None] = []
+        for item in prepared:
+            if item is None:
+                processed_logs.append(None)
+                continue
+            redacted_message, pii_entities = next(redactions)
+            try:
+                processed_logs.append(
+                    self._build_processed_log(item[0], item[1], redacted_message, pii_entities)
+                )
+            except Exception as e:
+                logger.error(f"Error processing raw log: {e}")
+                processed_logs.append(None)
+        return processed_logs
 
     def process_and_store(self, raw_data: dict) -> bool:
         """Process raw log and store it using two-track pipeline.
@@ -178,18 +227,55 @@ class IngestionService:
         Fast track: Save to PostgreSQL immediately (all logs)
         Priority track: Queue for batch embedding (ERROR/WARN only)
         """
+        # Process the log (PII redaction, metadata extraction)
+        processed_log = self.process_raw_log(raw_data)
+        if not processed_log:
+            return False
+        return self._store_processed_log(processed_log)
+
+    def process_and_store_batch(self, raw_logs: list[dict]) -> int:
+        """Process and store several raw logs, batching PII redaction.
+
+        Returns:
+            Number of logs stored successfully
+        """
+        processed_logs = [log for log in self.process_raw_logs(raw_logs) if log]
+        if not processed_logs:
+            return 0
+
+        # FAST TRACK: Save the whole batch to PostgreSQL in one statement
         try:
-            # Process the log (PII redaction, metadata extraction)
-            processed_log = self.process_raw_log(raw_data)
-            if not processed_log:
-                return False
+            log_ids = storage_service.save_log_entries_fast(processed_logs)
+        except Exception as e:
+            logger.error(f"Error saving batch of {len(processed_logs)} logs: {e}")
+            return 0
 
+        stored = 0
+        for processed_log, log_id in zip(processed_logs, log_ids, strict=True):
+            if not log_id:
+                logger.warning("Failed to save log entry to database")
+                continue
+            if self._publish_stored_log(processed_log, log_id):
+                stored += 1
+        return stored
+
+    def _store_processed_log(self, processed_log: ProcessedLogEntry) -> bool:
+        """Save a processed log and queue it for embedding if it is a priority log."""
+        try:
             # FAST TRACK: Save to PostgreSQL immediately (no embedding)
             log_id = storage_service.save_log_entry_fast(processed_log)
             if not log_id:
                 logger.warning("Failed to save log entry to database")
                 return False
+        except Exception as e:
+            logger.error(f"Error in process_and_store: {e}")
+            return False
+
+        return self._publish_stored_log(processed_log, log_id)
 
+    def _publish_stored_log(self, processed_log: ProcessedLogEntry, log_id: UUID) -> bool:
+        """Publish a saved log and queue it for embedding if it is a priority log."""
+        try:
             # Send to logs-processed topic
             processed_data = processed_log.model_dump()
             kafka_service.produce_message("logs-processed", processed_data)
@@ -233,18 +319,24 @@ class IngestionService:
     def _should_process_batch(self) -> bool:
         """Check if we should process the priority queue batch."""
         with self._queue_lock:
+            if not self._priority_queue:
+                return False
             queue_size = len(self._priority_queue)
-
-        if queue_size == 0:
-            return False
+            oldest_queued_at = self._priority_queue[0].timestamp
 
         # Process if batch is full
         if queue_size >= self._settings.embedding_batch_size:
             return True
 
-        # Process if timeout exceeded
-        time_since_last = time.time() - self._last_batch_time
-        return time_since_last >= self._settings.embedding_batch_timeout_seconds
+        # Otherwise let a partial batch fill until its oldest log has waited the
+        # full timeout, so a burst after an idle period coalesces into one batch
+        return time.time() - oldest_queued_at >= self._settings.embedding_batch_timeout_seconds
+
+    def _ready_batch_count(self) -> int:
+        """Number of batches to process now, up to embedding_parallel_batches."""
+        with self._queue_lock:
+            full_batches = len(self._priority_queue) // self._settings.embedding_batch_size
+        return max(1, min(full_batches, self._settings.embedding_parallel_batches))
 
     def _process_priority_batch(self) -> None:
         """Process a batch of priority logs with embeddings."""
@@ -259,8 +351,6 @@ class IngestionService:
         if not batch:
             return
 
-        self._last_batch_time = time.time()
-
         # Extract data for batch processing
         log_ids = [item.log_id for item in batch]
         messages = [item.message for item in batch]
@@ -290,9 +380,16 @@ class IngestionService:
         while self.running:
             try:
                 if self._should_process_batch():
-                    # Run batch processing in thread pool
+                    # Run batch processing in thread pool, several full batches at once
                     loop = asyncio.get_running_loop()
-                    await loop.run_in_executor(_executor, self._process_priority_batch)
+                    await asyncio.gather(
+                        *(
+                            loop.run_in_executor(_executor, self._process_priority_batch)
+                            for _ in range(self._ready_batch_count())
+                        )
+                    )
+                    # Check again right away while a backlog remains
+                    continue
 
                 # Short sleep to check frequently
                 await asyncio.sleep(0.5)
@@ -311,8 +408,8 @@ class IngestionService:
             try:
                 # Flush any expired buffers
                 flushed_logs = log_aggregator.flush_expired()
-                for aggregated_log in flushed_logs:
-                    self.process_and_store(aggregated_log)
+                if flushed_logs:
+                    self.process_and_store_batch(flushed_logs)
 
                 await asyncio.sleep(1.0)  # Check every second
             except Exception as e:
@@ -321,8 +418,8 @@ class IngestionService:
 
         # Final flush on shutdown
         remaining = log_aggregator.flush_all()
-        for aggregated_log in remaining:
-            self.process_and_store(aggregated_log)
+        if remaining:
+            self.process_and_store_batch(remaining)
 
         logger.info("Log aggregator flush loop stopped")
 
@@ -342,28 +439,32 @@ class IngestionService:
         # Start aggregator flush loop in background
         aggregator_task = asyncio.create_task(self._aggregator_flush_loop())
 
-        def process_message(raw_data: dict):
-            """Process a single message from Kafka with log aggregation."""
+        def consume_batch():
+            """Consume multiple messages (runs in thread pool)."""
             if not self.running:
                 return
 
-            # Pass through log aggregator to group multiline logs
-            aggregated_logs = log_aggregator.process(raw_data)
+            # Complete log entries from this poll, processed together so PII
+            # redaction runs one batched NLP pass instead of one per log
+            complete_logs: list[dict] = []
 
-            # Process any complete log entries
-            for log_entry in aggregated_logs:
-                self.process_and_store(log_entry)
+            def process_message(raw_data: dict):
+                """Pass a Kafka message through the log aggregator."""
+                if not self.running:
+                    return
+
+                # Group multiline logs; collect any complete log entries
+                complete_logs.extend(log_aggregator.process(raw_data))
 
-        def consume_batch():
-            """Consume multiple messages (runs in thread pool)."""
-            if not self.running:
-                return
             try:
                 # Process more messages at once since we're not doing OpenAI calls inline
                 kafka_service.consume_messages(process_message, max_messages=10)
             except Exception as e:
                 logger.error(f"Error consuming batch: {e}")
 
+            if complete_logs:
+                self.process_and_store_batch(complete_logs)
+
         loop = asyncio.get_running_loop()
 
         # Run consumer in a loop
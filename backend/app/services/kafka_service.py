@@ -20,6 +20,16 @@ MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 CONNECTION_RETRY_DELAY = 5  # seconds for connection errors
 
+# How long a consumer health check result is reused before querying the broker again
+HEALTH_CHECK_CACHE_SECONDS = 10
+
+# Consumer fetch sizing: let the broker accumulate a meaningful chunk of logs per
+# fetch instead of answering as soon as a single byte is available. Under low
+# traffic this adds up to FETCH_MAX_WAIT_MS of latency before logs are consumed.
+FETCH_MIN_BYTES = 128 * 1024
+FETCH_MAX_WAIT_MS = 500
+MAX_PARTITION_FETCH_BYTES = 1024 * 1024
+
 
 def json_serializer(obj: dict) -> bytes:
     """JSON serializer that handles datetime objects."""
@@ -36,16 +46,45 @@ class KafkaService:
     """Kafka service for consuming and producing log messages."""
 
     def __init__(self):
-        """Initialize Kafka consumer and producer."""
-        self.consumer: KafkaConsumer | None = None
-        self.producer: KafkaProducer | None = None
+        """Set up Kafka service state.
+
+        The consumer and producer are created lazily on first access, so
+        constructing the service never blocks on broker connections.
+        """
+        self._consumer: KafkaConsumer | None = None
+        self._producer: KafkaProducer | None = None
+        self._consumer_init_attempted = False
+        self._producer_init_attempted = False
         self._consumer_retry_count = 0
         self._producer_retry_count = 0
-        self._initialize_consumer()
-        self._initialize_producer()
+        # (monotonic time, healthy) of the last broker metadata check
+        self._consumer_health: tuple[float, bool] | None = None
+
+    @property
+    def consumer(self) -> KafkaConsumer | None:
+        """Kafka consumer, initialized on first access."""
+        if self._consumer is None and not self._consumer_init_attempted:
+            self._initialize_consumer()
+        return self._consumer
+
+    @consumer.setter
+    def consumer(self, value: KafkaConsumer | None):
+        self._consumer = value
+
+    @property
+    def producer(self) -> KafkaProducer | None:
+        """Kafka producer, initialized on first access."""
+        if self._producer is None and not self._producer_init_attempted:
+            self._initialize_producer()
+        return self._producer
+
+    @producer.setter
+    def producer(self, value: KafkaProducer | None):
+        self._producer = value
 
     def _initialize_consumer(self, retry: bool = False):
         """Initialize Kafka consumer for logs-raw topic with retry logic."""
+        self._consumer_init_attempted = True
         if retry:
             self._consumer_retry_count += 1
             if self._consumer_retry_count > MAX_RETRIES:
@@ -65,10 +104,14 @@ class KafkaService:
                 enable_auto_commit=True,
                 group_id="log-processor-group",
                 consumer_timeout_ms=1000,  # Timeout for polling
+                fetch_min_bytes=FETCH_MIN_BYTES,
+                fetch_max_wait_ms=FETCH_MAX_WAIT_MS,
+                max_partition_fetch_bytes=MAX_PARTITION_FETCH_BYTES,
                 api_version=(0, 10, 1),  # Specify API version for compatibility
             )
             # Test the connection
             self.consumer.topics()
+            self._consumer_health = (time.monotonic(), True)
             logger.info("Kafka consumer initialized successfully")
             self._consumer_retry_count = 0
         except (KafkaConnectionError, KafkaTimeoutError) as e:
@@ -82,6 +125,7 @@ class KafkaService:
 
     def _initialize_producer(self, retry: bool = False):
         """Initialize Kafka producer for logs-processed topic with retry logic."""
+        self._producer_init_attempted = True
         if retry:
             self._producer_retry_count += 1
             if self._producer_retry_count > MAX_RETRIES:
@@ -115,19 +159,20 @@ class KafkaService:
     def _reconnect_consumer(self):
         """Attempt to reconnect the consumer."""
         logger.info("Attempting to reconnect Kafka consumer...")
-        if self.consumer:
+        if self._consumer:
             with suppress(Exception):
-                self.consumer.close()
+                self._consumer.close()
         self.consumer = None
+        self._consumer_health = None
         self._consumer_retry_count = 0
         self._initialize_consumer()
 
     def _reconnect_producer(self):
         """Attempt to reconnect the producer."""
         logger.info("Attempting to reconnect Kafka producer...")
-        if self.producer:
+        if self._producer:
             with suppress(Exception):
-                self.producer.close()
+                self._producer.close()
         self.producer = None
         self._producer_retry_count = 0
         self._initialize_producer()
@@ -208,15 +253,26 @@ class KafkaService:
         return False
 
     def is_consumer_healthy(self) -> bool:
-        """Check if Kafka consumer is healthy."""
+        """Check if Kafka consumer is healthy.
+
+        The broker metadata check is cached for HEALTH_CHECK_CACHE_SECONDS so
+        frequent readiness probes don't issue a metadata request each time.
+        """
         if not self.consumer:
             return False
+
+        now = time.monotonic()
+        if self._consumer_health and now - self._consumer_health[0] < HEALTH_CHECK_CACHE_SECONDS:
+            return self._consumer_health[1]
+
         try:
             # Try to get topics to verify connection (same method used in initialization)
             self.consumer.topics()
-            return True
+            healthy = True
         except Exception:
-            return False
+            healthy = False
+        self._consumer_health = (now, healthy)
+        return healthy
 
     def is_producer_healthy(self) -> bool:
         """Check if Kafka producer is healthy."""
@@ -234,11 +290,11 @@ class KafkaService:
         return self.is_consumer_healthy() and self.is_producer_healthy()
 
     def close(self):
-        """Close Kafka consumer and producer."""
-        if self.consumer:
-            self.consumer.close()
-        if self.producer:
-            self.producer.close()
+        """Close Kafka consumer and producer (without creating unused clients)."""
+        if self._consumer:
+            self._consumer.close()
+        if self._producer:
+            self._producer.close()
 
 
 # Lazy initialization pattern
@@ -1,15 +1,345 @@
 """LLM reasoning service for analyzing anomalous log entries."""
 
+import asyncio
+import contextlib
+import importlib.util
 import json
 import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import Future
 from typing import Any
 
-from openai import OpenAI, RateLimitError
+import httpx
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of memoized analyze_anomaly results (LRU eviction beyond this)
+ANALYSIS_CACHE_MAX_SIZE = 1024
+
+# Retry policy for OpenAI rate limit (429) errors: exponential backoff with
+# full jitter, never waiting less than the server's Retry-After hint
+RATE_LIMIT_MAX_ATTEMPTS = 5
+RATE_LIMIT_BASE_DELAY_SECONDS = 1.0
+RATE_LIMIT_MAX_DELAY_SECONDS = 32.0
+
+# Sliding window used by the client-side request throttle
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+# Pooled HTTP connections to the OpenAI API, kept alive between requests so
+# bursts reuse warm TLS connections. HTTP/2 multiplexing is used when the h2
+# package is installed (it ships with httpx[http2]).
+OPENAI_HTTP_MAX_CONNECTIONS = 32
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+OPENAI_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Volatile tokens stripped from log messages before cache lookup, so recurring
+# anomalies that differ only in timestamps or IDs share one entry. Short
+# numbers (status codes, percentages, durations) are kept: they are often
+# what makes a log anomalous. Order matters: broader patterns (timestamps,
+# UUIDs) run before bare numeric IDs.
+VOLATILE_TOKEN_PATTERNS = [
+    (
+        re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+        "<TS>",
+    ),
+    (
+        re.compile(
+            r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+        ),
+        "<UUID>",
+    ),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d{1,5})?\b"), "<IP>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"), "<HEX>"),
+    (re.compile(r"\b\d{6,}\b"), "<ID>"),
+]
+
+
+def _normalize_log_message(log_message: str) -> str:
+    """Replace volatile tokens (timestamps, UUIDs, IPs, hex and numeric IDs) with placeholders."""
+    for pattern, placeholder in VOLATILE_TOKEN_PATTERNS:
+        log_message = pattern.sub(placeholder, log_message)
+    return log_message
+
+
+def _format_context_logs(context_logs: list[dict[str, Any]] | None) -> str:
+    """Format up to 5 context logs into a prompt section (empty string if none)."""
+    if not context_logs:
+        return ""
+    return "\n\nSimilar normal logs for context:\n" + "".join(
+        f"{i}. [{log.get('level', 'N/A')}] {log.get('message', '')}\n"
+        for i, log in enumerate(context_logs[:5], 1)
+    )
+
+
+def _rate_limit_delay(attempt: int, error: RateLimitError) -> float:
+    """Compute the wait before retrying after a rate limit error.
+
+    Args:
+        attempt: Zero-based index of the attempt that failed
+        error: Rate limit error from OpenAI
+
+    Returns:
+        Seconds to wait: jittered exponential backoff, at least Retry-After
+    """
+    delay = random.uniform(
+        0, min(RATE_LIMIT_BASE_DELAY_SECONDS * (2**attempt), RATE_LIMIT_MAX_DELAY_SECONDS)
+    )
+    response = getattr(error, "response", None)
+    if response is not None and response.headers and "retry-after" in response.headers:
+        with contextlib.suppress(ValueError, TypeError):
+            delay = max(delay, float(response.headers["retry-after"]))
+    return delay
+
+
+class _RateLimiter:
+    """Sliding-window request throttle shared by sync and async callers.
+
+    Paces requests to at most ``max_requests`` per window so bursts of
+    anomalies queue locally instead of tripping OpenAI 429 responses.
+    """
+
+    def __init__(self, max_requests: int, window_seconds: float = RATE_LIMIT_WINDOW_SECONDS):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._timestamps: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Claim a request slot, returning 0 on success or the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            while self._timestamps and now - self._timestamps[0] >= self.window_seconds:
+                self._timestamps.popleft()
+            if len(self._timestamps) < self.max_requests:
+                self._timestamps.append(now)
+                return 0.0
+            return self._timestamps[0] + self.window_seconds - now
+
+    def acquire(self) -> None:
+        """Block until a request slot is available."""
+        while (wait := self._reserve()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a request slot is available."""
+        while (wait := self._reserve()) > 0:
+            await asyncio.sleep(wait)
+
+
+class _CoalescingBatcher:
+    """Coalesces concurrent single-item calls into batched calls.
+
+    Callers on different threads submit items and block on the returned
+    future. A batch is dispatched as soon as ``max_batch_size`` items are
+    pending or ``max_wait_seconds`` after the first item arrived, whichever
+    comes first. ``process_batch`` must return one result per item, in order.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[Any]], list[Any]],
+        max_batch_size: int,
+        max_wait_seconds: float,
+    ):
+        self._process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: list[tuple[Any, Future]] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item for the next batch and return a future for its result."""
+        future: Future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((item, future))
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait_seconds, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run(batch)
+        return future
+
+    def _take_pending(self) -> list[tuple[Any, Future]]:
+        """Detach the pending batch. The caller must hold the lock."""
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self) -> None:
+        """Dispatch whatever is pending once the wait window expires."""
+        with self._lock:
+            batch = self._take_pending()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch: list[tuple[Any, Future]]) -> None:
+        """Process a batch and resolve each caller's future."""
+        try:
+            results = self._process_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results, strict=True):
+            future.set_result(result)
+
+
+# Static system prompts. All fixed instructions live here, ahead of the per-log
+# user message, so every request shares an identical prefix that OpenAI can
+# serve from its prompt cache. Never interpolate per-log values into these.
+SYSTEM_ANALYZE = """You are an expert log analyst specializing in identifying anomalies and unusual patterns in system logs. Analyze the log entry provided by the user and provide a comprehensive root cause analysis.
+
+Provide a detailed analysis that includes:
+1. **Anomaly Explanation**: What makes this log entry unusual compared to normal patterns (2-3 sentences)
+2. **Root Cause Hypotheses**: List 2-3 most likely root causes with brief explanations
+3. **Impact Assessment**: Potential impact on system/service operations
+4. **Remediation Steps**: Specific actionable steps to investigate and resolve the issue
+
+Be specific, technical, and actionable. Focus on identifying the underlying cause rather than just describing symptoms."""
+
+SYSTEM_DETECT = """You are an expert log analyst. Determine if the log entry provided by the user is anomalous.
+
+Consider:
+1. Unusual patterns compared to normal logs
+2. Error severity and frequency
+3. Context and service behavior
+4. Potential security or operational issues
+
+Reply with exactly one character: A (anomaly) or N (normal)."""
+
+SYSTEM_DETECT_BATCH = """You are an expert log analyst. Determine which of the numbered log entries provided by the user are anomalous.
+
+Consider:
+1. Unusual patterns compared to normal logs
+2. Error severity and frequency
+3. Context and service behavior
+4. Potential security or operational issues
+
+Return exactly one result per entry, where id is the entry number and confidence is between 0.0 and 1.0."""
+
+SYSTEM_EXPLAIN_DETECTION = """You are an expert log analyst specializing in identifying anomalies and unusual patterns in system logs. The log entry provided by the user was classified as anomalous.
+
+Briefly explain (2-3 sentences) why this log is anomalous."""
+
+SYSTEM_ROOT_CAUSE = """You are a senior log analysis expert specializing in root cause analysis. Analyze the log entry provided by the user and provide structured analysis.
+
+Provide:
+- explanation: a detailed explanation (3-4 sentences) of why this log is anomalous
+- root_causes: the 2-3 most likely hypotheses, each with a confidence (0.0-1.0) and brief description
+- remediation_steps: prioritized actions, each with a description of what to do
+- severity and severity_reason: the severity level and why
+
+Focus on:
+1. Specific technical root causes (not generic issues)
+2. Actionable remediation steps
+3. Accurate severity assessment based on operational impact"""
+
+
+# Structured output schemas. Strict mode makes the API guarantee the response
+# shape, so results are read without per-field defaults and the prompts do not
+# need to spell out the JSON layout.
+DETECT_BATCH_SCHEMA = {
+    "name": "anomaly_batch",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "is_anomaly": {"type": "boolean"},
+                        "confidence": {"type": "number"},
+                    },
+                    "required": ["id", "is_anomaly", "confidence"],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+}
+
+ROOT_CAUSE_SCHEMA = {
+    "name": "root_cause_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "explanation": {"type": "string"},
+            "root_causes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "hypothesis": {"type": "string"},
+                        "confidence": {"type": "number"},
+                        "description": {"type": "string"},
+                    },
+                    "required": ["hypothesis", "confidence", "description"],
+                    "additionalProperties": False,
+                },
+            },
+            "remediation_steps": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "step": {"type": "string"},
+                        "priority": {"type": "string", "enum": ["HIGH", "MEDIUM", "LOW"]},
+                        "description": {"type": "string"},
+                    },
+                    "required": ["step", "priority", "description"],
+                    "additionalProperties": False,
+                },
+            },
+            "severity": {"type": "string", "enum": ["LOW", "MEDIUM", "HIGH", "CRITICAL"]},
+            "severity_reason": {"type": "string"},
+        },
+        "required": [
+            "explanation",
+            "root_causes",
+            "remediation_steps",
+            "severity",
+            "severity_reason",
+        ],
+        "additionalProperties": False,
+    },
+}
+
+
+def _format_log_entry(
+    log_message: str,
+    log_level: str | None,
+    log_service: str | None,
+    context_logs: list[dict[str, Any]] | None,
+) -> str:
+    """Format the per-log user message (the variable tail of every prompt)."""
+    return f"""Log Entry:
+- Level: {log_level or "N/A"}
+- Service: {log_service or "N/A"}
+- Message: {log_message}
+{_format_context_logs(context_logs)}"""
+
 
 class LLMReasoningService:
     """Service for using LLM to detect and explain anomalous log entries.
@@ -33,9 +363,223 @@ class LLMReasoningService:
         if not settings.openai_api_key:
             logger.warning("OpenAI API key not configured. LLM reasoning will not work.")
             self.client = None
+            self.async_client = None
+            self._create = None
+            self._create_async = None
         else:
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            limits = httpx.Limits(
+                max_connections=OPENAI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_HTTP_MAX_CONNECTIONS,
+            )
+            self.client = OpenAI(
+                api_key=settings.openai_api_key,
+                http_client=httpx.Client(
+                    http2=OPENAI_HTTP2_AVAILABLE, timeout=OPENAI_HTTP_TIMEOUT, limits=limits
+                ),
+            )
+            # Async client for fanning out batch analyses concurrently
+            self.async_client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=httpx.AsyncClient(
+                    http2=OPENAI_HTTP2_AVAILABLE, timeout=OPENAI_HTTP_TIMEOUT, limits=limits
+                ),
+            )
+            # Bound once so each request skips the client.chat.completions lookups
+            self._create = self.client.chat.completions.create
+            self._create_async = self.async_client.chat.completions.create
         self.model = "gpt-4o-mini"  # Cost-effective model for reasoning
+        self.max_concurrency = settings.openai_max_concurrency
+        # One throttle shared by every chat completion call made by this service
+        self._rate_limiter = _RateLimiter(settings.openai_rpm)
+        # Optionally coalesce concurrent detect_anomaly classifications
+        # (e.g. from ingestion worker threads) into one multi-entry request
+        self._detection_batcher = None
+        if settings.llm_detection_batch_size > 1:
+            self._detection_batcher = _CoalescingBatcher(
+                self._classify_batch,
+                max_batch_size=settings.llm_detection_batch_size,
+                max_wait_seconds=settings.llm_detection_batch_wait_ms / 1000,
+            )
+
+        # LRU cache for analyze_anomaly and detect_anomaly results keyed on
+        # normalized inputs. Noisy log streams repeat the same anomaly with
+        # different timestamps and IDs, so this avoids paying OpenAI latency
+        # and cost for each recurrence.
+        self._analyze_cache: OrderedDict[tuple, Any] = OrderedDict()
+        self._analyze_cache_lock = threading.Lock()
+        # Futures for LLM requests currently in flight, keyed like the cache
+        self._inflight: dict[tuple, Future] = {}
+        self._inflight_async: dict[tuple, asyncio.Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections held by the OpenAI clients."""
+        if self.client:
+            self.client.close()
+        if self.async_client:
+            await self.async_client.close()
+
+    def _analysis_cache_key(
+        self,
+        log_message: str,
+        log_level: str | None,
+        log_service: str | None,
+        context_logs: list[dict[str, Any]] | None,
+    ) -> tuple:
+        """Build a cache key for LLM inputs.
+
+        The message is normalized so that logs differing only in volatile
+        tokens share a key. Only the first 5 context logs are used in the
+        prompt, so only those contribute to the key.
+        """
+        context_key = tuple(
+            hash((log.get("level", "N/A"), _normalize_log_message(log.get("message", ""))))
+            for log in (context_logs or [])[:5]
+        )
+        return (_normalize_log_message(log_message), log_level, log_service, context_key)
+
+    def _get_cached_analysis(self, key: tuple) -> Any:
+        """Return a cached analysis and mark it as recently used."""
+        with self._analyze_cache_lock:
+            reasoning = self._analyze_cache.get(key)
+            if reasoning is not None:
+                self._analyze_cache.move_to_end(key)
+            return reasoning
+
+    def _cache_analysis(self, key: tuple, reasoning: Any) -> None:
+        """Store an analysis, evicting the least recently used entry if full."""
+        with self._analyze_cache_lock:
+            self._analyze_cache[key] = reasoning
+            self._analyze_cache.move_to_end(key)
+            if len(self._analyze_cache) > ANALYSIS_CACHE_MAX_SIZE:
+                self._analyze_cache.popitem(last=False)
+
+    def _single_flight(self, key: tuple, fetch: Callable[[], Any]) -> Any:
+        """Run fetch once per key across concurrent callers.
+
+        The first caller for a key runs fetch; callers arriving while it is in
+        flight wait for and share its result (or exception) instead of sending
+        an identical OpenAI request. This suppresses duplicate calls during
+        error storms, before the result cache has been populated.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_leader:
+            logger.debug("Joining in-flight LLM request")
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    async def _single_flight_async(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of _single_flight sharing one asyncio future per key.
+
+        Callers on the same event loop await the leader's future; a caller
+        on a different loop (the future cannot be awaited there) fetches on
+        its own. Followers are shielded, so cancelling one does not cancel
+        the shared request.
+        """
+        loop = asyncio.get_running_loop()
+        with self._inflight_lock:
+            future = self._inflight_async.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = loop.create_future()
+                self._inflight_async[key] = future
+
+        if not is_leader:
+            if future.get_loop() is not loop:
+                return await fetch()
+            logger.debug("Joining in-flight LLM request")
+            return await asyncio.shield(future)
+
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so an unjoined future is not reported
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight_async[key]
+
+    def _create_completion(self, **kwargs):
+        """Create a chat completion, throttled and retried on rate limit errors.
+
+        Raises:
+            RateLimitError: If the request is still rate limited after all attempts
+        """
+        for attempt in range(RATE_LIMIT_MAX_ATTEMPTS):
+            self._rate_limiter.acquire()
+            try:
+                return self._create(**kwargs)
+            except RateLimitError as e:
+                if attempt == RATE_LIMIT_MAX_ATTEMPTS - 1:
+                    raise
+                delay = _rate_limit_delay(attempt, e)
+                logger.warning(
+                    f"OpenAI rate limit hit. Retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{RATE_LIMIT_MAX_ATTEMPTS})"
+                )
+                time.sleep(delay)
+
+    async def _create_completion_async(self, **kwargs):
+        """Async variant of _create_completion using the same throttle and retry policy."""
+        for attempt in range(RATE_LIMIT_MAX_ATTEMPTS):
+            await self._rate_limiter.acquire_async()
+            try:
+                return await self._create_async(**kwargs)
+            except RateLimitError as e:
+                if attempt == RATE_LIMIT_MAX_ATTEMPTS - 1:
+                    raise
+                delay = _rate_limit_delay(attempt, e)
+                logger.warning(
+                    f"OpenAI rate limit hit. Retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{RATE_LIMIT_MAX_ATTEMPTS})"
+                )
+                await asyncio.sleep(delay)
+
+    def _build_analyze_request(
+        self,
+        log_message: str,
+        log_level: str | None,
+        log_service: str | None,
+        context_logs: list[dict[str, Any]] | None,
+    ) -> dict[str, Any]:
+        """Build chat completion arguments for analyze_anomaly."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_ANALYZE},
+                {
+                    "role": "user",
+                    "content": _format_log_entry(log_message, log_level, log_service, context_logs),
+                },
+            ],
+            "max_tokens": 500,  # Increased for root cause analysis
+            "temperature": 0.3,  # Lower temperature for more consistent reasoning
+        }
 
     def analyze_anomaly(
         self,
@@ -59,46 +603,59 @@ class LLMReasoningService:
             logger.warning("OpenAI client not initialized. Skipping LLM reasoning.")
             return None
 
+        cache_key = self._analysis_cache_key(log_message, log_level, log_service, context_logs)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            logger.debug("LLM reasoning cache hit")
+            return cached
+
+        request = self._build_analyze_request(log_message, log_level, log_service, context_logs)
         try:
-            # Build context from similar logs if provided
-            context_text = ""
-            if context_logs:
-                context_text = "\n\nSimilar normal logs for context:\n"
-                for i, log in enumerate(context_logs[:5], 1):  # Limit to 5 context logs
-                    context_text += f"{i}. [{log.get('level', 'N/A')}] {log.get('message', '')}\n"
+            reasoning = self._single_flight(
+                cache_key,
+                lambda: self._create_completion(**request).choices[0].message.content,
+            )
+            logger.debug(f"Generated LLM reasoning for log: {reasoning[:100]}...")
+            if reasoning:
+                self._cache_analysis(cache_key, reasoning)
+            return reasoning
 
-            # Build prompt with enhanced root cause analysis
-            prompt = f"""You are a log analysis expert. Analyze the following log entry and provide a comprehensive root cause analysis.
+        except RateLimitError as e:
+            logger.warning(f"OpenAI rate limit exceeded for LLM reasoning: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error generating LLM reasoning: {e}", exc_info=True)
+            return None
 
-Log Entry:
-- Level: {log_level or "N/A"}
-- Service: {log_service or "N/A"}
-- Message: {log_message}
-{context_text}
+    async def _analyze_anomaly_async(
+        self,
+        log_message: str,
+        log_level: str | None = None,
+        log_service: str | None = None,
+        context_logs: list[dict[str, Any]] | None = None,
+    ) -> str | None:
+        """Async variant of analyze_anomaly sharing its prompt and result cache."""
+        if not self.async_client:
+            logger.warning("OpenAI client not initialized. Skipping LLM reasoning.")
+            return None
 
-Provide a detailed analysis that includes:
-1. **Anomaly Explanation**: What makes this log entry unusual compared to normal patterns (2-3 sentences)
-2. **Root Cause Hypotheses**: List 2-3 most likely root causes with brief explanations
-3. **Impact Assessment**: Potential impact on system/service operations
-4. **Remediation Steps**: Specific actionable steps to investigate and resolve the issue
+        cache_key = self._analysis_cache_key(log_message, log_level, log_service, context_logs)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            logger.debug("LLM reasoning cache hit")
+            return cached
 
-Be specific, technical, and actionable. Focus on identifying the underlying cause rather than just describing symptoms."""
+        request = self._build_analyze_request(log_message, log_level, log_service, context_logs)
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert log analyst specializing in identifying anomalies and unusual patterns in system logs.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=500,  # Increased for root cause analysis
-                temperature=0.3,  # Lower temperature for more consistent reasoning
-            )
+        async def fetch() -> str | None:
+            response = await self._create_completion_async(**request)
+            return response.choices[0].message.content
 
-            reasoning = response.choices[0].message.content
+        try:
+            reasoning = await self._single_flight_async(cache_key, fetch)
             logger.debug(f"Generated LLM reasoning for log: {reasoning[:100]}...")
+            if reasoning:
+                self._cache_analysis(cache_key, reasoning)
             return reasoning
 
         except RateLimitError as e:
@@ -108,12 +665,57 @@ Be specific, technical, and actionable. Focus on identifying the underlying caus
             logger.error(f"Error generating LLM reasoning: {e}", exc_info=True)
             return None
 
-    def analyze_anomalies_batch(
+    async def stream_anomaly_analysis(
+        self,
+        log_message: str,
+        log_level: str | None = None,
+        log_service: str | None = None,
+        context_logs: list[dict[str, Any]] | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream an analyze_anomaly explanation as it is generated.
+
+        Yields text chunks as they arrive from OpenAI, so callers can show the
+        first tokens without waiting for the full completion. Shares the
+        analyze_anomaly prompt and result cache; a cache hit yields the full
+        text as a single chunk.
+
+        Raises:
+            RateLimitError: If OpenAI is still rate limiting after all retries
+        """
+        if not self.async_client:
+            logger.warning("OpenAI client not initialized. Skipping LLM reasoning.")
+            return
+
+        cache_key = self._analysis_cache_key(log_message, log_level, log_service, context_logs)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            logger.debug("LLM reasoning cache hit")
+            yield cached
+            return
+
+        stream = await self._create_completion_async(
+            **self._build_analyze_request(log_message, log_level, log_service, context_logs),
+            stream=True,
+        )
+        chunks = []
+        async for event in stream:
+            if event.choices and (delta := event.choices[0].delta.content):
+                chunks.append(delta)
+                yield delta
+
+        reasoning = "".join(chunks)
+        if reasoning:
+            self._cache_analysis(cache_key, reasoning)
+
+    async def analyze_anomalies_batch_async(
         self,
         anomalies: list[dict[str, Any]],
         max_analyses: int = 10,
     ) -> dict[str, str]:
-        """Analyze multiple anomalies in batch.
+        """Analyze multiple anomalies concurrently.
+
+        Identical anomalies are analyzed once. Unique ones are sent to OpenAI
+        concurrently, bounded by max_concurrency in-flight requests.
 
         Args:
             anomalies: List of anomaly dictionaries with log_message, log_level, log_service
@@ -122,30 +724,105 @@ Be specific, technical, and actionable. Focus on identifying the underlying caus
         Returns:
             Dictionary mapping anomaly identifier to reasoning string
         """
-        if not self.client:
+        if not self.async_client:
             return {}
 
-        results = {}
+        # Group anomalies with identical inputs so each unique one is analyzed once
+        groups: dict[tuple, list[str]] = {}
+        group_inputs: dict[tuple, dict[str, Any]] = {}
         for i, anomaly in enumerate(anomalies[:max_analyses]):
-            reasoning = self.analyze_anomaly(
-                log_message=anomaly.get("log_message", ""),
-                log_level=anomaly.get("log_level"),
-                log_service=anomaly.get("log_service"),
-                context_logs=anomaly.get("context_logs"),
+            cache_key = self._analysis_cache_key(
+                anomaly.get("log_message", ""),
+                anomaly.get("log_level"),
+                anomaly.get("log_service"),
+                anomaly.get("context_logs"),
             )
+            # Use log_id or index as key
+            groups.setdefault(cache_key, []).append(anomaly.get("log_id") or str(i))
+            group_inputs.setdefault(cache_key, anomaly)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def analyze(anomaly: dict[str, Any]) -> str | None:
+            async with semaphore:
+                return await self._analyze_anomaly_async(
+                    log_message=anomaly.get("log_message", ""),
+                    log_level=anomaly.get("log_level"),
+                    log_service=anomaly.get("log_service"),
+                    context_logs=anomaly.get("context_logs"),
+                )
+
+        reasonings = await asyncio.gather(
+            *(analyze(group_inputs[cache_key]) for cache_key in groups),
+            return_exceptions=True,
+        )
+
+        results = {}
+        for result_keys, reasoning in zip(groups.values(), reasonings, strict=True):
+            if isinstance(reasoning, BaseException):
+                logger.warning(f"Batch anomaly analysis failed: {reasoning}")
+                continue
             if reasoning:
-                # Use log_id or index as key
-                key = anomaly.get("log_id") or str(i)
-                results[key] = reasoning
+                for key in result_keys:
+                    results[key] = reasoning
 
         return results
 
+    def analyze_anomalies_batch(
+        self,
+        anomalies: list[dict[str, Any]],
+        max_analyses: int = 10,
+    ) -> dict[str, str]:
+        """Analyze multiple anomalies in batch.
+
+        Synchronous wrapper around analyze_anomalies_batch_async. Must not be
+        called from a running event loop; await the async variant instead.
+
+        Args:
+            anomalies: List of anomaly dictionaries with log_message, log_level, log_service
+            max_analyses: Maximum number of analyses to perform (to limit API costs)
+
+        Returns:
+            Dictionary mapping anomaly identifier to reasoning string
+        """
+        if not self.async_client:
+            return {}
+
+        return asyncio.run(self.analyze_anomalies_batch_async(anomalies, max_analyses))
+
+    def _classify_from_logprobs(self, choice) -> tuple[bool, float]:
+        """Derive the anomaly decision and confidence from a 1-token classification.
+
+        Confidence is the renormalized probability of the chosen label:
+        P(A) = exp(logprob_A) / (exp(logprob_A) + exp(logprob_N)).
+        Falls back to the generated token when logprobs are unavailable.
+        """
+        label_probs = {"A": 0.0, "N": 0.0}
+        logprobs = getattr(choice, "logprobs", None)
+        if logprobs and logprobs.content:
+            for candidate in logprobs.content[0].top_logprobs:
+                label = candidate.token.strip().upper()
+                if label in label_probs:
+                    label_probs[label] += math.exp(candidate.logprob)
+
+        total = label_probs["A"] + label_probs["N"]
+        if total > 0:
+            anomaly_probability = label_probs["A"] / total
+            is_anomaly = anomaly_probability >= 0.5
+            confidence = anomaly_probability if is_anomaly else 1.0 - anomaly_probability
+            return is_anomaly, confidence
+
+        # No usable logprobs - trust the generated token with neutral confidence
+        token = (choice.message.content or "").strip().upper()
+        return token.startswith("A"), 0.5
+
     def detect_anomaly(
         self,
         log_message: str,
         log_level: str | None = None,
         log_service: str | None = None,
         context_logs: list[dict[str, Any]] | None = None,
+        include_reasoning: bool = True,
     ) -> dict[str, Any] | None:
         """Detect if a log entry is anomalous using LLM classification.
 
@@ -153,89 +830,143 @@ Be specific, technical, and actionable. Focus on identifying the underlying caus
         its semantic content and context. Used in the hybrid detection pipeline
         to validate high-scoring anomalies from statistical methods.
 
+        Classification is a single-token completion ("A" for anomaly, "N" for
+        normal) with confidence derived from token logprobs. A second call for
+        the explanation is only made for logs classified as anomalous. When
+        llm_detection_batch_size > 1, classifications from concurrent callers
+        are coalesced into one multi-entry request.
+
         Args:
             log_message: The log message to analyze
             log_level: Optional log level (INFO, ERROR, etc.)
             log_service: Optional service name
             context_logs: Optional list of similar/normal logs for context
+            include_reasoning: Whether to generate an explanation for anomalous logs
 
         Returns:
             Dictionary with:
             - is_anomaly: Boolean indicating if log is anomalous
             - confidence: Float confidence score (0.0 to 1.0)
-            - reasoning: Explanation string
+            - reasoning: Explanation string (None if include_reasoning is False)
             Or None if detection failed
         """
         if not self.client:
             logger.warning("OpenAI client not initialized. Skipping LLM detection.")
             return None
 
+        # Classification is deterministic (temperature 0), so results are safe to reuse
+        cache_key = (
+            "detect",
+            include_reasoning,
+            *self._analysis_cache_key(log_message, log_level, log_service, context_logs),
+        )
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            logger.debug("LLM detection cache hit")
+            return dict(cached)
+
+        log_entry_text = _format_log_entry(log_message, log_level, log_service, context_logs)
         try:
-            # Build context from similar logs if provided
-            context_text = ""
-            if context_logs:
-                context_text = "\n\nSimilar normal logs for context:\n"
-                for i, log in enumerate(context_logs[:5], 1):  # Limit to 5 context logs
-                    context_text += f"{i}. [{log.get('level', 'N/A')}] {log.get('message', '')}\n"
+            result = self._single_flight(
+                cache_key, lambda: self._run_detection(log_entry_text, include_reasoning)
+            )
+            if result is None:
+                logger.warning("LLM detection returned no classification for log entry")
+                return None
 
-            # Build detection prompt
-            prompt = f"""You are a log analysis expert. Analyze the following log entry and determine if it is anomalous.
+            self._cache_analysis(cache_key, result)
+            return dict(result)
 
-Log Entry:
-- Level: {log_level or "N/A"}
-- Service: {log_service or "N/A"}
-- Message: {log_message}
-{context_text}
+        except RateLimitError as e:
+            logger.warning(f"OpenAI rate limit exceeded for LLM detection: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error in LLM anomaly detection: {e}", exc_info=True)
+            return None
 
-Respond in JSON format with the following structure:
-{{
-    "is_anomaly": true/false,
-    "confidence": 0.0-1.0,
-    "reasoning": "Brief explanation (2-3 sentences) of why this log is or isn't anomalous"
-}}
+    def _run_detection(self, log_entry_text: str, include_reasoning: bool) -> dict[str, Any] | None:
+        """Classify a formatted log entry and optionally explain the decision."""
+        if self._detection_batcher:
+            classification = self._detection_batcher.submit(log_entry_text).result()
+        else:
+            classification = self._classify(log_entry_text)
+        if classification is None:
+            return None
 
-Consider:
-1. Unusual patterns compared to normal logs
-2. Error severity and frequency
-3. Context and service behavior
-4. Potential security or operational issues"""
+        is_anomaly, confidence = classification
+        logger.debug(f"LLM detection: is_anomaly={is_anomaly}, confidence={confidence:.2f}")
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert log analyst. Always respond with valid JSON only, no additional text.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=400,
-                temperature=0.2,  # Lower temperature for more consistent classification
-                response_format={"type": "json_object"},
+        # Only anomalous logs (the rarer case) pay for an explanation call
+        reasoning = None
+        if include_reasoning and is_anomaly:
+            reasoning = self._explain_detection(log_entry_text) or "No reasoning provided"
+        elif include_reasoning:
+            reasoning = (
+                f"Classified as normal by LLM (confidence {confidence:.2f}); "
+                f"no anomalous pattern detected."
             )
 
-            result_json = json.loads(response.choices[0].message.content)
-            is_anomaly = result_json.get("is_anomaly", False)
-            confidence = float(result_json.get("confidence", 0.5))
-            reasoning = result_json.get("reasoning", "No reasoning provided")
+        return {
+            "is_anomaly": is_anomaly,
+            "confidence": confidence,
+            "reasoning": reasoning,
+        }
 
-            logger.debug(f"LLM detection: is_anomaly={is_anomaly}, confidence={confidence:.2f}")
+    def _classify(self, log_entry_text: str) -> tuple[bool, float]:
+        """Classify one formatted log entry with a single-token completion."""
+        response = self._create_completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_DETECT},
+                {"role": "user", "content": log_entry_text},
+            ],
+            max_tokens=1,
+            temperature=0.0,  # Deterministic classification
+            logprobs=True,
+            top_logprobs=2,
+        )
+        return self._classify_from_logprobs(response.choices[0])
 
-            return {
-                "is_anomaly": is_anomaly,
-                "confidence": confidence,
-                "reasoning": reasoning,
-            }
+    def _classify_batch(self, log_entry_texts: list[str]) -> list[tuple[bool, float] | None]:
+        """Classify several formatted log entries with one JSON completion.
 
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse LLM JSON response: {e}")
-            return None
-        except RateLimitError as e:
-            logger.warning(f"OpenAI rate limit exceeded for LLM detection: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error in LLM anomaly detection: {e}", exc_info=True)
-            return None
+        A batch of one uses the logprob classifier. Otherwise confidence is
+        the model's self-reported score, and entries missing from the response
+        map to None.
+        """
+        if len(log_entry_texts) == 1:
+            return [self._classify(log_entry_texts[0])]
+
+        entries = "\n\n".join(f"Entry {i}:\n{text}" for i, text in enumerate(log_entry_texts, 1))
+        response = self._create_completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_DETECT_BATCH},
+                {"role": "user", "content": entries},
+            ],
+            max_tokens=30 * len(log_entry_texts) + 20,
+            temperature=0.0,
+            response_format={"type": "json_schema", "json_schema": DETECT_BATCH_SCHEMA},
+        )
+
+        by_id = {
+            item["id"]: (item["is_anomaly"], min(max(item["confidence"], 0.0), 1.0))
+            for item in json.loads(response.choices[0].message.content)["results"]
+        }
+        return [by_id.get(i) for i in range(1, len(log_entry_texts) + 1)]
+
+    def _explain_detection(self, log_entry_text: str) -> str | None:
+        """Generate a brief explanation for a log classified as anomalous."""
+        response = self._create_completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_EXPLAIN_DETECTION},
+                {"role": "user", "content": log_entry_text},
+            ],
+            max_tokens=150,
+            temperature=0.2,
+        )
+        return response.choices[0].message.content
 
     def analyze_anomaly_with_root_cause(
         self,
@@ -269,13 +1000,6 @@ Consider:
             return None
 
         try:
-            # Build context from similar logs if provided
-            context_text = ""
-            if context_logs:
-                context_text = "\n\nSimilar normal logs for context:\n"
-                for i, log in enumerate(context_logs[:5], 1):  # Limit to 5 context logs
-                    context_text += f"{i}. [{log.get('level', 'N/A')}] {log.get('message', '')}\n"
-
             # Build cluster context if provided
             cluster_context_text = ""
             if cluster_info:
@@ -288,64 +1012,30 @@ Cluster Context:
 - Sample normal logs from cluster:
 """
                 sample_logs = cluster_info.get("sample_logs", [])[:3]
-                for i, log in enumerate(sample_logs, 1):
-                    cluster_context_text += (
-                        f"  {i}. [{log.get('level', 'N/A')}] {log.get('message', '')[:100]}...\n"
-                    )
-
-            # Build enhanced prompt
-            prompt = f"""You are a senior log analysis expert specializing in root cause analysis. Analyze the following log entry and provide structured analysis.
-
-Log Entry:
-- Level: {log_level or "N/A"}
-- Service: {log_service or "N/A"}
-- Message: {log_message}
-{context_text}{cluster_context_text}
-
-Respond in JSON format with the following structure:
-{{
-    "explanation": "Detailed explanation (3-4 sentences) of why this log is anomalous",
-    "root_causes": [
-        {{"hypothesis": "Root cause 1", "confidence": 0.0-1.0, "description": "Brief explanation"}},
-        {{"hypothesis": "Root cause 2", "confidence": 0.0-1.0, "description": "Brief explanation"}}
-    ],
-    "remediation_steps": [
-        {{"step": "Action 1", "priority": "HIGH/MEDIUM/LOW", "description": "What to do"}},
-        {{"step": "Action 2", "priority": "HIGH/MEDIUM/LOW", "description": "What to do"}}
-    ],
-    "severity": "LOW/MEDIUM/HIGH/CRITICAL",
-    "severity_reason": "Why this severity level"
-}}
+                cluster_context_text += "".join(
+                    f"  {i}. [{log.get('level', 'N/A')}] {log.get('message', '')[:100]}...\n"
+                    for i, log in enumerate(sample_logs, 1)
+                )
 
-Focus on:
-1. Specific technical root causes (not generic issues)
-2. Actionable remediation steps
-3. Accurate severity assessment based on operational impact"""
+            prompt = (
+                _format_log_entry(log_message, log_level, log_service, context_logs)
+                + cluster_context_text
+            )
 
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert log analyst. Always respond with valid JSON only, no additional text.",
-                    },
+                    {"role": "system", "content": SYSTEM_ROOT_CAUSE},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=800,
                 temperature=0.3,
-                response_format={"type": "json_object"},
+                response_format={"type": "json_schema", "json_schema": ROOT_CAUSE_SCHEMA},
             )
 
-            result_json = json.loads(response.choices[0].message.content)
-
-            # Validate and structure the response
-            result = {
-                "explanation": result_json.get("explanation", "No explanation provided"),
-                "root_causes": result_json.get("root_causes", []),
-                "remediation_steps": result_json.get("remediation_steps", []),
-                "severity": result_json.get("severity", "MEDIUM"),
-                "severity_reason": result_json.get("severity_reason", "No reason provided"),
-            }
+            # Shape is guaranteed by the strict schema; a decode error only occurs
+            # if the output was truncated at max_tokens
+            result = json.loads(response.choices[0].message.content)
 
             logger.debug(
                 f"Generated root cause analysis: severity={result['severity']}, "
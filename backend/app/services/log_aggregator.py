@@ -6,22 +6,26 @@ single log entries before processing.
 """
 
 import logging
-import re
 import threading
 import time
-from collections import defaultdict
 from dataclasses import dataclass, field
 
+from app.utils.regex import compile_pattern
+
 logger = logging.getLogger(__name__)
 
+# Number of lock stripes guarding buffers (power of two, see _slot)
+LOCK_STRIPES = 64
+
 
-@dataclass
+@dataclass(slots=True)
 class LogBuffer:
     """Buffer for accumulating multiline log entries."""
 
     lines: list[str] = field(default_factory=list)
-    first_timestamp: float = 0.0
-    last_timestamp: float = 0.0
+    # Monotonic clock readings in nanoseconds (time.monotonic_ns)
+    first_timestamp: int = 0
+    last_timestamp: int = 0
     metadata: dict = field(default_factory=dict)
     is_error: bool = False
 
@@ -39,44 +43,71 @@ class LogAggregator:
     - Buffer is explicitly flushed
     """
 
-    # Patterns that indicate the START of a new log entry
-    NEW_ENTRY_PATTERNS = [
-        re.compile(r"^(DEBUG|INFO|WARNING|ERROR|CRITICAL):"),
-        re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}"),
-        re.compile(r"^\[\d{4}-\d{2}-\d{2}"),
-        re.compile(r"^\[(DEBUG|INFO|WARNING|ERROR|CRITICAL)\]"),
-    ]
-
-    # Patterns that indicate CONTINUATION of current entry (stack trace lines)
-    CONTINUATION_PATTERNS = [
-        re.compile(r"^\s{2,}"),
-        re.compile(r"^File \""),
-        re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*Error:"),
-        re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*Exception:"),
-        re.compile(r"^The above exception was the direct cause"),
-        re.compile(r"^During handling of the above exception"),
-        re.compile(r"^Traceback \(most recent call last\):"),
-        re.compile(r"^\s*[\^~]+\s*$"),
-        re.compile(r"^\s*\|"),
-    ]
+    # Literal prefixes are checked with str.startswith(tuple), which runs in C
+    # without regex overhead. The remaining shapes of each family are fused into
+    # one alternation, so classifying a line costs at most a single regex call.
+    # Log content is untrusted, so these use RE2 when available (see compile_pattern).
+
+    # Prefixes and patterns that indicate the START of a new log entry
+    NEW_ENTRY_PREFIXES = (
+        "DEBUG:",
+        "INFO:",
+        "WARNING:",
+        "ERROR:",
+        "CRITICAL:",
+        "[DEBUG]",
+        "[INFO]",
+        "[WARNING]",
+        "[ERROR]",
+        "[CRITICAL]",
+    )
+    NEW_ENTRY_RE = compile_pattern(
+        r"^(?:\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}|\[\d{4}-\d{2}-\d{2})"
+    )
+
+    # Prefixes and patterns that indicate CONTINUATION of current entry (stack trace lines)
+    CONTINUATION_PREFIXES = (
+        'File "',
+        "The above exception was the direct cause",
+        "During handling of the above exception",
+        "Traceback (most recent call last):",
+    )
+    CONTINUATION_RE = compile_pattern(
+        r"^(?:"
+        r"\s{2,}"
+        r"|[A-Za-z_][A-Za-z0-9_.]*(?:Error|Exception):"
+        r"|\s*[\^~]+\s*$"
+        r"|\s*\|"
+        r")"
+    )
 
     # Patterns that indicate ERROR level (must be actual error indicators, not just the word)
-    ERROR_INDICATORS = [
-        re.compile(r"Traceback \(most recent call last\):"),
-        re.compile(r"^(ERROR|CRITICAL|FATAL):", re.MULTILINE),  # At start of line
-        re.compile(r"^\[(ERROR|CRITICAL|FATAL)\]", re.MULTILINE),  # Bracketed at start
-        re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*Error:", re.MULTILINE),  # Exception type
-        re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*Exception:", re.MULTILINE),  # Exception type
-        re.compile(r"raise \w+Error\("),  # Raising an error
-        re.compile(r"raise \w+Exception\("),  # Raising an exception
-    ]
+    ERROR_INDICATOR_RE = compile_pattern(
+        r"(?m)Traceback \(most recent call last\):"
+        r"|^(?:ERROR|CRITICAL|FATAL):"  # At start of line
+        r"|^\[(?:ERROR|CRITICAL|FATAL)\]"  # Bracketed at start
+        r"|^[A-Za-z_][A-Za-z0-9_.]*(?:Error|Exception):"  # Exception type
+        r"|raise \w+(?:Error|Exception)\("  # Raising an error or exception
+    )
+
+    # Log level prefix that may be followed by continuation lines (e.g., "ERROR:module:")
+    MULTILINE_START_RE = compile_pattern(r"^(?:ERROR|WARN|WARNING|CRITICAL|FATAL):")
 
     def __init__(self, flush_timeout: float = 2.0, max_lines: int = 100):
         """Initialize the log aggregator."""
         self.flush_timeout = flush_timeout
+        # Timeouts are compared against time.monotonic_ns(), which is immune to
+        # wall-clock adjustments and keeps per-line arithmetic in integers
+        self.flush_timeout_ns = int(flush_timeout * 1_000_000_000)
         self.max_lines = max_lines
-        self._buffers: dict[str, LogBuffer] = defaultdict(LogBuffer)
-        self._lock = threading.Lock()
+        # Buffers are partitioned into lock stripes by key so consumer threads
+        # handling different containers do not serialize on a single lock
+        self._buffers: list[dict[str, LogBuffer]] = [{} for _ in range(LOCK_STRIPES)]
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _slot(self, key: str) -> int:
+        """Return the lock stripe index for a buffer key."""
+        return hash(key) & (LOCK_STRIPES - 1)
 
     def _get_buffer_key(self, raw_data: dict) -> str:
         """Generate a unique key for buffering logs from the same source."""
@@ -86,11 +117,14 @@ class LogAggregator:
 
     def _is_new_entry(self, line: str) -> bool:
         """Check if line starts a new log entry."""
-        return any(pattern.match(line) for pattern in self.NEW_ENTRY_PATTERNS)
+        return line.startswith(self.NEW_ENTRY_PREFIXES) or self.NEW_ENTRY_RE.match(line) is not None
 
     def _is_continuation(self, line: str) -> bool:
         """Check if line is a continuation of current entry."""
-        return any(pattern.match(line) for pattern in self.CONTINUATION_PATTERNS)
+        return (
+            line.startswith(self.CONTINUATION_PREFIXES)
+            or self.CONTINUATION_RE.match(line) is not None
+        )
 
     def _is_traceback_start(self, line: str) -> bool:
         """Check if line starts a traceback."""
@@ -98,7 +132,7 @@ class LogAggregator:
 
     def _has_error_indicators(self, text: str) -> bool:
         """Check if text contains error indicators."""
-        return any(pattern.search(text) for pattern in self.ERROR_INDICATORS)
+        return self.ERROR_INDICATOR_RE.search(text) is not None
 
     def _extract_line(self, raw_data: dict) -> str:
         """Extract the log line from raw data."""
@@ -108,29 +142,50 @@ class LogAggregator:
         return ""
 
     def _flush_buffer(self, key: str) -> dict | None:
-        """Flush a buffer and return the aggregated log entry."""
-        buffer = self._buffers.get(key)
+        """Flush a buffer and return the aggregated log entry.
+
+        The caller must hold the lock for the key's stripe.
+        """
+        buffer = self._buffers[self._slot(key)].pop(key, None)
         if not buffer or not buffer.lines:
             return None
 
-        combined_message = "\n".join(buffer.lines)
-        is_error = buffer.is_error or self._has_error_indicators(combined_message)
-
+        # Only "message" is set: the original "log" field was stripped from the
+        # metadata, and writing the combined text under both keys would
+        # serialize it twice into the stored raw_log JSON
         result = {
             **buffer.metadata,
-            "message": combined_message,
-            "log": combined_message,
+            "message": "\n".join(buffer.lines),
             "_aggregated": True,
             "_line_count": len(buffer.lines),
         }
 
-        if is_error:
+        # is_error is maintained per line as lines are buffered, so the combined
+        # message never needs a second scan
+        if buffer.is_error:
             result["level"] = "ERROR"
             result["_detected_error"] = True
 
-        self._buffers[key] = LogBuffer()
         return result
 
+    def _start_buffer(
+        self,
+        buffers: dict[str, LogBuffer],
+        key: str,
+        line: str,
+        raw_data: dict,
+        now: int,
+        is_error: bool,
+    ) -> None:
+        """Create the buffer for a new multiline entry beginning with line."""
+        buffers[key] = LogBuffer(
+            lines=[line],
+            first_timestamp=now,
+            last_timestamp=now,
+            metadata={k: v for k, v in raw_data.items() if k not in ["log", "message"]},
+            is_error=is_error,
+        )
+
     def process(self, raw_data: dict) -> list[dict]:
         """Process a raw log entry, potentially aggregating with previous lines.
 
@@ -148,17 +203,21 @@ class LogAggregator:
             return results
 
         key = self._get_buffer_key(raw_data)
+        slot = self._slot(key)
+        buffers = self._buffers[slot]
 
-        with self._lock:
-            buffer = self._buffers[key]
-            now = time.time()
+        with self._locks[slot]:
+            # Buffers only exist while a multiline entry is open; single-line
+            # passthrough logs never allocate one
+            buffer = buffers.get(key)
+            now = time.monotonic_ns()
 
             # Check if we should flush due to timeout
-            if buffer.lines and (now - buffer.last_timestamp) > self.flush_timeout:
+            if buffer and (now - buffer.last_timestamp) > self.flush_timeout_ns:
                 flushed = self._flush_buffer(key)
                 if flushed:
                     results.append(flushed)
-                buffer = self._buffers[key]
+                buffer = None
 
             # Check if this is a new entry or continuation
             is_new = self._is_new_entry(line)
@@ -167,25 +226,21 @@ class LogAggregator:
 
             # Special case: Traceback starts a new error sequence
             if is_traceback:
-                if buffer.lines:
+                if buffer:
                     flushed = self._flush_buffer(key)
                     if flushed:
                         results.append(flushed)
-                    buffer = self._buffers[key]
 
-                buffer.lines = [line]
-                buffer.first_timestamp = now
-                buffer.last_timestamp = now
-                buffer.metadata = {k: v for k, v in raw_data.items() if k not in ["log", "message"]}
-                buffer.is_error = True
+                self._start_buffer(buffers, key, line, raw_data, now, is_error=True)
                 return results
 
             # If we have a buffer and this is a continuation, append
-            if buffer.lines and (is_continuation or not is_new):
+            if buffer and (is_continuation or not is_new):
                 buffer.lines.append(line)
                 buffer.last_timestamp = now
 
-                if self._has_error_indicators(line):
+                # Once the buffer is known to be an error, further scans can't change it
+                if not buffer.is_error and self._has_error_indicators(line):
                     buffer.is_error = True
 
                 if len(buffer.lines) >= self.max_lines:
@@ -196,27 +251,23 @@ class LogAggregator:
                 return results
 
             # This is a new entry - flush existing buffer first
-            if buffer.lines:
+            if buffer:
                 flushed = self._flush_buffer(key)
                 if flushed:
                     results.append(flushed)
-                buffer = self._buffers[key]
 
             # Check if this line might start a multiline sequence
             # Only buffer if it looks like an actual error/exception start
+            has_error = self._has_error_indicators(line)
             might_have_continuation = (
-                self._has_error_indicators(line)
+                has_error
                 or self._is_traceback_start(line)
                 # Line starts with a log level followed by colon (e.g., "ERROR:module:")
-                or re.match(r"^(ERROR|WARN|WARNING|CRITICAL|FATAL):", line)
+                or self.MULTILINE_START_RE.match(line)
             )
 
             if might_have_continuation:
-                buffer.lines = [line]
-                buffer.first_timestamp = now
-                buffer.last_timestamp = now
-                buffer.metadata = {k: v for k, v in raw_data.items() if k not in ["log", "message"]}
-                buffer.is_error = self._has_error_indicators(line)
+                self._start_buffer(buffers, key, line, raw_data, now, is_error=has_error)
             else:
                 results.append(raw_data)
 
@@ -226,28 +277,33 @@ class LogAggregator:
         """Flush all buffers and return any pending entries."""
         results = []
 
-        with self._lock:
-            keys = list(self._buffers.keys())
-            for key in keys:
-                flushed = self._flush_buffer(key)
-                if flushed:
-                    results.append(flushed)
+        # Lock one stripe at a time so ingestion on other stripes keeps running
+        for buffers, lock in zip(self._buffers, self._locks, strict=True):
+            with lock:
+                for key in list(buffers.keys()):
+                    flushed = self._flush_buffer(key)
+                    if flushed:
+                        results.append(flushed)
 
         return results
 
     def flush_expired(self) -> list[dict]:
         """Flush only buffers that have exceeded the timeout."""
         results = []
-        now = time.time()
-
-        with self._lock:
-            keys = list(self._buffers.keys())
-            for key in keys:
-                buffer = self._buffers.get(key)
-                if buffer and buffer.lines and (now - buffer.last_timestamp) > self.flush_timeout:
-                    flushed = self._flush_buffer(key)
-                    if flushed:
-                        results.append(flushed)
+        now = time.monotonic_ns()
+
+        for buffers, lock in zip(self._buffers, self._locks, strict=True):
+            with lock:
+                for key in list(buffers.keys()):
+                    buffer = buffers.get(key)
+                    if (
+                        buffer
+                        and buffer.lines
+                        and (now - buffer.last_timestamp) > self.flush_timeout_ns
+                    ):
+                        flushed = self._flush_buffer(key)
+                        if flushed:
+                            results.append(flushed)
 
         return results
 
@@ -1,89 +1,200 @@
 """Metadata extraction service for log entries."""
 
+import contextlib
 import re
-from datetime import datetime
+from datetime import UTC, datetime
 
 from app.models.log import RawLogEntry
 
 
+def _trie_regex(words: tuple[str, ...]) -> str:
+    """Build a prefix-factored regex alternation matching exactly the given words.
+
+    Words sharing a prefix are merged so the prefix is matched once, e.g.
+    ("WARN", "WARNING") becomes "WARN(?:ING)?".
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+# Level words recognized at the start of a message. TRACE and INFORMATION are
+# only accepted in the colon and bracketed formats.
+LEVEL_WORDS = _trie_regex(
+    ("ERROR", "CRITICAL", "FATAL", "WARN", "WARNING", "INFO", "INFORMATION", "DEBUG", "TRACE")
+)
+LEVEL_WORDS_SHORT = _trie_regex(("ERROR", "CRITICAL", "FATAL", "WARN", "WARNING", "INFO", "DEBUG"))
+
+
 class MetadataExtractor:
     """Extract metadata from log entries."""
 
-    # Patterns for log level at the START of a message (high confidence)
-    # These indicate the actual log level, not just a mention of the word
-    LEVEL_START_PATTERNS = [
-        # Python logging: "ERROR:module:message" or "INFO:module:message"
-        (re.compile(r"^(ERROR|CRITICAL|FATAL):"), "ERROR"),
-        (re.compile(r"^(WARN|WARNING):"), "WARN"),
-        (re.compile(r"^(INFO|INFORMATION):"), "INFO"),
-        (re.compile(r"^(DEBUG|TRACE):"), "DEBUG"),
-        # Uvicorn/ASGI format: "INFO: 127.0.0.1:8000 - ..."
-        (re.compile(r"^(ERROR|CRITICAL|FATAL):\s"), "ERROR"),
-        (re.compile(r"^(WARN|WARNING):\s"), "WARN"),
-        (re.compile(r"^(INFO):\s"), "INFO"),
-        (re.compile(r"^(DEBUG):\s"), "DEBUG"),
+    # Log level at the START of a message (high confidence). These indicate the
+    # actual log level, not just a mention of the word. All formats are fused
+    # into one case-insensitive alternation; exactly one group captures the level.
+    LEVEL_START_PATTERN = re.compile(
+        r"^(?:"
+        # Python logging / Uvicorn: "ERROR:module:message", "INFO: 127.0.0.1:8000 - ..."
+        rf"({LEVEL_WORDS}):"
         # Bracketed format: "[ERROR]", "[INFO]", etc.
-        (re.compile(r"^\[(ERROR|CRITICAL|FATAL)\]"), "ERROR"),
-        (re.compile(r"^\[(WARN|WARNING)\]"), "WARN"),
-        (re.compile(r"^\[(INFO|INFORMATION)\]"), "INFO"),
-        (re.compile(r"^\[(DEBUG|TRACE)\]"), "DEBUG"),
+        rf"|\[({LEVEL_WORDS})\]"
         # Log4j/Java style: "ERROR - message" or "INFO - message"
-        (re.compile(r"^(ERROR|CRITICAL|FATAL)\s+-\s+"), "ERROR"),
-        (re.compile(r"^(WARN|WARNING)\s+-\s+"), "WARN"),
-        (re.compile(r"^(INFO)\s+-\s+"), "INFO"),
-        (re.compile(r"^(DEBUG)\s+-\s+"), "DEBUG"),
+        rf"|({LEVEL_WORDS_SHORT})\s+-\s+"
         # Timestamp followed by level: "2024-01-01 12:00:00 ERROR ..."
-        (
-            re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[^\w]*(ERROR|CRITICAL|FATAL)\b"),
-            "ERROR",
-        ),
-        (re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[^\w]*(WARN|WARNING)\b"), "WARN"),
-        (re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[^\w]*(INFO)\b"), "INFO"),
-        (re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[^\w]*(DEBUG)\b"), "DEBUG"),
-    ]
-
-    # Stack trace indicators - these should be classified as ERROR
-    STACK_TRACE_PATTERNS = [
-        re.compile(r"Traceback \(most recent call last\):"),
-        re.compile(r"^\s+File \"[^\"]+\", line \d+", re.MULTILINE),
-        re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*Error:", re.MULTILINE),
-        re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*Exception:", re.MULTILINE),
-        re.compile(r"The above exception was the direct cause"),
-        re.compile(r"During handling of the above exception"),
-        re.compile(r"raise \w+Error\("),
-        re.compile(r"raise \w+Exception\("),
-    ]
+        rf"|\d{{4}}-\d{{2}}-\d{{2}}[T ]\d{{2}}:\d{{2}}:\d{{2}}[^\w]*({LEVEL_WORDS_SHORT})\b"
+        r")",
+        re.IGNORECASE,
+    )
+
+    # Level names accepted verbatim from the raw log or its metadata
+    EXPLICIT_LEVELS = frozenset(("DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL", "FATAL"))
+
+    # Characters a LEVEL_START_PATTERN match can begin with (level word initial,
+    # "[" or a timestamp digit); anything else skips the regex entirely
+    LEVEL_FIRST_CHARS = frozenset("ECFWIDTecfwidt[0123456789")
+
+    # Canonical level for each level word captured by LEVEL_START_PATTERN
+    LEVEL_ALIASES = {
+        "ERROR": "ERROR",
+        "CRITICAL": "ERROR",
+        "FATAL": "ERROR",
+        "WARN": "WARN",
+        "WARNING": "WARN",
+        "INFO": "INFO",
+        "INFORMATION": "INFO",
+        "DEBUG": "DEBUG",
+        "TRACE": "DEBUG",
+    }
+
+    # Stack trace indicators - these should be classified as ERROR. All
+    # indicators are fused into one alternation so a message is scanned once.
+    STACK_TRACE_PATTERN = re.compile(
+        r"Traceback \(most recent call last\):"
+        r"|^\s+File \"[^\"]+\", line \d+"
+        r"|^[A-Za-z_][A-Za-z0-9_.]*(?:Error|Exception):"
+        r"|The above exception was the direct cause"
+        r"|During handling of the above exception"
+        r"|raise \w+(?:Error|Exception)\(",
+        re.MULTILINE,
+    )
+
+    # Literal substrings at least one of which every STACK_TRACE_PATTERN match
+    # contains; messages with none of them skip the regex scan
+    STACK_TRACE_MARKERS = ("Error", "Exception", "Traceback", "raise ", 'File "', "above exception")
+
+    # ISO-like timestamp embedded in a message ("T" or space separated)
+    TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}")
 
     # HTTP status code patterns - use status code to determine level
     HTTP_STATUS_PATTERN = re.compile(r'HTTP/[\d.]+"\s+(\d{3})')
 
-    # Common service name patterns
-    SERVICE_PATTERNS = [
-        (r"service[=:]\s*([^\s,]+)", "service"),
-        (r"app[=:]\s*([^\s,]+)", "app"),
-        (r"component[=:]\s*([^\s,]+)", "component"),
-    ]
+    # Level for every three-digit status code: 5xx ERROR, 4xx WARN, 2xx-3xx INFO
+    HTTP_STATUS_LEVELS = tuple(
+        "ERROR" if code >= 500 else "WARN" if code >= 400 else "INFO" if code >= 200 else "DEBUG"
+        for code in range(1000)
+    )
+
+    # Key/value service name markers, one group per marker in priority order
+    # ("service=" before "app:" before "component="). A message with several
+    # markers resolves to the lowest-numbered group found. Each alternative
+    # sits in a lookahead so one marker's value cannot hide a later marker.
+    SERVICE_PATTERN = re.compile(
+        r"(?=service[=:]\s*([^\s,]+)|app[=:]\s*([^\s,]+)|component[=:]\s*([^\s,]+))",
+        re.IGNORECASE,
+    )
+
+    # Keyword fallbacks, one group per service in priority order. A message
+    # naming several services resolves to the lowest-numbered group found.
+    SERVICE_KEYWORD_PATTERN = re.compile(r"(nginx)|(postgres|database)|(kafka)", re.IGNORECASE)
+    SERVICE_KEYWORD_NAMES = ("nginx", "postgres", "kafka")
+
+    # TIMESTAMP_PATTERN, HTTP_STATUS_PATTERN and SERVICE_PATTERN fused into one
+    # scan. Each alternative sits in a lookahead so nothing is consumed and the
+    # first hit of every field is seen, exactly as separate searches would.
+    MESSAGE_FIELDS_PATTERN = re.compile(
+        r"(?=(?:"
+        r"(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})"
+        r'|HTTP/[\d.]+"\s+(\d{3})'
+        r"|(?i:service)[=:]\s*([^\s,]+)"
+        r"|(?i:app)[=:]\s*([^\s,]+)"
+        r"|(?i:component)[=:]\s*([^\s,]+)"
+        r"))"
+    )
+    # Field for each MESSAGE_FIELDS_PATTERN group; a field's lowest-numbered
+    # group has the highest priority
+    MESSAGE_FIELD_NAMES = ("timestamp", "http_status", "service", "service", "service")
+    MESSAGE_FIELD_BEST_GROUPS = {"timestamp": 1, "http_status": 2, "service": 3}
+
+    def _scan_message(self, message: str) -> dict[str, str]:
+        """Find the timestamp, HTTP status and service marker in one pass.
+
+        Each field takes its first hit, except that a higher-priority service
+        marker replaces a lower-priority one found earlier in the message.
+        """
+        found: dict[str, str] = {}
+        groups: dict[str, int] = {}
+        for match in self.MESSAGE_FIELDS_PATTERN.finditer(message):
+            group = match.lastindex
+            field = self.MESSAGE_FIELD_NAMES[group - 1]
+            if group < groups.get(field, len(self.MESSAGE_FIELD_NAMES) + 1):
+                groups[field] = group
+                found[field] = match[group]
+                if groups == self.MESSAGE_FIELD_BEST_GROUPS:
+                    break
+        return found
+
+    def _find_service_marker(self, message: str) -> str | None:
+        """Return the value of the highest-priority service marker in the message."""
+        best = None
+        for match in self.SERVICE_PATTERN.finditer(message):
+            if best is None or match.lastindex < best.lastindex:
+                best = match
+                if best.lastindex == 1:
+                    break
+        return best[best.lastindex] if best else None
 
     def _is_stack_trace(self, message: str) -> bool:
         """Check if message contains stack trace indicators."""
-        return any(pattern.search(message) for pattern in self.STACK_TRACE_PATTERNS)
-
-    def _extract_level_from_http_status(self, message: str) -> str | None:
+        # Plain loop rather than any(<genexpr>): no generator frame per message
+        for marker in self.STACK_TRACE_MARKERS:
+            if marker in message:
+                return self.STACK_TRACE_PATTERN.search(message) is not None
+        return False
+
+    def _extract_level_from_http_status(
+        self, message: str, scan: dict[str, str] | None = None
+    ) -> str | None:
         """Extract log level based on HTTP status code in the message."""
-        match = self.HTTP_STATUS_PATTERN.search(message)
-        if match:
-            status_code = int(match.group(1))
-            if status_code >= 500:
-                return "ERROR"
-            elif status_code >= 400:
-                return "WARN"
-            elif status_code >= 200:
-                return "INFO"
-            else:
-                return "DEBUG"
+        if scan is None:
+            match = self.HTTP_STATUS_PATTERN.search(message)
+            status = match.group(1) if match else None
+        else:
+            status = scan.get("http_status")
+        if status:
+            return self.HTTP_STATUS_LEVELS[int(status)]
         return None
 
-    def extract_level(self, message: str, metadata: dict, level: str | None = None) -> str:
+    def extract_level(
+        self,
+        message: str,
+        metadata: dict,
+        level: str | None = None,
+        scan: dict[str, str] | None = None,
+    ) -> str:
         """Extract log level from message or metadata.
 
         Priority order:
@@ -93,31 +204,38 @@ class MetadataExtractor:
         4. Log level at START of message (high confidence patterns)
         5. HTTP status code in message
         6. Default to INFO
+
+        ``scan`` is a precomputed ``_scan_message`` result for ``message``.
         """
         # Check raw_log.level first (highest priority)
         if level:
-            level_upper = str(level).upper()
-            if level_upper in ["DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL", "FATAL"]:
+            # Already-canonical levels (the common case) skip the upper() copy
+            level_upper = level if level in self.EXPLICIT_LEVELS else str(level).upper()
+            if level_upper in self.EXPLICIT_LEVELS:
                 return level_upper if level_upper != "WARNING" else "WARN"
 
         # Check metadata
         if "level" in metadata:
             meta_level = str(metadata["level"]).upper()
-            if meta_level in ["DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL", "FATAL"]:
+            if meta_level in self.EXPLICIT_LEVELS:
                 return meta_level if meta_level != "WARNING" else "WARN"
 
+        # Nothing to scan in an empty message
+        if not message:
+            return "INFO"
+
         # Check for stack trace patterns - these are always errors
         if self._is_stack_trace(message):
             return "ERROR"
 
         # Check for level at the START of the message (high confidence)
-        message_upper = message.upper()
-        for pattern, detected_level in self.LEVEL_START_PATTERNS:
-            if pattern.match(message_upper):
-                return detected_level
+        if message[0] in self.LEVEL_FIRST_CHARS:
+            match = self.LEVEL_START_PATTERN.match(message)
+            if match:
+                return self.LEVEL_ALIASES[match.group(match.lastindex).upper()]
 
         # Check HTTP status code in message
-        http_level = self._extract_level_from_http_status(message)
+        http_level = self._extract_level_from_http_status(message, scan)
         if http_level:
             return http_level
 
@@ -125,9 +243,17 @@ class MetadataExtractor:
         return "INFO"
 
     def extract_service(
-        self, message: str, metadata: dict, log_type: str | None = None, service: str | None = None
+        self,
+        message: str,
+        metadata: dict,
+        log_type: str | None = None,
+        service: str | None = None,
+        scan: dict[str, str] | None = None,
     ) -> str:
-        """Extract service name from message, metadata, or log type."""
+        """Extract service name from message, metadata, or log type.
+
+        ``scan`` is a precomputed ``_scan_message`` result for ``message``.
+        """
         # Check raw_log.service first (highest priority)
         if service:
             return str(service)
@@ -137,69 +263,78 @@ class MetadataExtractor:
             return str(metadata["service"])
 
         # Check for service patterns in message
-        for pattern, _ in self.SERVICE_PATTERNS:
-            match = re.search(pattern, message, re.IGNORECASE)
-            if match:
-                return match.group(1)
+        if scan is None:
+            marker = self._find_service_marker(message)
+            if marker:
+                return marker
+        elif "service" in scan:
+            return scan["service"]
 
         # Use log type as fallback
         if log_type:
             return log_type
 
         # Check for common service indicators
-        if "nginx" in message.lower():
-            return "nginx"
-        if "postgres" in message.lower() or "database" in message.lower():
-            return "postgres"
-        if "kafka" in message.lower():
-            return "kafka"
+        group = min(
+            (match.lastindex for match in self.SERVICE_KEYWORD_PATTERN.finditer(message)),
+            default=None,
+        )
+        if group:
+            return self.SERVICE_KEYWORD_NAMES[group - 1]
 
         # Default
         return "unknown"
 
-    def extract_timestamp(self, raw_log: RawLogEntry) -> datetime:
-        """Extract or generate timestamp."""
+    def extract_timestamp(
+        self,
+        raw_log: RawLogEntry,
+        scan: dict[str, str] | None = None,
+        now: datetime | None = None,
+    ) -> datetime:
+        """Extract or generate timestamp.
+
+        ``scan`` is a precomputed ``_scan_message`` result for the log message.
+        ``now`` is the fallback for logs without a timestamp, letting a batch
+        share one clock read; it defaults to the current time.
+        """
         if raw_log.timestamp:
             return raw_log.timestamp
 
-        # Try to extract from message
-        timestamp_patterns = [
-            r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})",
-            r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})",
-        ]
+        # Try to extract from message; fromisoformat accepts both separators
+        if scan is None:
+            match = self.TIMESTAMP_PATTERN.search(raw_log.message)
+            timestamp = match.group(0) if match else None
+        else:
+            timestamp = scan.get("timestamp")
+        if timestamp:
+            with contextlib.suppress(ValueError):
+                return datetime.fromisoformat(timestamp)
 
-        for pattern in timestamp_patterns:
-            match = re.search(pattern, raw_log.message)
-            if match:
-                try:
-                    ts_str = match.group(1)
-                    if "T" in ts_str:
-                        return datetime.fromisoformat(ts_str)
-                    else:
-                        return datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    continue
-
-        # Default to now
-        return datetime.utcnow()
-
-    def extract_metadata(self, raw_log: RawLogEntry) -> dict:
-        """Extract all metadata from raw log entry."""
-        timestamp = self.extract_timestamp(raw_log)
-        level = self.extract_level(raw_log.message, raw_log.metadata, raw_log.level)
+        # Default to now (naive UTC, matching parsed timestamps)
+        return now or datetime.now(UTC).replace(tzinfo=None)
+
+    def extract_metadata(self, raw_log: RawLogEntry, now: datetime | None = None) -> dict:
+        """Extract all metadata from raw log entry.
+
+        ``now`` is the fallback timestamp, see ``extract_timestamp``.
+        """
+        # Scan the message once for every field that may fall back to it,
+        # unless the raw log already supplies all of them
+        scan = None
+        if raw_log.message and not (raw_log.timestamp and raw_log.level and raw_log.service):
+            scan = self._scan_message(raw_log.message)
+
+        timestamp = self.extract_timestamp(raw_log, scan, now)
+        level = self.extract_level(raw_log.message, raw_log.metadata, raw_log.level, scan)
         service = self.extract_service(
-            raw_log.message, raw_log.metadata, raw_log.log_type, raw_log.service
+            raw_log.message, raw_log.metadata, raw_log.log_type, raw_log.service, scan
         )
 
-        # Merge with existing metadata
-        metadata = raw_log.metadata.copy()
-        metadata.update(
-            {
-                "extracted_level": level,
-                "extracted_service": service,
-                "log_type": raw_log.log_type or "unknown",
-            }
-        )
+        # Merge with existing metadata (copy only when there is something to copy)
+        metadata = raw_log.metadata.copy() if raw_log.metadata else {}
+        metadata["extracted_level"] = level
+        metadata["extracted_service"] = service
+        metadata["log_type"] = raw_log.log_type or "unknown"
 
         return {
             "timestamp": timestamp,
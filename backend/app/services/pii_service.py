@@ -1,11 +1,16 @@
 """Presidio PII detection and redaction service."""
 
 import logging
+import multiprocessing
 import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 from presidio_anonymizer.entities import OperatorConfig
 
 from app.config import get_settings
+from app.utils.regex import compile_pattern
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -14,14 +19,20 @@ logger = logging.getLogger(__name__)
 PII_CONFIDENCE_THRESHOLD = 0.7
 
 # Entity types that produce too many false positives in log data
-EXCLUDED_ENTITY_TYPES = {
-    "US_DRIVER_LICENSE",  # Matches numeric sequences like process IDs
-    "DATE_TIME",  # Matches timestamps which are expected in logs
-    "URL",  # URLs in logs are usually not PII (endpoints, docs)
-    "PERSON",  # Too many false positives with service names, hostnames
-    "LOCATION",  # Matches service names, hostnames (e.g., "presidio" = SF neighborhood)
-    "NRP",  # Nationalities, religious, political groups - not relevant for logs
-}
+EXCLUDED_ENTITY_TYPES = frozenset(
+    {
+        "US_DRIVER_LICENSE",  # Matches numeric sequences like process IDs
+        "DATE_TIME",  # Matches timestamps which are expected in logs
+        "URL",  # URLs in logs are usually not PII (endpoints, docs)
+        "PERSON",  # Too many false positives with service names, hostnames
+        "LOCATION",  # Matches service names, hostnames (e.g., "presidio" = SF neighborhood)
+        "NRP",  # Nationalities, religious, political groups - not relevant for logs
+    }
+)
+
+# Presidio findings never kept: the excluded types plus IPs, which the regex
+# phase has already replaced
+IGNORED_PRESIDIO_ENTITY_TYPES = EXCLUDED_ENTITY_TYPES | {"IP_ADDRESS"}
 
 # Patterns that indicate kernel/system log data
 KERNEL_LOG_INDICATORS = [
@@ -29,155 +40,319 @@ KERNEL_LOG_INDICATORS = [
     r"\[\s*\d+\.\d+\]",
     r"pid=\d+|uid=\d+|gid=\d+",
 ]
+KERNEL_LOG_PATTERN = compile_pattern("(?i)" + "|".join(KERNEL_LOG_INDICATORS))
+
+# Hosted vector DB / LLM domains whose hostnames carry cluster identifiers
+SENSITIVE_HOST_SUFFIXES = (
+    "qdrant.io",
+    "pinecone.io",
+    "weaviate.cloud",
+    "openai.azure.com",
+    "milvus.io",
+    "chroma.cloud",
+)
 
-# Regex patterns for sensitive data redaction
-IP_PORT_PATTERN = re.compile(r"\b(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})(:\d{1,5})?\b")
-
-UUID_PATTERN = re.compile(
-    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+# Sensitive data redacted by regex on every message: IPs (with optional
+# port), UUIDs (cluster IDs, API keys, tokens) and sensitive hostnames.
+# Case-insensitivity is spelled out as character classes and scoped to the
+# host suffixes, since a global IGNORECASE makes every character comparison
+# case-fold.
+_IP_REGEX = r"\b(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(?P<port>:\d{1,5})?\b)"
+_UUID_REGEX = (
+    r"\b(?P<uuid>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)"
 )
+_HOST_REGEX = (
+    r"(?P<host>[a-zA-Z0-9.-]*\.(?i:"
+    + "|".join(re.escape(suffix) for suffix in SENSITIVE_HOST_SUFFIXES)
+    + r")(?::\d+)?)"
+)
+
+# Shortest text any of the patterns can match ("1.2.3.4")
+MIN_SENSITIVE_DATA_LENGTH = 7
+
+# The kinds present are fused into one pattern (RE2 when installed, see
+# compile_pattern) so the text is scanned once. Keyed by which kinds a line
+# can contain: IPs need a ".", UUIDs a "-" and hosts one of the suffixes, so
+# alternatives that cannot match are left out of the scan.
+SENSITIVE_DATA_PATTERNS = {
+    (has_ip, has_uuid, has_host): compile_pattern(
+        "|".join(
+            regex
+            for regex, wanted in (
+                (_IP_REGEX, has_ip),
+                (_UUID_REGEX, has_uuid),
+                (_HOST_REGEX, has_host),
+            )
+            if wanted
+        )
+    )
+    for has_ip in (False, True)
+    for has_uuid in (False, True)
+    for has_host in (False, True)
+    if (has_ip or has_uuid) and (has_ip or not has_host)
+}
+
+# Entity type and replacement for each SENSITIVE_DATA_PATTERNS group
+SENSITIVE_DATA_REPLACEMENTS = {
+    "ip": ("IP_ADDRESS", "[IP]"),
+    "uuid": ("UUID", "[UUID]"),
+    "host": ("CLOUD_HOST", "[CLOUD_HOST]"),
+}
+
+# Maximum number of Presidio redactions kept in the LRU cache
+REDACTION_CACHE_MAX_SIZE = 8192
+
+# Longer texts (multi-line stack traces, dumped payloads) rarely repeat
+# verbatim and would dominate the cache's memory, so they are not cached
+REDACTION_CACHE_MAX_TEXT_LENGTH = 4096
 
-SENSITIVE_HOST_PATTERN = re.compile(
-    r"[a-zA-Z0-9.-]*\.(qdrant\.io|pinecone\.io|weaviate\.cloud|"
-    r"openai\.azure\.com|milvus\.io|chroma\.cloud)(:\d+)?",
-    re.IGNORECASE,
+# Cheap prefilter for text that could hold a kept entity type: an "@"
+# (emails), a "+" before a digit or several short digit groups (phone
+# numbers written in pairs, e.g. "+33 1 23 45 67 89"), a three-digit run
+# (SSN, card, passport, IBAN, ...), or a 26+ character alphanumeric run
+# (crypto wallet addresses, which may have no digits)
+PII_CANDIDATE_PATTERN = compile_pattern(
+    r"@|\+\s?\d|\d{3}|\d{1,2}(?:[\s().-]+\d{1,2}){3}|[A-Za-z0-9]{26}"
 )
 
+# Replacement token per Presidio entity type; built once and shared by every
+# redaction since the operators never change
+OPERATOR_CONFIG = {
+    "DEFAULT": OperatorConfig("replace", {"new_value": "[REDACTED]"}),
+    "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "[EMAIL]"}),
+    "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "[PHONE]"}),
+    "CREDIT_CARD": OperatorConfig("replace", {"new_value": "[CREDIT_CARD]"}),
+    "SSN": OperatorConfig("replace", {"new_value": "[SSN]"}),
+    "IP_ADDRESS": OperatorConfig("replace", {"new_value": "[IP]"}),
+    "US_PASSPORT": OperatorConfig("replace", {"new_value": "[PASSPORT]"}),
+    "UK_PASSPORT": OperatorConfig("replace", {"new_value": "[PASSPORT]"}),
+    "US_DRIVER_LICENSE": OperatorConfig("replace", {"new_value": "[DRIVER_LICENSE]"}),
+    "DATE_TIME": OperatorConfig("replace", {"new_value": "[DATE]"}),
+    "PERSON": OperatorConfig("replace", {"new_value": "[PERSON]"}),
+    "URL": OperatorConfig("replace", {"new_value": "[URL]"}),
+    "IBAN_CODE": OperatorConfig("replace", {"new_value": "[IBAN]"}),
+    "CRYPTO": OperatorConfig("replace", {"new_value": "[CRYPTO]"}),
+}
+
+
+def _lowercase_lemmas(doc):
+    """Use lowercased tokens as lemmas so Presidio's context words still match."""
+    for token in doc:
+        token.lemma_ = token.lower_
+    return doc
+
+
+def _create_registry(nlp_engine):
+    """Load the predefined English recognizers that can produce kept entities.
+
+    Recognizers whose every entity type is in ``IGNORED_PRESIDIO_ENTITY_TYPES``
+    (dates, URLs, IPs, driver licenses) would only produce findings that
+    ``_anonymize`` throws away, so they are not run at all.
+    """
+    from presidio_analyzer import RecognizerRegistry
+
+    registry = RecognizerRegistry()
+    registry.load_predefined_recognizers(nlp_engine=nlp_engine, languages=["en"])
+    registry.recognizers = [
+        recognizer
+        for recognizer in registry.recognizers
+        if not IGNORED_PRESIDIO_ENTITY_TYPES.issuperset(recognizer.supported_entities)
+    ]
+    return registry
+
+
+def _create_analyzer():
+    """Create the Presidio analyzer, avoiding a full spaCy model when possible.
+
+    Every entity type kept by ``redact_pii`` comes from a pattern recognizer;
+    the spaCy NER entities (PERSON, LOCATION, NRP, DATE_TIME) are all in
+    ``EXCLUDED_ENTITY_TYPES``. Unless ``pii_spacy_model`` names a model, the
+    analyzer runs on a tokenizer-only pipeline without the SpacyRecognizer.
+    """
+    from presidio_analyzer import AnalyzerEngine
+    from presidio_analyzer.nlp_engine import SpacyNlpEngine
+
+    if settings.pii_spacy_model:
+        nlp_engine = SpacyNlpEngine(
+            models=[{"lang_code": "en", "model_name": settings.pii_spacy_model}]
+        )
+        nlp_engine.load()
+        registry = _create_registry(nlp_engine)
+        return AnalyzerEngine(registry=registry, nlp_engine=nlp_engine, supported_languages=["en"])
+
+    import spacy
+    from spacy.language import Language
+
+    if not Language.has_factory("lowercase_lemmas"):
+        Language.component("lowercase_lemmas", func=_lowercase_lemmas)
+    nlp = spacy.blank("en")
+    nlp.add_pipe("lowercase_lemmas")
+
+    nlp_engine = SpacyNlpEngine(models=[{"lang_code": "en", "model_name": "blank"}])
+    nlp_engine.nlp = {"en": nlp}
+
+    registry = _create_registry(nlp_engine)
+    registry.remove_recognizer("SpacyRecognizer")
+    return AnalyzerEngine(registry=registry, nlp_engine=nlp_engine, supported_languages=["en"])
+
+
+def _redact_texts_in_worker(texts: list[str]) -> list[tuple[str, dict] | None]:
+    """Redact a chunk of texts in a worker process with its own Presidio engines."""
+    return pii_service._redact_texts(texts)
+
 
 class PIIService:
     """Service for PII detection and redaction using Presidio."""
 
     _analyzer = None
+    _batch_analyzer = None
     _anonymizer = None
-    _kernel_log_regex = None
+    _worker_pool = None
+    # Guards lazy engine creation so concurrent ingestion workers load the
+    # spaCy model once; reentrant because batch_analyzer builds the analyzer
+    _engine_lock = threading.RLock()
 
     def __init__(self):
-        if PIIService._kernel_log_regex is None:
-            PIIService._kernel_log_regex = re.compile(
-                "|".join(KERNEL_LOG_INDICATORS), re.IGNORECASE
-            )
+        # LRU of Presidio redactions keyed by the text after the regex phases,
+        # so IP/UUID variations of one log template share an entry
+        self._redaction_cache: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+        self._redaction_cache_lock = threading.Lock()
 
     def _is_kernel_log(self, text: str) -> bool:
-        if not text:
+        # Every indicator needs a "[" or an "=", and most lines have neither
+        if not text or ("[" not in text and "=" not in text):
             return False
-        return bool(PIIService._kernel_log_regex.search(text))
-
-    def _redact_ip_addresses(self, text: str) -> tuple[str, int]:
-        count = 0
-
-        def replace_ip(match):
-            nonlocal count
-            count += 1
-            if match.group(2):
-                return "[IP]:[PORT]"
-            return "[IP]"
-
-        redacted = IP_PORT_PATTERN.sub(replace_ip, text)
-        return redacted, count
-
-    def _redact_uuids(self, text: str) -> tuple[str, int]:
-        count = len(UUID_PATTERN.findall(text))
-        redacted = UUID_PATTERN.sub("[UUID]", text)
-        return redacted, count
-
-    def _redact_sensitive_hosts(self, text: str) -> tuple[str, int]:
-        count = len(SENSITIVE_HOST_PATTERN.findall(text))
-        redacted = SENSITIVE_HOST_PATTERN.sub("[CLOUD_HOST]", text)
-        return redacted, count
+        return KERNEL_LOG_PATTERN.search(text) is not None
 
     @property
     def analyzer(self):
         if PIIService._analyzer is None:
-            from presidio_analyzer import AnalyzerEngine
-
-            PIIService._analyzer = AnalyzerEngine()
+            with PIIService._engine_lock:
+                if PIIService._analyzer is None:
+                    PIIService._analyzer = _create_analyzer()
         return PIIService._analyzer
 
+    @property
+    def batch_analyzer(self):
+        if PIIService._batch_analyzer is None:
+            with PIIService._engine_lock:
+                if PIIService._batch_analyzer is None:
+                    from presidio_analyzer import BatchAnalyzerEngine
+
+                    PIIService._batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+        return PIIService._batch_analyzer
+
+    @property
+    def worker_pool(self):
+        if PIIService._worker_pool is None:
+            with PIIService._engine_lock:
+                if PIIService._worker_pool is None:
+                    # Spawned workers import this module and build their own engines;
+                    # forking would copy the ingestion threads' locks
+                    PIIService._worker_pool = ProcessPoolExecutor(
+                        max_workers=settings.pii_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return PIIService._worker_pool
+
     @property
     def anonymizer(self):
         if PIIService._anonymizer is None:
-            from presidio_anonymizer import AnonymizerEngine
+            with PIIService._engine_lock:
+                if PIIService._anonymizer is None:
+                    from presidio_anonymizer import AnonymizerEngine
 
-            PIIService._anonymizer = AnonymizerEngine()
+                    PIIService._anonymizer = AnonymizerEngine()
         return PIIService._anonymizer
 
     def _get_operator_config(self) -> dict[str, OperatorConfig]:
-        return {
-            "DEFAULT": OperatorConfig("replace", {"new_value": "[REDACTED]"}),
-            "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "[EMAIL]"}),
-            "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "[PHONE]"}),
-            "CREDIT_CARD": OperatorConfig("replace", {"new_value": "[CREDIT_CARD]"}),
-            "SSN": OperatorConfig("replace", {"new_value": "[SSN]"}),
-            "IP_ADDRESS": OperatorConfig("replace", {"new_value": "[IP]"}),
-            "US_PASSPORT": OperatorConfig("replace", {"new_value": "[PASSPORT]"}),
-            "UK_PASSPORT": OperatorConfig("replace", {"new_value": "[PASSPORT]"}),
-            "US_DRIVER_LICENSE": OperatorConfig("replace", {"new_value": "[DRIVER_LICENSE]"}),
-            "DATE_TIME": OperatorConfig("replace", {"new_value": "[DATE]"}),
-            "PERSON": OperatorConfig("replace", {"new_value": "[PERSON]"}),
-            "URL": OperatorConfig("replace", {"new_value": "[URL]"}),
-            "IBAN_CODE": OperatorConfig("replace", {"new_value": "[IBAN]"}),
-            "CRYPTO": OperatorConfig("replace", {"new_value": "[CRYPTO]"}),
-        }
+        return OPERATOR_CONFIG
+
+    @staticmethod
+    def _to_entity_dicts(results) -> list[dict]:
+        return [
+            {
+                "entity_type": result.entity_type,
+                "start": result.start,
+                "end": result.end,
+                "score": result.score,
+            }
+            for result in results
+        ]
 
     def detect_pii(self, text: str) -> list[dict]:
         try:
             results = self.analyzer.analyze(text=text, language="en")
-            return [
-                {
-                    "entity_type": result.entity_type,
-                    "start": result.start,
-                    "end": result.end,
-                    "score": result.score,
-                }
-                for result in results
-            ]
+            return self._to_entity_dicts(results)
         except Exception as e:
             logger.error(f"PII detection error: {e}", exc_info=True)
             return []
 
-    def redact_pii(self, text: str, _entities: list[dict] | None = None) -> tuple[str, dict]:
-        """Redact PII from text using multi-phase approach."""
-        entity_summary = {}
+    def detect_pii_batch(self, texts: list[str]) -> list[list[dict]]:
+        """Detect PII in many texts with one batched pass through the NLP pipeline."""
+        if not texts:
+            return []
+        try:
+            batch_results = self.batch_analyzer.analyze_iterator(
+                texts,
+                language="en",
+                batch_size=settings.pii_batch_size,
+                n_process=settings.pii_n_process,
+            )
+            return [self._to_entity_dicts(results) for results in batch_results]
+        except Exception as e:
+            logger.error(f"PII detection error: {e}", exc_info=True)
+            return [[] for _ in texts]
+
+    def _redact_patterns(self, text: str) -> tuple[str, dict]:
+        """Redact IPs, UUIDs and cloud hostnames in a single regex pass."""
+        if len(text) < MIN_SENSITIVE_DATA_LENGTH:
+            return text, {}
+
+        has_ip = "." in text
+        has_host = False
+        if has_ip:
+            lowered = text.lower()
+            has_host = any(suffix in lowered for suffix in SENSITIVE_HOST_SUFFIXES)
+        pattern = SENSITIVE_DATA_PATTERNS.get((has_ip, "-" in text, has_host))
+        if pattern is None:
+            return text, {}
 
-        # Phase 1: Always redact IP addresses
-        text, ip_count = self._redact_ip_addresses(text)
-        if ip_count > 0:
-            entity_summary["IP_ADDRESS"] = ip_count
+        entity_summary = {}
 
-        # Phase 2: Always redact UUIDs (cluster IDs, API keys, tokens)
-        text, uuid_count = self._redact_uuids(text)
-        if uuid_count > 0:
-            entity_summary["UUID"] = uuid_count
+        def replace(match: re.Match) -> str:
+            group = match.lastgroup
+            entity_type, replacement = SENSITIVE_DATA_REPLACEMENTS[group]
+            entity_summary[entity_type] = entity_summary.get(entity_type, 0) + 1
+            if group == "ip" and match["port"]:
+                return "[IP]:[PORT]"
+            return replacement
 
-        # Phase 3: Always redact sensitive cloud hostnames
-        text, host_count = self._redact_sensitive_hosts(text)
-        if host_count > 0:
-            entity_summary["CLOUD_HOST"] = host_count
+        return pattern.sub(replace, text), entity_summary
 
+    def _needs_analysis(self, text: str) -> bool:
+        """Check whether Presidio could find reportable PII in the text."""
         # Phase 4: Skip Presidio for kernel logs
         if self._is_kernel_log(text):
-            return text, entity_summary
+            return False
 
-        # Run Presidio for other PII types
-        try:
-            analyzer_results = self.analyzer.analyze(text=text, language="en")
-        except Exception as e:
-            logger.error(f"PII analysis error: {e}", exc_info=True)
-            return text, entity_summary
+        # Phase 5: Skip Presidio when nothing in the text could be reportable PII
+        return PII_CANDIDATE_PATTERN.search(text) is not None
 
-        if not analyzer_results:
-            return text, entity_summary
+    def _anonymize(self, text: str, analyzer_results) -> tuple[str, dict] | None:
+        """Replace confident Presidio findings in the text and count them by type.
 
+        Returns None if anonymization failed.
+        """
         filtered_results = [
             result
             for result in analyzer_results
-            if result.entity_type not in EXCLUDED_ENTITY_TYPES
-            and result.entity_type != "IP_ADDRESS"
+            if result.entity_type not in IGNORED_PRESIDIO_ENTITY_TYPES
             and result.score >= PII_CONFIDENCE_THRESHOLD
         ]
 
         if not filtered_results:
-            return text, entity_summary
+            return text, {}
 
         operator_config = self._get_operator_config()
 
@@ -187,19 +362,137 @@ class PIIService:
                 analyzer_results=filtered_results,
                 operators=operator_config,
             )
-            redacted_text = anonymized_result.text
+        except Exception as e:
+            logger.error(f"PII redaction error: {e}", exc_info=True)
+            return None
 
-            for result in filtered_results:
-                entity_type = result.entity_type
-                if entity_type not in entity_summary:
-                    entity_summary[entity_type] = 0
-                entity_summary[entity_type] += 1
+        entity_counts = Counter(result.entity_type for result in filtered_results)
+        return anonymized_result.text, dict(entity_counts)
 
-            return redacted_text, entity_summary
+    def _redact_texts(self, texts: list[str]) -> list[tuple[str, dict] | None]:
+        """Run Presidio over texts in one batched pass and anonymize each.
+
+        Returns None for each text whose analysis or anonymization failed.
+        """
+        try:
+            batch_results = self.batch_analyzer.analyze_iterator(
+                texts,
+                language="en",
+                batch_size=settings.pii_batch_size,
+                n_process=settings.pii_n_process,
+            )
+            return [
+                self._anonymize(text, analyzer_results)
+                for text, analyzer_results in zip(texts, batch_results, strict=True)
+            ]
         except Exception as e:
-            logger.error(f"PII redaction error: {e}", exc_info=True)
+            logger.error(f"PII analysis error: {e}", exc_info=True)
+            return [None] * len(texts)
+
+    def _get_cached_redaction(self, text: str) -> tuple[str, dict] | None:
+        """Return a cached Presidio redaction and mark it as recently used."""
+        if len(text) > REDACTION_CACHE_MAX_TEXT_LENGTH:
+            return None
+        with self._redaction_cache_lock:
+            redaction = self._redaction_cache.get(text)
+            if redaction is not None:
+                self._redaction_cache.move_to_end(text)
+            return redaction
+
+    def _cache_redaction(self, text: str, redaction: tuple[str, dict]) -> None:
+        """Store a Presidio redaction, evicting the least recently used entry if full."""
+        if len(text) > REDACTION_CACHE_MAX_TEXT_LENGTH:
+            return
+        with self._redaction_cache_lock:
+            self._redaction_cache[text] = redaction
+            self._redaction_cache.move_to_end(text)
+            if len(self._redaction_cache) > REDACTION_CACHE_MAX_SIZE:
+                self._redaction_cache.popitem(last=False)
+
+    @staticmethod
+    def _merge_redaction(redaction: tuple[str, dict], entity_summary: dict) -> tuple[str, dict]:
+        """Combine a Presidio redaction with the counts from the regex phases."""
+        redacted_text, entity_counts = redaction
+        for entity_type, count in entity_counts.items():
+            entity_summary[entity_type] = entity_summary.get(entity_type, 0) + count
+        return redacted_text, entity_summary
+
+    def redact_pii(self, text: str, _entities: list[dict] | None = None) -> tuple[str, dict]:
+        """Redact PII from text using multi-phase approach."""
+        text, entity_summary = self._redact_patterns(text)
+        if not self._needs_analysis(text):
             return text, entity_summary
 
+        # Repeated log templates reuse the Presidio result for the same text
+        redaction = self._get_cached_redaction(text)
+        if redaction is None:
+            # Run Presidio for other PII types
+            try:
+                analyzer_results = self.analyzer.analyze(text=text, language="en")
+            except Exception as e:
+                logger.error(f"PII analysis error: {e}", exc_info=True)
+                return text, entity_summary
+
+            redaction = self._anonymize(text, analyzer_results)
+            if redaction is None:
+                return text, entity_summary
+            self._cache_redaction(text, redaction)
+
+        return self._merge_redaction(redaction, entity_summary)
+
+    def redact_pii_batch(self, texts: list[str]) -> list[tuple[str, dict]]:
+        """Redact PII from many texts, batching the Presidio NLP pass.
+
+        Texts are tokenized together with spaCy's ``nlp.pipe`` instead of one
+        ``analyze`` call each; results are identical to calling ``redact_pii``
+        per text. Cached and repeated texts are analyzed at most once.
+        """
+        results = [self._redact_patterns(text) for text in texts]
+
+        # Positions of each distinct text that needs Presidio
+        pending: dict[str, list[int]] = {}
+        for i, (text, _) in enumerate(results):
+            if self._needs_analysis(text):
+                pending.setdefault(text, []).append(i)
+
+        redactions: dict[str, tuple[str, dict]] = {}
+        uncached = []
+        for text in pending:
+            redaction = self._get_cached_redaction(text)
+            if redaction is None:
+                uncached.append(text)
+            else:
+                redactions[text] = redaction
+
+        if uncached:
+            chunk_size = settings.pii_batch_size
+            if settings.pii_workers > 1 and len(uncached) > chunk_size:
+                chunks = [uncached[i : i + chunk_size] for i in range(0, len(uncached), chunk_size)]
+                try:
+                    redacted = [
+                        redaction
+                        for chunk in self.worker_pool.map(_redact_texts_in_worker, chunks)
+                        for redaction in chunk
+                    ]
+                except Exception as e:
+                    logger.error(f"PII worker pool error: {e}", exc_info=True)
+                    redacted = self._redact_texts(uncached)
+            else:
+                redacted = self._redact_texts(uncached)
+
+            for text, redaction in zip(uncached, redacted, strict=True):
+                if redaction is not None:
+                    self._cache_redaction(text, redaction)
+                    redactions[text] = redaction
+
+        for text, positions in pending.items():
+            redaction = redactions.get(text)
+            if redaction is None:
+                continue
+            for i in positions:
+                results[i] = self._merge_redaction(redaction, results[i][1])
+        return results
+
 
 # Global instance
 pii_service = PIIService()
@@ -1,17 +1,23 @@
 """Qdrant vector storage service for log embeddings."""
 
+import contextlib
 import logging
+import threading
 import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Any
 from uuid import UUID
 
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import (
     Distance,
     Filter,
+    PayloadSelectorInclude,
     PointStruct,
-    SearchParams,
 )
 
 from app.config import get_settings
@@ -23,6 +29,10 @@ from app.observability.metrics import (
 
 logger = logging.getLogger(__name__)
 
+# Qdrant's default optimizer indexing_threshold (KB), restored after a bulk
+# ingest when the collection reports no explicit value
+DEFAULT_INDEXING_THRESHOLD = 10000
+
 
 class QdrantService:
     """Service for storing and searching log embeddings in Qdrant."""
@@ -34,12 +44,46 @@ class QdrantService:
         self.vector_size = 1536  # text-embedding-3-small dimension
         self.timeout = settings.qdrant_timeout
         self.scroll_batch_size = settings.qdrant_scroll_batch_size
+        self.upsert_batch_size = settings.qdrant_upsert_batch_size
+        self.int8_quantization = settings.qdrant_int8_quantization
+        # Set once the collection is known to exist; cleared when an operation fails
+        self._collection_verified = False
+        # Concurrent bulk ingests share one indexing pause; the last one restores it
+        self._bulk_ingest_lock = threading.Lock()
+        self._bulk_ingest_count = 0
+        self._indexing_paused = False
+        self._saved_indexing_threshold: int | None = None
 
         if not settings.qdrant_url or not settings.qdrant_api_key:
             logger.warning("Qdrant credentials not configured. Vector storage will not work.")
             self.client = None
             return
 
+        if settings.qdrant_prefer_grpc:
+            # One persistent HTTP/2 channel for every upsert, search and scroll.
+            # The client connects lazily, so probe the channel before relying on it.
+            grpc_client = None
+            try:
+                grpc_client = QdrantClient(
+                    url=settings.qdrant_url,
+                    api_key=settings.qdrant_api_key,
+                    timeout=self.timeout,
+                    prefer_grpc=True,
+                    grpc_port=settings.qdrant_grpc_port,
+                )
+                grpc_client.get_collections()
+                self.client = grpc_client
+                logger.info(
+                    f"Connected to Qdrant at {settings.qdrant_url} over gRPC "
+                    f"(port={settings.qdrant_grpc_port}, timeout={self.timeout}s)"
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Qdrant gRPC connection failed, falling back to REST: {e}")
+                if grpc_client is not None:
+                    with contextlib.suppress(Exception):
+                        grpc_client.close()
+
         try:
             self.client = QdrantClient(
                 url=settings.qdrant_url,
@@ -61,6 +105,9 @@ class QdrantService:
             logger.error("Qdrant client not initialized.")
             return False
 
+        if self._collection_verified:
+            return True
+
         try:
             # Check if collection exists
             collections = self.client.get_collections().collections
@@ -78,6 +125,7 @@ class QdrantService:
                         f"{config.vectors.size}, expected {self.vector_size}"
                     )
                 logger.info(f"Collection {self.collection_name} already exists")
+                self._collection_verified = True
                 return True
 
             # Create collection with correct settings
@@ -90,6 +138,16 @@ class QdrantService:
                         size=self.vector_size,
                         distance=Distance.COSINE,
                     ),
+                    # int8 copies are 4x smaller than float32 and stay in RAM
+                    quantization_config=models.ScalarQuantization(
+                        scalar=models.ScalarQuantizationConfig(
+                            type=models.ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True,
+                        )
+                    )
+                    if self.int8_quantization
+                    else None,
                 )
                 duration = time.time() - start_time
                 qdrant_operation_duration_seconds.labels(operation="create_collection").observe(
@@ -99,6 +157,7 @@ class QdrantService:
                     operation="create_collection", status="success"
                 ).inc()
                 logger.info(f"Collection {self.collection_name} created successfully")
+                self._collection_verified = True
                 self._update_vector_store_size()
                 return True
             except Exception:
@@ -157,15 +216,86 @@ class QdrantService:
             duration = time.time() - start_time
             qdrant_operation_duration_seconds.labels(operation="store_vector").observe(duration)
             qdrant_operations_total.labels(operation="store_vector", status="error").inc()
+            self._collection_verified = False
             logger.error(f"Error storing vector: {e}", exc_info=True)
             return False
 
+    def store_vectors(
+        self,
+        items: list[tuple[UUID, list[float], dict[str, Any] | None]],
+        wait: bool = True,
+    ) -> list[bool]:
+        """Store a batch of vectors in Qdrant, upserting upsert_batch_size points at a time.
+
+        A failed chunk does not stop the remaining chunks from being sent.
+
+        Args:
+            items: (log_id, embedding, payload) tuples to store
+            wait: Wait for Qdrant to apply each upsert; with False a chunk is
+                stored once Qdrant has acknowledged it, and becomes visible to
+                reads shortly after
+
+        Returns:
+            Per-item flags, True where the vector was stored
+        """
+        stored = [False] * len(items)
+
+        if not self.client:
+            logger.error("Qdrant client not initialized.")
+            return stored
+
+        if not items:
+            return stored
+
+        if not self.ensure_collection():
+            return stored
+
+        for chunk_start in range(0, len(items), self.upsert_batch_size):
+            chunk = items[chunk_start : chunk_start + self.upsert_batch_size]
+            start_time = time.time()
+            try:
+                # Embeddings and payloads come from our own pipeline, so skip
+                # pydantic re-validating every float of every vector
+                points = [
+                    PointStruct.model_construct(
+                        id=str(log_id),
+                        vector=embedding,
+                        payload=payload or {},
+                    )
+                    for log_id, embedding, payload in chunk
+                ]
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=points,
+                    wait=wait,
+                )
+                duration = time.time() - start_time
+                qdrant_operation_duration_seconds.labels(operation="store_vectors").observe(
+                    duration
+                )
+                qdrant_operations_total.labels(operation="store_vectors", status="success").inc()
+                stored[chunk_start : chunk_start + len(chunk)] = [True] * len(chunk)
+                logger.debug(f"Stored {len(points)} vectors")
+            except Exception as e:
+                duration = time.time() - start_time
+                qdrant_operation_duration_seconds.labels(operation="store_vectors").observe(
+                    duration
+                )
+                qdrant_operations_total.labels(operation="store_vectors", status="error").inc()
+                self._collection_verified = False
+                logger.error(f"Error storing {len(chunk)} vectors: {e}", exc_info=True)
+
+        if any(stored):
+            self._update_vector_store_size()
+        return stored
+
     def search_vectors(
         self,
         query_embedding: list[float],
         limit: int = 10,
         filter_conditions: Filter | None = None,
         score_threshold: float | None = None,
+        payload_fields: list[str] | None = None,
     ) -> list[dict[str, Any]]:
         """Search for similar vectors using hybrid filtering.
 
@@ -174,6 +304,7 @@ class QdrantService:
             limit: Maximum number of results
             filter_conditions: Optional Qdrant filter for metadata (level, service, etc.)
             score_threshold: Optional minimum similarity score threshold
+            payload_fields: Payload keys to return (None = full payload, [] = no payload)
 
         Returns:
             List of search results with id, score, and payload
@@ -187,17 +318,22 @@ class QdrantService:
 
         start_time = time.time()
         try:
-            search_params = SearchParams()
-            if score_threshold is not None:
-                search_params.score_threshold = score_threshold
-
-            results = self.client.search(
+            if payload_fields is None:
+                with_payload = True
+            elif payload_fields:
+                with_payload = PayloadSelectorInclude(include=payload_fields)
+            else:
+                with_payload = False
+
+            results = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                query=query_embedding,
                 query_filter=filter_conditions,
                 limit=limit,
-                search_params=search_params,
-            )
+                score_threshold=score_threshold,
+                with_payload=with_payload,
+                with_vectors=False,
+            ).points
 
             duration = time.time() - start_time
             qdrant_operation_duration_seconds.labels(operation="search_vectors").observe(duration)
@@ -215,6 +351,7 @@ class QdrantService:
             duration = time.time() - start_time
             qdrant_operation_duration_seconds.labels(operation="search_vectors").observe(duration)
             qdrant_operations_total.labels(operation="search_vectors", status="error").inc()
+            self._collection_verified = False
             logger.error(f"Error searching vectors: {e}", exc_info=True)
             return []
 
@@ -267,70 +404,183 @@ class QdrantService:
             logger.error(f"Error getting collection info: {e}", exc_info=True)
             return None
 
-    def get_all_embeddings(
+    def _scroll_page(self, offset, filter_conditions: Filter | None):
+        """Fetch one scroll page (with payloads and vectors) starting at offset."""
+        # Using configurable batch size for better network reliability
+        return self.client.scroll(
+            collection_name=self.collection_name,
+            limit=self.scroll_batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+            scroll_filter=filter_conditions,
+            timeout=self.timeout,
+        )
+
+    def _scroll_pages(
         self, limit: int | None = None, filter_conditions: Filter | None = None
-    ) -> list[dict[str, Any]]:
-        """Retrieve all embeddings from Qdrant for clustering.
+    ) -> Iterator[list]:
+        """Yield pages of points (with payloads and vectors) from the collection.
+
+        The next page is requested in a background thread as soon as the
+        current page's offset is known, so the network round-trip overlaps
+        with the caller's processing of the current page.
 
         Args:
             limit: Optional limit on number of points to retrieve (None = all)
             filter_conditions: Optional Qdrant filter for metadata
 
-        Returns:
-            List of dictionaries with 'id', 'vector', and 'payload' for each point
+        Yields:
+            Lists of points, at most scroll_batch_size each
+        """
+        remaining = limit
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-scroll") as prefetcher:
+            future = prefetcher.submit(self._scroll_page, None, filter_conditions)
+            while True:
+                result, next_offset = future.result()
+
+                if remaining:
+                    result = result[:remaining]
+                    remaining -= len(result)
+
+                has_more = next_offset is not None and not (limit and not remaining)
+                if has_more:
+                    future = prefetcher.submit(self._scroll_page, next_offset, filter_conditions)
+
+                yield result
+
+                if not has_more:
+                    break
+
+    def iter_embedding_batches(
+        self,
+        limit: int | None = None,
+        filter_conditions: Filter | None = None,
+        dtype: np.dtype = np.float32,
+    ) -> Iterator[tuple[list, np.ndarray, list[dict[str, Any]]]]:
+        """Stream embeddings from Qdrant one scroll page at a time.
+
+        Each page is packed into a contiguous array instead of per-point lists
+        of Python floats, so callers can process or concatenate pages without
+        holding every point object in memory.
+
+        Args:
+            limit: Optional limit on number of points to retrieve (None = all)
+            filter_conditions: Optional Qdrant filter for metadata
+            dtype: Vector dtype, e.g. np.float16 to halve memory
+
+        Yields:
+            (ids, vectors, payloads) per page, where vectors has shape
+            (len(ids), vector_size); points without a vector are skipped
+
+        Raises:
+            Exception: Propagates Qdrant errors raised while scrolling
         """
         if not self.client:
             logger.error("Qdrant client not initialized.")
-            return []
+            return
 
         if not self.ensure_collection():
-            return []
+            return
 
         start_time = time.time()
         try:
-            all_points = []
-            offset = None
-
-            while True:
-                # Use scroll to retrieve points in batches
-                # Using configurable batch size for better network reliability
-                result, next_offset = self.client.scroll(
-                    collection_name=self.collection_name,
-                    limit=self.scroll_batch_size,
-                    offset=offset,
-                    with_payload=True,
-                    with_vectors=True,
-                    scroll_filter=filter_conditions,
-                    timeout=self.timeout,
+            for page in self._scroll_pages(limit, filter_conditions):
+                points = [point for point in page if getattr(point, "vector", None) is not None]
+                if not points:
+                    continue
+                yield (
+                    [point.id for point in points],
+                    np.asarray([point.vector for point in points], dtype=dtype),
+                    [point.payload or {} for point in points],
                 )
+        except Exception:
+            qdrant_operations_total.labels(operation="iter_embedding_batches", status="error").inc()
+            self._collection_verified = False
+            raise
+        finally:
+            duration = time.time() - start_time
+            qdrant_operation_duration_seconds.labels(operation="iter_embedding_batches").observe(
+                duration
+            )
+        qdrant_operations_total.labels(operation="iter_embedding_batches", status="success").inc()
 
-                all_points.extend(result)
+    def get_embedding_matrix(
+        self,
+        limit: int | None = None,
+        filter_conditions: Filter | None = None,
+        dtype: np.dtype = np.float32,
+    ) -> tuple[list, np.ndarray]:
+        """Retrieve embeddings as point IDs plus one contiguous vector array.
 
-                if next_offset is None or (limit and len(all_points) >= limit):
-                    break
+        Args:
+            limit: Optional limit on number of points to retrieve (None = all)
+            filter_conditions: Optional Qdrant filter for metadata
+            dtype: Vector dtype of the returned array
 
-                offset = next_offset
+        Returns:
+            (ids, vectors) with vectors of shape (len(ids), vector_size); points
+            without a vector are skipped, and both are empty on error
+        """
+        point_ids = []
+        blocks = []
+        try:
+            for batch_ids, vectors, _ in self.iter_embedding_batches(
+                limit, filter_conditions, dtype
+            ):
+                point_ids.extend(batch_ids)
+                blocks.append(vectors)
+        except Exception as e:
+            logger.error(f"Error retrieving embeddings: {e}", exc_info=True)
+            point_ids, blocks = [], []
 
-            # Apply limit if specified
-            if limit and len(all_points) > limit:
-                all_points = all_points[:limit]
+        if not blocks:
+            return [], np.empty((0, self.vector_size), dtype=dtype)
 
-            duration = time.time() - start_time
-            qdrant_operation_duration_seconds.labels(operation="get_all_embeddings").observe(
-                duration
-            )
-            qdrant_operations_total.labels(operation="get_all_embeddings", status="success").inc()
+        logger.info(f"Retrieved {len(point_ids)} embeddings from Qdrant")
+        return point_ids, np.concatenate(blocks)
+
+    def get_all_embeddings(
+        self, limit: int | None = None, filter_conditions: Filter | None = None
+    ) -> list[dict[str, Any]]:
+        """Retrieve all embeddings from Qdrant for clustering.
+
+        Prefer iter_embedding_batches for large collections.
 
-            # Format results
+        Args:
+            limit: Optional limit on number of points to retrieve (None = all)
+            filter_conditions: Optional Qdrant filter for metadata
+
+        Returns:
+            List of dictionaries with 'id', 'vector', and 'payload' for each point
+        """
+        if not self.client:
+            logger.error("Qdrant client not initialized.")
+            return []
+
+        if not self.ensure_collection():
+            return []
+
+        start_time = time.time()
+        try:
+            # Format results page by page as they arrive
             results = [
                 {
                     "id": point.id,
                     "vector": point.vector if hasattr(point, "vector") else None,
                     "payload": point.payload or {},
                 }
-                for point in all_points
+                for page in self._scroll_pages(limit, filter_conditions)
+                for point in page
             ]
 
+            duration = time.time() - start_time
+            qdrant_operation_duration_seconds.labels(operation="get_all_embeddings").observe(
+                duration
+            )
+            qdrant_operations_total.labels(operation="get_all_embeddings", status="success").inc()
+
             logger.info(f"Retrieved {len(results)} embeddings from Qdrant")
             return results
 
@@ -340,6 +590,7 @@ class QdrantService:
                 duration
             )
             qdrant_operations_total.labels(operation="get_all_embeddings", status="error").inc()
+            self._collection_verified = False
             logger.error(f"Error retrieving embeddings: {e}", exc_info=True)
             return []
 
@@ -377,9 +628,62 @@ class QdrantService:
                 "payload": point.payload or {},
             }
         except Exception as e:
+            self._collection_verified = False
             logger.error(f"Error retrieving vector for log_id {log_id}: {e}", exc_info=True)
             return None
 
+    @contextmanager
+    def bulk_ingest(self) -> Iterator[None]:
+        """Pause HNSW indexing for the collection while a large batch is upserted.
+
+        Sets the optimizer indexing_threshold to 0 on entry and restores the
+        collection's previous value (or Qdrant's default when the collection
+        reported none) on exit, even if the upsert fails. Nested
+        or concurrent uses keep indexing paused until the last one exits.
+        Failing to change the setting is logged and does not stop the ingest.
+        """
+        if not self.client:
+            yield
+            return
+
+        with self._bulk_ingest_lock:
+            self._bulk_ingest_count += 1
+            if self._bulk_ingest_count == 1:
+                try:
+                    collection_info = self.client.get_collection(self.collection_name)
+                    self._saved_indexing_threshold = (
+                        collection_info.config.optimizer_config.indexing_threshold
+                    )
+                    self.client.update_collection(
+                        collection_name=self.collection_name,
+                        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0),
+                    )
+                    self._indexing_paused = True
+                    logger.info(f"Paused indexing for collection {self.collection_name}")
+                except Exception as e:
+                    logger.warning(f"Could not pause indexing for bulk ingest: {e}")
+        try:
+            yield
+        finally:
+            with self._bulk_ingest_lock:
+                self._bulk_ingest_count -= 1
+                if self._bulk_ingest_count == 0 and self._indexing_paused:
+                    threshold = self._saved_indexing_threshold
+                    if threshold is None:
+                        threshold = DEFAULT_INDEXING_THRESHOLD
+                    try:
+                        self.client.update_collection(
+                            collection_name=self.collection_name,
+                            optimizers_config=models.OptimizersConfigDiff(
+                                indexing_threshold=threshold
+                            ),
+                        )
+                        logger.info(f"Resumed indexing for collection {self.collection_name}")
+                    except Exception as e:
+                        logger.error(f"Could not resume indexing after bulk ingest: {e}")
+                    self._indexing_paused = False
+                    self._saved_indexing_threshold = None
+
     def _update_vector_store_size(self) -> None:
         """Update the vector_store_size metric."""
         try:
@@ -5,9 +5,16 @@ Implements a two-track processing pipeline:
 - Priority Path: ERROR/WARN logs get embeddings and anomaly detection
 """
 
+import csv
+import io
+import json
 import logging
+from datetime import UTC, datetime
 from uuid import UUID
 
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
@@ -18,6 +25,34 @@ from app.services.embedding_service import BudgetExceededError, embedding_servic
 
 logger = logging.getLogger(__name__)
 
+# Ids are assigned once per processed log (ProcessedLogEntry.id), so saving the
+# same entries again, e.g. retrying a batch after a connection error, skips the
+# rows already stored instead of failing the whole batch on a primary key violation
+LOG_ENTRY_INSERT = pg_insert(LogEntry.__table__).on_conflict_do_nothing(index_elements=["id"])
+
+# Number of recent logs passed to the LLM as context for an anomaly
+CONTEXT_LOG_LIMIT = 5
+
+LOG_ENTRY_COPY_COLUMNS = (
+    "id",
+    "timestamp",
+    "level",
+    "service",
+    "message",
+    "raw_log",
+    "log_metadata",
+    "pii_redacted",
+    "created_at",
+)
+
+# Session-local staging table for COPY, which has no ON CONFLICT clause: rows
+# are copied here and moved into log_entries with INSERT ... ON CONFLICT
+LOG_ENTRY_COPY_TABLE = "log_entries_copy"
+
+# Errors after which the connection, not the data, is at fault and the batch
+# can be retried as is
+CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
 
 class StorageService:
     """Service for storing processed log entries in PostgreSQL.
@@ -27,6 +62,27 @@ class StorageService:
     - Full save: PostgreSQL + Qdrant embedding + anomaly detection (for priority logs)
     """
 
+    @staticmethod
+    def _log_entry_row(processed_log: ProcessedLogEntry) -> dict:
+        """Build log_entries column values for a processed log, keeping its id.
+
+        Args:
+            processed_log: Processed log entry
+
+        Returns:
+            Column values keyed by log_entries column name
+        """
+        return {
+            "id": processed_log.id,
+            "timestamp": processed_log.timestamp,
+            "level": processed_log.level,
+            "service": processed_log.service,
+            "message": processed_log.message,
+            "raw_log": processed_log.raw_log,
+            "log_metadata": processed_log.metadata,
+            "pii_redacted": processed_log.pii_redacted,
+        }
+
     def save_log_entry_fast(
         self, processed_log: ProcessedLogEntry, db: Session | None = None
     ) -> UUID | None:
@@ -39,30 +95,25 @@ class StorageService:
             db: Database session (optional, creates new if not provided)
 
         Returns:
-            UUID of saved log entry or None if error
+            UUID of saved log entry, or None if the database connection failed
+
+        Raises:
+            SQLAlchemyError: If the entry was rejected for any other reason
         """
         should_close_db = db is None
         try:
             if db is None:
                 db = next(get_db())
 
-            log_entry = LogEntry(
-                timestamp=processed_log.timestamp,
-                level=processed_log.level,
-                service=processed_log.service,
-                message=processed_log.message,
-                raw_log=processed_log.raw_log,
-                log_metadata=processed_log.metadata,
-                pii_redacted=processed_log.pii_redacted,
-            )
-
-            db.add(log_entry)
+            # Core insert with a client-side id: no ORM instance, flush or refresh
+            row = self._log_entry_row(processed_log)
+            db.execute(LOG_ENTRY_INSERT, row)
             db.commit()
-            db.refresh(log_entry)
+            log_id = row["id"]
 
-            logger.debug(f"Fast saved log entry with ID: {log_entry.id}")
-            return log_entry.id
-        except Exception as e:
+            logger.debug(f"Fast saved log entry with ID: {log_id}")
+            return log_id
+        except CONNECTION_ERRORS as e:
             logger.error(f"Failed to fast save log entry: {e}")
             if db:
                 db.rollback()
@@ -71,6 +122,107 @@ class StorageService:
             if should_close_db and db:
                 db.close()
 
+    def save_log_entries_fast(
+        self, processed_logs: list[ProcessedLogEntry], db: Session | None = None
+    ) -> list[UUID | None]:
+        """Save several processed log entries with one bulk INSERT.
+
+        Bulk version of save_log_entry_fast: ids come from the processed
+        logs, all rows are sent in a single executemany (batched into
+        multi-row VALUES by the driver) and committed once. Batches larger
+        than database_copy_threshold are streamed with COPY instead. Entries
+        already stored are skipped, so a failed batch can be saved again.
+
+        Args:
+            processed_logs: Processed log entries
+            db: Database session (optional, creates new if not provided)
+
+        Returns:
+            UUIDs of the saved entries in input order, or None for every
+            entry if the database connection failed
+
+        Raises:
+            SQLAlchemyError: If the batch was rejected for any other reason
+        """
+        if not processed_logs:
+            return []
+
+        rows = [self._log_entry_row(processed_log) for processed_log in processed_logs]
+
+        should_close_db = db is None
+        try:
+            if db is None:
+                db = next(get_db())
+
+            if len(rows) > get_settings().database_copy_threshold:
+                self._copy_log_entries(rows, db)
+            else:
+                db.execute(LOG_ENTRY_INSERT, rows)
+            db.commit()
+
+            logger.debug(f"Fast saved {len(rows)} log entries")
+            return [row["id"] for row in rows]
+        except CONNECTION_ERRORS as e:
+            logger.error(f"Failed to fast save {len(rows)} log entries: {e}")
+            if db:
+                db.rollback()
+            return [None] * len(rows)
+        finally:
+            if should_close_db and db:
+                db.close()
+
+    def _copy_log_entries(self, rows: list[dict], db: Session) -> None:
+        """Stream log entry rows into PostgreSQL with COPY FROM STDIN.
+
+        Rows are copied into a staging table dropped at commit, then moved
+        into log_entries skipping ids already stored. COPY applies no
+        Python-side column defaults, so created_at is set here; ids must
+        already be in the rows. The caller commits.
+
+        Args:
+            rows: Column values keyed like LogEntry attributes
+            db: Database session whose connection runs the COPY
+        """
+        created_at = datetime.now(UTC).replace(tzinfo=None)
+
+        buf = io.StringIO()
+        # Quote every non-NULL field so empty strings stay distinct from NULL
+        writer = csv.writer(buf, quoting=csv.QUOTE_NOTNULL)
+        for row in rows:
+            metadata = row["log_metadata"]
+            writer.writerow(
+                (
+                    str(row["id"]),
+                    row["timestamp"].isoformat(),
+                    row["level"],
+                    row["service"],
+                    row["message"],
+                    row["raw_log"],
+                    json.dumps(metadata) if metadata is not None else None,
+                    "true" if row["pii_redacted"] else "false",
+                    created_at.isoformat(),
+                )
+            )
+        buf.seek(0)
+
+        columns = ", ".join(LOG_ENTRY_COPY_COLUMNS)
+        dbapi_connection = db.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{LOG_ENTRY_COPY_TABLE}")
+            cursor.execute(
+                f"CREATE TEMP TABLE {LOG_ENTRY_COPY_TABLE} "
+                f"(LIKE {LogEntry.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY {LOG_ENTRY_COPY_TABLE} ({columns}) FROM STDIN WITH (FORMAT CSV)",
+                buf,
+            )
+            cursor.execute(
+                f"INSERT INTO {LogEntry.__tablename__} ({columns}) "
+                f"SELECT {columns} FROM {LOG_ENTRY_COPY_TABLE} "
+                "ON CONFLICT (id) DO NOTHING"
+            )
+
     def save_log_entry(
         self, processed_log: ProcessedLogEntry, db: Session | None = None
     ) -> UUID | None:
@@ -88,25 +240,14 @@ class StorageService:
         """
         return self.save_log_entry_fast(processed_log, db)
 
-    def save_log_entry_async(self, processed_log: ProcessedLogEntry) -> UUID | None:
-        """Save processed log entry asynchronously (creates new session)."""
-        db = next(get_db())
-        try:
-            return self.save_log_entry_fast(processed_log, db)
-        except Exception as e:
-            logger.error(f"Failed to save log entry async: {e}")
-            db.rollback()
-            return None
-        finally:
-            db.close()
-
     def process_priority_logs_batch(
         self, log_ids: list[UUID], messages: list[str], log_entries_data: list[dict]
     ) -> dict:
         """Process a batch of priority logs with embeddings and anomaly detection.
 
         This is the priority path for ERROR/WARN logs.
-        Uses parallel processing for Qdrant storage and anomaly detection.
+        Stores all vectors in Qdrant, scores the whole batch for anomalies
+        in one pass, then runs LLM validation for anomalies in parallel.
 
         Args:
             log_ids: List of log entry UUIDs (already saved to PostgreSQL)
@@ -123,7 +264,7 @@ class StorageService:
             }
         """
         import concurrent.futures
-        from contextlib import contextmanager
+        from contextlib import contextmanager, nullcontext
 
         from app.services.anomaly_detection_service import anomaly_detection_service
         from app.services.llm_reasoning_service import llm_reasoning_service
@@ -174,98 +315,125 @@ class StorageService:
                 results["embeddings_generated"] += 1
                 log_data = log_entries_data[i] if i < len(log_entries_data) else {}
 
+                # Prepare payload for Qdrant
+                embedding_timestamp = embedding_result.get("timestamp")
+                payload = {
+                    "level": log_data.get("level"),
+                    "service": log_data.get("service"),
+                    "timestamp": log_data.get("timestamp"),
+                    "pii_redacted": log_data.get("pii_redacted", False),
+                    "embedding_model": embedding_result.get("model"),
+                    "embedding_timestamp": embedding_timestamp.isoformat()
+                    if embedding_timestamp
+                    else None,
+                    "embedding_cost_usd": embedding_result.get("cost_usd", 0.0),
+                    "embedding_tokens": embedding_result.get("tokens", 0),
+                    "embedding_cached": embedding_result.get("cached", False),
+                }
+
                 items_to_process.append(
                     {
                         "log_id": log_id,
                         "message": message,
                         "embedding": embedding_result["embedding"],
-                        "embedding_result": embedding_result,
+                        "payload": payload,
                         "log_data": log_data,
                     }
                 )
 
-            # Process Qdrant storage and anomaly detection in parallel
-            def process_single_log(item: dict) -> dict:
-                """Process a single log entry (Qdrant + anomaly detection)."""
-                log_id = item["log_id"]
-                result = {"success": False, "is_anomaly": False, "error": None}
-
-                try:
-                    # Prepare payload for Qdrant
-                    embedding_result = item["embedding_result"]
-                    log_data = item["log_data"]
-                    payload = {
-                        "level": log_data.get("level"),
-                        "service": log_data.get("service"),
-                        "timestamp": log_data.get("timestamp"),
-                        "pii_redacted": log_data.get("pii_redacted", False),
-                        "embedding_model": embedding_result.get("model"),
-                        "embedding_timestamp": embedding_result.get("timestamp").isoformat()
-                        if embedding_result.get("timestamp")
-                        else None,
-                        "embedding_cost_usd": embedding_result.get("cost_usd", 0.0),
-                        "embedding_tokens": embedding_result.get("tokens", 0),
-                        "embedding_cached": embedding_result.get("cached", False),
-                    }
+            # Store the whole batch in Qdrant
+            if items_to_process:
+                bulk = len(items_to_process) >= settings.qdrant_bulk_ingest_threshold
+                with qdrant_service.bulk_ingest() if bulk else nullcontext():
+                    # Scoring uses the embeddings in hand, not read-backs, so the
+                    # upsert only needs to be acknowledged, not applied
+                    stored = qdrant_service.store_vectors(
+                        [
+                            (item["log_id"], item["embedding"], item["payload"])
+                            for item in items_to_process
+                        ],
+                        wait=False,
+                    )
+                failed = stored.count(False)
+                if failed:
+                    logger.warning(f"Failed to store {failed} of {len(stored)} vectors")
+                    results["errors"] += failed
+                    items_to_process = [
+                        item for item, ok in zip(items_to_process, stored, strict=True) if ok
+                    ]
+
+            # Score the whole batch with one shared session and one commit
+            # (Tier 1: IsolationForest)
+            with get_db_session() as db:
+                scores = anomaly_detection_service.score_log_entries_bulk(
+                    [(item["log_id"], item["embedding"]) for item in items_to_process],
+                    method="IsolationForest",
+                    db=db,
+                )
 
-                    # Store in Qdrant
-                    success = qdrant_service.store_vector(log_id, item["embedding"], payload)
-                    if not success:
-                        result["error"] = "Failed to store vector"
-                        return result
-
-                    result["success"] = True
-
-                    # Run anomaly detection (Tier 1: IsolationForest)
-                    with get_db_session() as db:
-                        tier1_result = anomaly_detection_service.score_log_entry(
-                            log_id=log_id, method="IsolationForest", db=db
-                        )
-
-                        if tier1_result and tier1_result.get("is_anomaly", False):
-                            result["is_anomaly"] = True
-                            tier1_score = tier1_result.get("anomaly_score", 0.0)
-
-                            # Tier 2: LLM validation for high-scoring anomalies
-                            if (
-                                settings.llm_validation_enabled
-                                and tier1_score >= settings.anomaly_score_threshold
-                            ):
-                                self._run_llm_validation(
-                                    log_id,
-                                    item["message"],
-                                    log_data,
-                                    db,
-                                    llm_reasoning_service,
-                                )
-
-                except Exception as e:
-                    result["error"] = str(e)
-                    logger.warning(f"Processing failed for log_id {log_id}: {e}")
-
-                return result
-
-            # Use ThreadPoolExecutor for parallel processing
-            max_workers = min(len(items_to_process), settings.embedding_parallel_batches)
+                anomalous_items = [
+                    (item, scores[item["log_id"]])
+                    for item in items_to_process
+                    if scores.get(item["log_id"])
+                    and scores[item["log_id"]].get("is_anomaly", False)
+                ]
+                results["anomalies_detected"] += len(anomalous_items)
+
+                # Tier 2: LLM validation for high-scoring anomalies
+                items_to_validate = [
+                    item
+                    for item, tier1_result in anomalous_items
+                    if settings.llm_validation_enabled
+                    and tier1_result.get("anomaly_score", 0.0) >= settings.anomaly_score_threshold
+                ]
+
+                # Every anomaly shares the same recent-log context; fetch it once
+                # with one spare row so each can still exclude itself
+                context_window = []
+                if items_to_validate:
+                    context_window = (
+                        db.query(LogEntry.id, LogEntry.level, LogEntry.service, LogEntry.message)
+                        .order_by(LogEntry.timestamp.desc())
+                        .limit(CONTEXT_LOG_LIMIT + 1)
+                        .all()
+                    )
+
+            def validate_single_log(item: dict) -> None:
+                """Run LLM validation for a single anomalous log entry."""
+                context = [
+                    {"level": log.level, "service": log.service, "message": log.message}
+                    for log in context_window
+                    if log.id != item["log_id"]
+                ][:CONTEXT_LOG_LIMIT]
+                with get_db_session() as db:
+                    self._run_llm_validation(
+                        item["log_id"],
+                        item["message"],
+                        item["log_data"],
+                        db,
+                        llm_reasoning_service,
+                        precomputed_context=context,
+                    )
+
+            # Submit every validation, then collect: detect_anomaly is synchronous, so
+            # each call gets a thread, bounded like the async OpenAI callers. Concurrent
+            # calls also let llm_detection_batch_size coalesce classifications.
+            max_workers = min(len(items_to_validate), settings.openai_max_concurrency)
             if max_workers > 0:
                 with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    futures = {
-                        executor.submit(process_single_log, item): item for item in items_to_process
-                    }
+                    futures = [
+                        executor.submit(validate_single_log, item) for item in items_to_validate
+                    ]
 
                     for future in concurrent.futures.as_completed(futures):
                         try:
-                            result = future.result(timeout=30)  # 30s timeout per item
-                            if result.get("is_anomaly"):
-                                results["anomalies_detected"] += 1
-                            if result.get("error"):
-                                results["errors"] += 1
+                            future.result(timeout=30)  # 30s timeout per item
                         except concurrent.futures.TimeoutError:
                             results["errors"] += 1
-                            logger.warning("Processing timed out for a log entry")
+                            logger.warning("LLM validation timed out for a log entry")
                         except Exception as e:
                             results["errors"] += 1
-                            logger.warning(f"Processing failed: {e}")
+                            logger.warning(f"LLM validation failed: {e}")
 
         except BudgetExceededError as e:
             logger.warning(f"Budget exceeded during batch processing: {e}")
@@ -288,6 +456,7 @@ class StorageService:
         log_data: dict,
         db: Session,
         llm_reasoning_service,
+        precomputed_context: list[dict] | None = None,
     ) -> None:
         """Run LLM validation for a detected anomaly.
 
@@ -297,23 +466,27 @@ class StorageService:
             log_data: Log metadata
             db: Database session
             llm_reasoning_service: LLM reasoning service instance
+            precomputed_context: Recent context logs already fetched by the
+                caller; queried from the database when not given
         """
         settings = get_settings()
 
         try:
-            # Get context logs
-            context_logs = (
-                db.query(LogEntry)
-                .filter(LogEntry.id != log_id)
-                .order_by(LogEntry.timestamp.desc())
-                .limit(5)
-                .all()
-            )
+            context = precomputed_context
+            if context is None:
+                # Get context logs (only the columns the prompt uses)
+                context_logs = (
+                    db.query(LogEntry.level, LogEntry.service, LogEntry.message)
+                    .filter(LogEntry.id != log_id)
+                    .order_by(LogEntry.timestamp.desc())
+                    .limit(CONTEXT_LOG_LIMIT)
+                    .all()
+                )
 
-            context = [
-                {"level": log.level, "service": log.service, "message": log.message}
-                for log in context_logs
-            ]
+                context = [
+                    {"level": log.level, "service": log.service, "message": log.message}
+                    for log in context_logs
+                ]
 
             # Run LLM validation
             llm_result = llm_reasoning_service.detect_anomaly(
@@ -323,13 +496,17 @@ class StorageService:
                 context_logs=context,
             )
 
-            # Update anomaly result with LLM reasoning
-            anomaly_result = (
-                db.query(AnomalyResult).filter(AnomalyResult.log_entry_id == log_id).first()
-            )
+            if not llm_result:
+                return
+
+            # Update anomaly result with LLM reasoning in place, without loading it first
+            updated = db.execute(
+                update(AnomalyResult)
+                .where(AnomalyResult.log_entry_id == log_id)
+                .values(llm_reasoning=llm_result.get("reasoning"))
+            ).rowcount
 
-            if anomaly_result and llm_result:
-                anomaly_result.llm_reasoning = llm_result.get("reasoning")
+            if updated:
                 llm_is_anomaly = llm_result.get("is_anomaly", False)
                 llm_confidence = llm_result.get("confidence", 0.0)
 
@@ -0,0 +1 @@
+"""Shared utility helpers."""
@@ -0,0 +1,30 @@
+"""Regex compilation for patterns run against untrusted log content."""
+
+import logging
+import re
+
+try:
+    import re2  # google-re2: linear-time matching, immune to catastrophic backtracking
+except ImportError:
+    re2 = None
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for each compiled RE2 program
+RE2_MAX_MEM = 8 << 20
+
+
+def compile_pattern(pattern: str):
+    """Compile a hot-path pattern with RE2 when installed, else stdlib re.
+
+    Patterns must stay within the syntax shared by both engines (no
+    backreferences or lookaround); flags are given inline, e.g. ``(?m)``.
+    """
+    if re2 is not None:
+        options = re2.Options()
+        options.max_mem = RE2_MAX_MEM
+        try:
+            return re2.compile(pattern, options)
+        except Exception as e:
+            logger.warning(f"RE2 could not compile pattern, falling back to re: {e}")
+    return re.compile(pattern)
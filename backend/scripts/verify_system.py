@@ -86,7 +86,8 @@ def run_end_to_end_test():
         "service": "verification-script",
         "level": "INFO",
         "message": f"Test log {test_id}: User testing@example.com logged in successfully.",
-        "extra": {"test_id": test_id},
+        # Carried through to the processed log's metadata, so it can be matched directly
+        "metadata": {"test_id": test_id},
     }
 
     # 1. Produce to logs-raw
@@ -113,29 +114,31 @@ def run_end_to_end_test():
             auto_offset_reset="latest",
             enable_auto_commit=True,
             value_deserializer=lambda x: json.loads(x.decode("utf-8")),
-            consumer_timeout_ms=TEST_TIMEOUT * 1000,
         )
 
         start_time = time.time()
-        for message in consumer:
-            data = message.value
-            # Check if this is our log
-            if "test_id" in str(data) and test_id in str(data):
-                print(f"\n📥 RECEIVED LOG (from {TOPIC_PROCESSED}):")
-                print(json.dumps(data, indent=2))
-
-                # 3. Verify PII Redaction
-                msg_content = data.get("message", "")
-                if "[EMAIL_ADDRESS]" in msg_content or "testing@example.com" not in msg_content:
-                    print("\n✅ PII Redaction Verified! Email was obscured.")
-                    return True
-                else:
-                    print("\n❌ PII was NOT redacted!")
-                    return False
-
-            if time.time() - start_time > TEST_TIMEOUT:
-                logger.error("❌ Timeout waiting for processed log.")
-                break
+        while time.time() - start_time < TEST_TIMEOUT:
+            batch = consumer.poll(timeout_ms=500, max_records=500)
+            for messages in batch.values():
+                for message in messages:
+                    data = message.value
+                    # Check if this is our log
+                    if (data.get("metadata") or {}).get("test_id") != test_id:
+                        continue
+
+                    print(f"\n📥 RECEIVED LOG (from {TOPIC_PROCESSED}):")
+                    print(json.dumps(data, indent=2))
+
+                    # 3. Verify PII Redaction
+                    msg_content = data.get("message", "")
+                    if "[EMAIL_ADDRESS]" in msg_content or "testing@example.com" not in msg_content:
+                        print("\n✅ PII Redaction Verified! Email was obscured.")
+                        return True
+                    else:
+                        print("\n❌ PII was NOT redacted!")
+                        return False
+
+        logger.error("❌ Timeout waiting for processed log.")
 
     except Exception as e:
         logger.error(f"❌ Error consuming from Kafka: {e}")
@@ -1,5 +1,6 @@
 """Integration tests for agent API endpoints."""
 
+import json
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
@@ -146,6 +147,31 @@ class TestAgentEndpoints:
         assert response.status_code == 200
         assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
 
+    @patch("app.api.v1.agent.get_similar_log_context", return_value=[])
+    @patch("app.api.v1.agent.llm_reasoning_service")
+    def test_analyze_anomaly_stream_endpoint_streams_tokens(self, mock_service, _mock_context):
+        """Test the stream endpoint forwards LLM deltas before the final result."""
+
+        async def fake_stream(**_kwargs):
+            for delta in ("Disk ", "is ", "full"):
+                yield delta
+
+        mock_service.stream_anomaly_analysis = fake_stream
+
+        response = client.post(
+            "/api/v1/agent/analyze-anomaly/stream",
+            params={"log_message": "Error: disk full", "include_root_cause": False},
+        )
+
+        assert response.status_code == 200
+        events = [
+            json.loads(line.removeprefix("data: "))
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert [event["delta"] for event in events[:-1]] == ["Disk ", "is ", "full"]
+        assert events[-1]["explanation"] == "Disk is full"
+
     def test_list_agent_tools_endpoint(self):
         """Test GET /api/v1/agent/tools endpoint."""
         response = client.get("/api/v1/agent/tools")
@@ -1,17 +1,21 @@
 """Integration tests for the ingestion pipeline."""
 
+import csv
+import io
 import json
 from datetime import datetime
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
 
 import pytest
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
 
 from app.db.postgres import LogEntry
 from app.db.session import get_db
 from app.models.log import ProcessedLogEntry, RawLogEntry
-from app.services.ingestion_service import ingestion_service
+from app.services.ingestion_service import IngestionService, ingestion_service
 from app.services.metadata_extractor import metadata_extractor
 from app.services.pii_service import pii_service
 from app.services.storage_service import storage_service
@@ -354,6 +358,354 @@ class TestIngestionFlow:
         assert processed_log.level in ["INFO", "DEBUG", "WARN", "ERROR"]
         assert processed_log.service is not None
 
+    @patch("app.services.ingestion_service.pii_service")
+    def test_process_raw_logs_batches_pii_redaction(self, mock_pii_service):
+        """Test processing several logs redacts PII in a single batch call."""
+        mock_pii_service.redact_pii_batch.return_value = [
+            ("Login failed for [EMAIL]", {"EMAIL_ADDRESS": 1}),
+            ("Cache warmed", {}),
+        ]
+        raw_logs = [
+            {"message": "Login failed for user@example.com", "log_type": "json"},
+            {"message": "Cache warmed", "log_type": "json"},
+        ]
+
+        processed_logs = ingestion_service.process_raw_logs(raw_logs)
+
+        mock_pii_service.redact_pii_batch.assert_called_once_with(
+            ["Login failed for user@example.com", "Cache warmed"]
+        )
+        mock_pii_service.redact_pii.assert_not_called()
+        assert [log.message for log in processed_logs] == [
+            "Login failed for [EMAIL]",
+            "Cache warmed",
+        ]
+        assert [log.pii_redacted for log in processed_logs] == [True, False]
+        # Logs without a timestamp share the batch's single clock read
+        assert processed_logs[0].timestamp == processed_logs[1].timestamp
+
+    @patch("app.services.ingestion_service.kafka_service")
+    @patch("app.services.ingestion_service.storage_service")
+    def test_process_and_store_batch_saves_in_one_call(
+        self, mock_storage_service, mock_kafka_service
+    ):
+        """Test a batch is written with one bulk insert and failed rows are skipped."""
+        saved_id = uuid4()
+        mock_storage_service.save_log_entries_fast.return_value = [saved_id, None]
+        raw_logs = [
+            {"message": "Cache warmed", "level": "INFO", "log_type": "json"},
+            {"message": "Cache cleared", "level": "INFO", "log_type": "json"},
+        ]
+
+        stored = ingestion_service.process_and_store_batch(raw_logs)
+
+        assert stored == 1
+        mock_storage_service.save_log_entries_fast.assert_called_once()
+        saved_logs = mock_storage_service.save_log_entries_fast.call_args[0][0]
+        assert [log.message for log in saved_logs] == ["Cache warmed", "Cache cleared"]
+        mock_storage_service.save_log_entry_fast.assert_not_called()
+        mock_kafka_service.produce_message.assert_called_once()
+
+    def test_save_log_entry_fast_uses_core_insert(self):
+        """Test the fast path inserts with Core and a client-side id, without ORM objects."""
+        mock_db = MagicMock()
+        processed_log = ProcessedLogEntry(
+            timestamp=datetime.utcnow(),
+            level="INFO",
+            service="api",
+            message="Request handled",
+            raw_log="Request handled",
+        )
+
+        log_id = storage_service.save_log_entry_fast(processed_log, mock_db)
+
+        assert log_id is not None
+        _, row = mock_db.execute.call_args[0]
+        assert row["id"] == log_id == processed_log.id
+        mock_db.add.assert_not_called()
+        mock_db.commit.assert_called_once()
+        mock_db.refresh.assert_not_called()
+
+    def test_save_log_entries_fast(self, db_session: Session):
+        """Test bulk saving returns the new ids in input order."""
+        processed_logs = [
+            ProcessedLogEntry(
+                timestamp=datetime.utcnow(),
+                level="INFO",
+                service="bulk-service",
+                message=f"Bulk message {i}",
+                raw_log=f"Bulk message {i}",
+                metadata={"index": i},
+                pii_redacted=False,
+            )
+            for i in range(3)
+        ]
+
+        log_ids = storage_service.save_log_entries_fast(processed_logs, db_session)
+
+        assert len(log_ids) == 3
+        for i, log_id in enumerate(log_ids):
+            saved_entry = db_session.get(LogEntry, log_id)
+            assert saved_entry.message == f"Bulk message {i}"
+
+    def test_save_log_entries_fast_retry_reuses_ids(self):
+        """Test saving the same entries again sends the same ids, so stored rows conflict."""
+        mock_db = MagicMock()
+        processed_logs = [
+            ProcessedLogEntry(
+                timestamp=datetime(2024, 1, 15, 10, 30),
+                level="INFO",
+                service="bulk-service",
+                message=f"Retried message {i}",
+                raw_log=f"Retried message {i}",
+            )
+            for i in range(2)
+        ]
+
+        first = storage_service.save_log_entries_fast(processed_logs, mock_db)
+        second = storage_service.save_log_entries_fast(processed_logs, mock_db)
+
+        assert first == second == [log.id for log in processed_logs]
+        sent_ids = [[row["id"] for row in call.args[1]] for call in mock_db.execute.call_args_list]
+        assert sent_ids == [first, first]
+
+    def test_save_log_entries_fast_rolls_back_only_connection_errors(self):
+        """Test a lost connection yields retryable Nones while rejected data raises."""
+        processed_logs = [
+            ProcessedLogEntry(
+                timestamp=datetime(2024, 1, 15, 10, 30),
+                level="INFO",
+                service="bulk-service",
+                message="Batch message",
+                raw_log="Batch message",
+            )
+        ]
+
+        mock_db = MagicMock()
+        mock_db.execute.side_effect = OperationalError("INSERT", {}, Exception("closed"))
+        assert storage_service.save_log_entries_fast(processed_logs, mock_db) == [None]
+        mock_db.rollback.assert_called_once()
+
+        mock_db = MagicMock()
+        mock_db.execute.side_effect = IntegrityError("INSERT", {}, Exception("not null"))
+        with pytest.raises(IntegrityError):
+            storage_service.save_log_entries_fast(processed_logs, mock_db)
+
+    @pytest.mark.parametrize("copy_threshold", [1000, 1])
+    def test_save_log_entries_fast_is_idempotent(self, db_session: Session, copy_threshold):
+        """Test saving the same entries twice stores them once, on both insert paths."""
+        processed_logs = [
+            ProcessedLogEntry(
+                timestamp=datetime.utcnow(),
+                level="INFO",
+                service="bulk-service",
+                message=f"Idempotent message {i}",
+                raw_log=f"Idempotent message {i}",
+            )
+            for i in range(3)
+        ]
+
+        with patch("app.services.storage_service.get_settings") as mock_get_settings:
+            mock_get_settings.return_value.database_copy_threshold = copy_threshold
+            first = storage_service.save_log_entries_fast(processed_logs, db_session)
+            second = storage_service.save_log_entries_fast(processed_logs, db_session)
+
+        assert first == second == [log.id for log in processed_logs]
+        stored = db_session.query(LogEntry).filter(LogEntry.id.in_(first)).count()
+        assert stored == 3
+
+    def test_priority_batches_wait_for_oldest_log_timeout(self):
+        """Test a partial priority batch waits out the window measured from its oldest log."""
+        service = IngestionService()
+        service._settings = MagicMock(
+            embedding_batch_size=2,
+            embedding_batch_timeout_seconds=5.0,
+            embedding_parallel_batches=3,
+        )
+        assert not service._should_process_batch()
+
+        with patch("app.services.ingestion_service.time") as mock_time:
+            mock_time.time.return_value = 100.0
+            service._add_to_priority_queue(uuid4(), "Disk failure", {})
+
+            mock_time.time.return_value = 104.0
+            assert not service._should_process_batch()
+
+            mock_time.time.return_value = 105.0
+            assert service._should_process_batch()
+
+        for _ in range(6):
+            service._add_to_priority_queue(uuid4(), "Disk failure", {})
+        assert service._should_process_batch()
+        assert service._ready_batch_count() == 3
+
+    @patch("app.services.storage_service.get_settings")
+    def test_save_log_entries_fast_uses_copy_above_threshold(self, mock_get_settings):
+        """Test large batches are streamed with COPY using client-side ids."""
+        mock_get_settings.return_value.database_copy_threshold = 1
+        mock_db = MagicMock()
+        cursor = (
+            mock_db.connection.return_value.connection.cursor.return_value.__enter__.return_value
+        )
+        processed_logs = [
+            ProcessedLogEntry(
+                timestamp=datetime(2024, 1, 15, 10, 30),
+                level="INFO",
+                service="bulk-service",
+                message=message,
+                raw_log=message,
+                metadata=metadata,
+                pii_redacted=False,
+            )
+            for message, metadata in (('say "hi", then leave', {"k": 1}), ("", {}))
+        ]
+
+        log_ids = storage_service.save_log_entries_fast(processed_logs, mock_db)
+
+        mock_db.scalars.assert_not_called()
+        mock_db.commit.assert_called_once()
+        sql, buf = cursor.copy_expert.call_args[0]
+        assert sql.startswith("COPY log_entries_copy (id, timestamp,")
+        insert_sql = cursor.execute.call_args_list[-1][0][0]
+        assert insert_sql.startswith("INSERT INTO log_entries (id, timestamp,")
+        assert insert_sql.endswith("ON CONFLICT (id) DO NOTHING")
+        rows = list(csv.reader(io.StringIO(buf.getvalue())))
+        assert [row[0] for row in rows] == [str(log_id) for log_id in log_ids]
+        assert rows[0][4] == 'say "hi", then leave'
+        assert json.loads(rows[0][6]) == {"k": 1}
+        # Empty message stays a quoted empty string rather than becoming NULL
+        assert rows[1][4] == ""
+        assert '"",""' in buf.getvalue().splitlines()[1]
+
+    def test_save_log_entries_fast_copy_matches_insert(self, db_session: Session):
+        """Test rows written with COPY read back the same as rows from the bulk INSERT."""
+        contents = [
+            ('say "hi", then leave\nnext line', "raw, with comma", {"k": [1, "x"]}, True),
+            ("", "", {}, False),
+            ("plain", "plain", {"nested": {"a": None}}, False),
+        ]
+
+        def make_logs():
+            return [
+                ProcessedLogEntry(
+                    timestamp=datetime(2024, 1, 15, 10, 30, 5, 123456),
+                    level="WARN",
+                    service="copy-service",
+                    message=message,
+                    raw_log=raw_log,
+                    metadata=metadata,
+                    pii_redacted=pii_redacted,
+                )
+                for message, raw_log, metadata, pii_redacted in contents
+            ]
+
+        def read_back(log_ids):
+            entries = [db_session.get(LogEntry, log_id) for log_id in log_ids]
+            assert all(entry.created_at is not None for entry in entries)
+            return [
+                (
+                    entry.timestamp,
+                    entry.level,
+                    entry.service,
+                    entry.message,
+                    entry.raw_log,
+                    entry.log_metadata,
+                    entry.pii_redacted,
+                )
+                for entry in entries
+            ]
+
+        with patch("app.services.storage_service.get_settings") as mock_get_settings:
+            mock_get_settings.return_value.database_copy_threshold = len(contents)
+            inserted_ids = storage_service.save_log_entries_fast(make_logs(), db_session)
+            mock_get_settings.return_value.database_copy_threshold = 1
+            copied_ids = storage_service.save_log_entries_fast(make_logs(), db_session)
+
+        assert read_back(copied_ids) == read_back(inserted_ids)
+        assert read_back(copied_ids)[1][3:6] == ("", "", {})
+
+    def test_run_llm_validation_updates_result_without_loading_it(self):
+        """Test LLM reasoning is written with one UPDATE after the context query."""
+        log_id = uuid4()
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
+            MagicMock(level="INFO", service="api", message="Request handled")
+        ]
+        mock_db.execute.return_value.rowcount = 1
+        mock_llm = MagicMock()
+        mock_llm.detect_anomaly.return_value = {
+            "is_anomaly": True,
+            "confidence": 0.9,
+            "reasoning": "Unusual failure",
+        }
+
+        storage_service._run_llm_validation(
+            log_id, "Disk failure", {"level": "ERROR", "service": "api"}, mock_db, mock_llm
+        )
+
+        mock_db.query.assert_called_once()
+        mock_db.execute.assert_called_once()
+        update_stmt = mock_db.execute.call_args[0][0]
+        assert update_stmt.compile().params["llm_reasoning"] == "Unusual failure"
+        assert mock_llm.detect_anomaly.call_args[1]["context_logs"] == [
+            {"level": "INFO", "service": "api", "message": "Request handled"}
+        ]
+
+    @patch("app.services.llm_reasoning_service.llm_reasoning_service")
+    @patch("app.services.anomaly_detection_service.anomaly_detection_service")
+    @patch("app.services.qdrant_service.qdrant_service")
+    @patch("app.services.storage_service.embedding_service")
+    @patch("app.services.storage_service.get_settings")
+    @patch("app.services.storage_service.get_db")
+    def test_process_priority_logs_batch_shares_context_query(
+        self,
+        mock_get_db,
+        mock_get_settings,
+        mock_embedding_service,
+        mock_qdrant_service,
+        mock_anomaly_service,
+        mock_llm_service,
+    ):
+        """Test anomalies in one batch reuse a single context query, excluding themselves."""
+        log_ids = [uuid4(), uuid4()]
+        mock_get_settings.return_value = MagicMock(
+            llm_validation_enabled=True,
+            anomaly_score_threshold=0.5,
+            llm_validation_confidence_threshold=0.7,
+            openai_max_concurrency=2,
+            qdrant_bulk_ingest_threshold=500,
+        )
+        mock_embedding_service.generate_embeddings_batch.return_value = [
+            {"embedding": [0.1] * 8, "model": "m", "timestamp": None} for _ in log_ids
+        ]
+        mock_qdrant_service.store_vectors.return_value = [True, True]
+        mock_anomaly_service.score_log_entries_bulk.return_value = {
+            log_id: {"is_anomaly": True, "anomaly_score": 0.9} for log_id in log_ids
+        }
+        mock_llm_service.detect_anomaly.return_value = None
+
+        mock_db = MagicMock()
+        mock_get_db.side_effect = lambda: iter([mock_db])
+        context_query = mock_db.query.return_value.order_by.return_value.limit.return_value
+        context_query.all.return_value = [
+            MagicMock(id=log_id, level="ERROR", service="api", message=f"Failure {i}")
+            for i, log_id in enumerate(log_ids)
+        ]
+
+        results = storage_service.process_priority_logs_batch(
+            log_ids, ["Failure 0", "Failure 1"], [{"level": "ERROR"}, {"level": "ERROR"}]
+        )
+
+        assert results["anomalies_detected"] == 2
+        assert mock_qdrant_service.store_vectors.call_args[1]["wait"] is False
+        mock_db.query.assert_called_once()
+        contexts = {
+            call[1]["log_message"]: call[1]["context_logs"]
+            for call in mock_llm_service.detect_anomaly.call_args_list
+        }
+        assert [log["message"] for log in contexts["Failure 0"]] == ["Failure 1"]
+        assert [log["message"] for log in contexts["Failure 1"]] == ["Failure 0"]
+
     @patch("app.services.storage_service.qdrant_service")
     @patch("app.services.storage_service.embedding_service")
     def test_storage_service(
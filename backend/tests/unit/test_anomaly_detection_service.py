@@ -3,6 +3,9 @@
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
 from app.services.anomaly_detection_service import AnomalyDetectionService
 
 
@@ -269,3 +272,107 @@ class TestAnomalyDetectionService:
             assert not info_flagged or error_flagged, (
                 "If INFO is flagged, ERROR with same embedding should also be flagged"
             )
+
+    @patch("app.services.anomaly_detection_service.qdrant_service")
+    def test_score_log_entries_bulk_uses_one_fetch_and_commit(self, mock_qdrant):
+        """Test a batch is scored with one embedding fetch and a single commit."""
+        log_id_error = uuid4()
+        log_id_missing = uuid4()
+        mock_qdrant.get_embedding_matrix.return_value = (
+            [str(uuid4()) for _ in range(10)],
+            np.array([[0.1 + i * 0.01] * 8 for i in range(10)]),
+        )
+
+        mock_db = MagicMock()
+
+        def query_side_effect(*entities):
+            mock_query = MagicMock()
+            if len(entities) == 2:
+                mock_query.filter.return_value.all.return_value = [(log_id_error, "ERROR")]
+            else:
+                mock_query.filter.return_value.all.return_value = []
+            return mock_query
+
+        mock_db.query.side_effect = query_side_effect
+
+        service = AnomalyDetectionService()
+        results = service.score_log_entries_bulk(
+            [(log_id_error, [5.0] * 8), (log_id_missing, [0.1] * 8)], db=mock_db
+        )
+
+        mock_qdrant.get_embedding_matrix.assert_called_once()
+        mock_qdrant.get_vector.assert_not_called()
+        mock_db.commit.assert_called_once()
+        mock_db.add.assert_called_once()
+        assert results[log_id_error]["is_anomaly"] is True
+        assert results[log_id_missing] is None
+
+    @patch("app.services.anomaly_detection_service.qdrant_service")
+    def test_score_log_entries_bulk_fits_one_model_per_batch(self, mock_qdrant):
+        """Test IsolationForest is trained once for the batch, not once per entry."""
+        log_ids = [uuid4() for _ in range(3)]
+        mock_qdrant.get_embedding_matrix.return_value = (
+            [str(uuid4()) for _ in range(10)],
+            np.array([[0.1 + i * 0.01] * 8 for i in range(10)]),
+        )
+
+        mock_db = MagicMock()
+
+        def query_side_effect(*entities):
+            mock_query = MagicMock()
+            if len(entities) == 2:
+                mock_query.filter.return_value.all.return_value = [
+                    (log_id, "ERROR") for log_id in log_ids
+                ]
+            else:
+                mock_query.filter.return_value.all.return_value = []
+            return mock_query
+
+        mock_db.query.side_effect = query_side_effect
+
+        service = AnomalyDetectionService()
+        with patch(
+            "app.services.anomaly_detection_service.IsolationForest", wraps=IsolationForest
+        ) as mock_forest:
+            results = service.score_log_entries_bulk(
+                [(log_id, [0.1 + i] * 8) for i, log_id in enumerate(log_ids)], db=mock_db
+            )
+
+        mock_forest.assert_called_once()
+        assert all(results[log_id] is not None for log_id in log_ids)
+        assert mock_db.add.call_count == 3
+
+    @patch("app.services.anomaly_detection_service.qdrant_service")
+    def test_score_log_entries_bulk_ignores_already_stored_batch(self, mock_qdrant):
+        """Test scores are the same whether or not Qdrant has applied the batch's upsert."""
+        log_ids = [uuid4() for _ in range(3)]
+        embeddings = [[0.5 + i] * 8 for i in range(3)]
+        stored_ids = [str(uuid4()) for _ in range(10)]
+        stored_vectors = np.array([[0.1 + i * 0.01] * 8 for i in range(10)])
+
+        mock_db = MagicMock()
+
+        def query_side_effect(*entities):
+            mock_query = MagicMock()
+            if len(entities) == 2:
+                mock_query.filter.return_value.all.return_value = [
+                    (log_id, "ERROR") for log_id in log_ids
+                ]
+            else:
+                mock_query.filter.return_value.all.return_value = []
+            return mock_query
+
+        mock_db.query.side_effect = query_side_effect
+        service = AnomalyDetectionService()
+        entries = list(zip(log_ids, embeddings, strict=True))
+
+        mock_qdrant.get_embedding_matrix.return_value = (stored_ids, stored_vectors)
+        before_upsert = service.score_log_entries_bulk(entries, method="Z-score", db=mock_db)
+
+        mock_qdrant.get_embedding_matrix.return_value = (
+            stored_ids + [str(log_id) for log_id in log_ids],
+            np.vstack([stored_vectors, np.array(embeddings)]),
+        )
+        after_upsert = service.score_log_entries_bulk(entries, method="Z-score", db=mock_db)
+
+        assert before_upsert == after_upsert
@@ -42,7 +42,7 @@ class TestClusteringService:
         mock_settings.clustering_max_embeddings = 10000
         mock_get_settings.return_value = mock_settings
 
-        mock_qdrant_service.get_all_embeddings.return_value = []
+        mock_qdrant_service.get_embedding_matrix.return_value = ([], np.empty((0, 1536)))
 
         service = ClusteringService()
         mock_db = MagicMock(spec=Session)
@@ -76,16 +76,13 @@ class TestClusteringService:
         log_id5 = uuid4()
         log_id6 = uuid4()
 
-        embeddings_data = [
-            {"id": str(log_id1), "vector": [0.1] * 1536, "payload": {}},
-            {"id": str(log_id2), "vector": [0.1] * 1536, "payload": {}},
-            {"id": str(log_id3), "vector": [0.1] * 1536, "payload": {}},
-            {"id": str(log_id4), "vector": [0.1] * 1536, "payload": {}},
-            {"id": str(log_id5), "vector": [0.1] * 1536, "payload": {}},
-            {"id": str(log_id6), "vector": [0.9] * 1536, "payload": {}},  # Outlier
-        ]
+        log_ids = [log_id1, log_id2, log_id3, log_id4, log_id5, log_id6]
+        vectors = np.array([[0.1] * 1536] * 5 + [[0.9] * 1536])  # Last one is an outlier
 
-        mock_qdrant_service.get_all_embeddings.return_value = embeddings_data
+        mock_qdrant_service.get_embedding_matrix.return_value = (
+            [str(log_id) for log_id in log_ids],
+            vectors,
+        )
 
         # Mock HDBSCAN
         mock_clusterer = MagicMock()
@@ -123,11 +120,10 @@ class TestClusteringService:
         mock_get_settings.return_value = mock_settings
 
         # Create many mock embeddings
-        embeddings_data = [
-            {"id": str(uuid4()), "vector": [0.1] * 1536, "payload": {}} for _ in range(1000)
-        ]
-
-        mock_qdrant_service.get_all_embeddings.return_value = embeddings_data
+        mock_qdrant_service.get_embedding_matrix.return_value = (
+            [str(uuid4()) for _ in range(1000)],
+            np.full((1000, 1536), 0.1, dtype=np.float32),
+        )
 
         # Mock HDBSCAN
         mock_clusterer = MagicMock()
@@ -148,8 +144,11 @@ class TestClusteringService:
 
     @patch("app.services.clustering_service.get_settings")
     @patch("app.services.clustering_service.qdrant_service")
-    def test_perform_clustering_invalid_embeddings(self, mock_qdrant_service, mock_get_settings):
-        """Test clustering with invalid embeddings (no vectors)."""
+    @patch("app.services.clustering_service.HDBSCAN")
+    def test_perform_clustering_fetches_vectors_in_configured_dtype(
+        self, mock_hdbscan, mock_qdrant_service, mock_get_settings
+    ):
+        """Test embeddings are fetched as one array in the clustering dtype."""
         mock_settings = MagicMock()
         mock_settings.hdbscan_min_cluster_size = 5
         mock_settings.hdbscan_min_samples = 3
@@ -157,25 +156,29 @@ class TestClusteringService:
         mock_settings.hdbscan_max_cluster_size = None
         mock_settings.hdbscan_sample_size = None
         mock_settings.clustering_max_embeddings = 10000
+        mock_settings.clustering_use_float32 = True
         mock_get_settings.return_value = mock_settings
 
-        # Embeddings without vectors
-        embeddings_data = [
-            {"id": str(uuid4()), "vector": None, "payload": {}},
-            {"id": str(uuid4()), "vector": None, "payload": {}},
-        ]
-
-        mock_qdrant_service.get_all_embeddings.return_value = embeddings_data
+        vectors = np.full((3, 1536), 0.1, dtype=np.float32)
+        mock_qdrant_service.get_embedding_matrix.return_value = (
+            [str(uuid4()) for _ in range(3)],
+            vectors,
+        )
+        mock_clusterer = MagicMock()
+        mock_clusterer.fit_predict.return_value = np.array([0, 0, 0])
+        mock_hdbscan.return_value = mock_clusterer
 
         service = ClusteringService()
         mock_db = MagicMock(spec=Session)
+        mock_db.query.return_value.filter.return_value.first.return_value = None
+        mock_db.query.return_value.filter.return_value.all.return_value = []
 
-        result = service.perform_clustering(db=mock_db)
+        service.perform_clustering(db=mock_db)
 
-        assert result["n_clusters"] == 0
-        assert result["n_outliers"] == 0
-        assert "error" in result
-        assert result["error"] == "No valid embeddings found"
+        mock_qdrant_service.get_embedding_matrix.assert_called_once_with(
+            limit=None, dtype=np.float32
+        )
+        assert mock_clusterer.fit_predict.call_args[0][0] is vectors
 
     @patch("app.services.clustering_service.get_settings")
     def test_store_cluster_assignments(self, mock_get_settings):
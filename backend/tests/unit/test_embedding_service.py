@@ -1,8 +1,11 @@
 """Unit tests for embedding service."""
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from app.config import get_settings
 from app.services.embedding_service import EmbeddingService
 
@@ -113,6 +116,70 @@ class TestEmbeddingService:
                 model="text-embedding-3-small", input=texts
             )
 
+    @patch("app.services.embedding_service.OpenAI")
+    def test_generate_embeddings_batch_splits_into_concurrent_requests(self, mock_openai_class):
+        """Test large batches are sent as several requests with order preserved."""
+
+        def create_embeddings(input, **_kwargs):
+            response = MagicMock()
+            response.usage.total_tokens = len(input)
+            response.data = [
+                MagicMock(index=i, embedding=[float(text[4:])] * 1536)
+                for i, text in enumerate(input)
+            ]
+            return response
+
+        mock_client = MagicMock()
+        mock_client.embeddings.create.side_effect = create_embeddings
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = EmbeddingService()
+            service.max_batch_size = 2
+            texts = [f"text{i}" for i in range(5)]
+            results = service.generate_embeddings_batch(texts)
+
+            assert mock_client.embeddings.create.call_count == 3
+            assert [r["embedding"][0] for r in results] == [0.0, 1.0, 2.0, 3.0, 4.0]
+            assert service._get_current_daily_spending() == pytest.approx(
+                service._calculate_cost(5)
+            )
+
+    def test_record_spending_is_thread_safe(self):
+        """Test concurrent sub-batches never lose recorded spend."""
+        service = EmbeddingService()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(service._record_spending, [0.25] * 2000))
+
+        assert service._get_current_daily_spending() == pytest.approx(500.0)
+
+    @patch("app.services.embedding_service.OpenAI")
+    def test_generate_embeddings_batch_sends_only_unique_misses(self, mock_openai_class):
+        """Test cache hits and repeated texts are left out of the API request."""
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.usage.total_tokens = 4
+        mock_response.data = [MagicMock(index=0, embedding=[0.3] * 1536)]
+        mock_client.embeddings.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = EmbeddingService()
+            service._embedding_cache[service._get_text_hash("cached")] = {
+                "embedding": [0.1] * 1536,
+                "model": "text-embedding-3-small",
+            }
+
+            results = service.generate_embeddings_batch(["disk full", "cached", "disk full"])
+
+            mock_client.embeddings.create.assert_called_once_with(
+                model="text-embedding-3-small", input=["disk full"]
+            )
+            assert [r["cached"] for r in results] == [False, True, True]
+            assert results[0]["embedding"] == results[2]["embedding"] == [0.3] * 1536
+
     def test_generate_embeddings_batch_without_client(self):
         """Test batch embedding generation without client."""
         service = EmbeddingService()
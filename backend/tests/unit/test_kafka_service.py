@@ -102,6 +102,23 @@ class TestKafkaService:
         assert service.consumer is None or service.consumer is not None
         assert service.producer is None or service.producer is not None
 
+    @patch("app.services.kafka_service.KafkaConsumer")
+    @patch("app.services.kafka_service.KafkaProducer")
+    def test_clients_initialized_lazily(self, mock_producer_class, mock_consumer_class):
+        """Test that constructing the service does not connect to Kafka."""
+        from kafka.errors import KafkaConnectionError
+
+        mock_consumer_class.side_effect = KafkaConnectionError("Connection failed")
+
+        service = KafkaService()
+        mock_consumer_class.assert_not_called()
+        mock_producer_class.assert_not_called()
+
+        # A failed initialization is not retried on every access
+        assert service.consumer is None
+        assert service.consumer is None
+        assert mock_consumer_class.call_count == 2  # initial attempt + one retry
+
     @patch("app.services.kafka_service.KafkaConsumer")
     @patch("app.services.kafka_service.KafkaProducer")
     def test_produce_message_success(self, mock_producer_class, mock_consumer_class):
@@ -207,6 +224,29 @@ class TestKafkaService:
         service = KafkaService()
         assert service.is_consumer_healthy() is False
 
+    @patch("app.services.kafka_service.KafkaConsumer")
+    @patch("app.services.kafka_service.KafkaProducer")
+    def test_is_consumer_healthy_cached(self, mock_producer_class, mock_consumer_class):
+        """Test consumer health check reuses a recent broker metadata result."""
+        mock_consumer = Mock()
+        mock_consumer.topics.return_value = set()
+        mock_consumer_class.return_value = mock_consumer
+
+        mock_producer = Mock()
+        mock_producer_class.return_value = mock_producer
+
+        service = KafkaService()
+        assert service.is_consumer_healthy() is True
+        assert service.is_consumer_healthy() is True
+
+        # Only the initialization connection test hit the broker
+        mock_consumer.topics.assert_called_once()
+
+        # An expired cache entry triggers a fresh check
+        service._consumer_health = (0.0, True)
+        mock_consumer.topics.side_effect = Exception("Connection failed")
+        assert service.is_consumer_healthy() is False
+
     @patch("app.services.kafka_service.KafkaConsumer")
     @patch("app.services.kafka_service.KafkaProducer")
     def test_is_producer_healthy(self, mock_producer_class, mock_consumer_class):
@@ -264,6 +304,8 @@ class TestKafkaService:
         mock_producer_class.return_value = mock_producer
 
         service = KafkaService()
+        assert service.consumer is mock_consumer
+        assert service.producer is mock_producer
         service.close()
 
         mock_consumer.close.assert_called_once()
@@ -297,7 +339,13 @@ class TestKafkaService:
         service2 = kafka_service_module.get_kafka_service()
         assert service1 is service2
 
-        # Verify KafkaService was only initialized once
+        # Clients are not created until first used
+        mock_consumer_class.assert_not_called()
+        mock_producer_class.assert_not_called()
+        assert service1.consumer is mock_consumer
+        assert service2.producer is mock_producer
+
+        # Verify clients were only initialized once
         mock_consumer_class.assert_called_once()
         mock_producer_class.assert_called_once()
 
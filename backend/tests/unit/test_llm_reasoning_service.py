@@ -1,11 +1,24 @@
 """Unit tests for LLM reasoning service."""
 
+import asyncio
 import json
+import math
 import os
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from openai import RateLimitError
 
 from app.config import get_settings
-from app.services.llm_reasoning_service import LLMReasoningService
+from app.services.llm_reasoning_service import (
+    LLMReasoningService,
+    _normalize_log_message,
+    _RateLimiter,
+)
 
 
 class TestLLMReasoningService:
@@ -28,7 +41,9 @@ class TestLLMReasoningService:
         ):
             service = LLMReasoningService()
             assert service.client is not None
-            mock_openai.assert_called_once_with(api_key="test-key")
+            mock_openai.assert_called_once()
+            assert mock_openai.call_args.kwargs["api_key"] == "test-key"
+            assert isinstance(mock_openai.call_args.kwargs["http_client"], httpx.Client)
 
     @patch("app.services.llm_reasoning_service.OpenAI")
     def test_analyze_anomaly_success(self, mock_openai_class):
@@ -94,8 +109,9 @@ class TestLLMReasoningService:
             call_args = mock_client.chat.completions.create.call_args
             assert call_args is not None
 
+    @patch("app.services.llm_reasoning_service.AsyncOpenAI")
     @patch("app.services.llm_reasoning_service.OpenAI")
-    def test_analyze_anomalies_batch(self, mock_openai_class):
+    def test_analyze_anomalies_batch(self, mock_openai_class, mock_async_openai_class):
         """Test batch anomaly analysis."""
         mock_client = MagicMock()
         mock_response = MagicMock()
@@ -104,7 +120,9 @@ class TestLLMReasoningService:
         mock_message.content = "Batch analysis result"
         mock_choice.message = mock_message
         mock_response.choices = [mock_choice]
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_async_openai_class.return_value = mock_async_client
         mock_openai_class.return_value = mock_client
 
         get_settings.cache_clear()
@@ -119,6 +137,7 @@ class TestLLMReasoningService:
             assert len(results) == 2
             assert "1" in results
             assert "2" in results
+            assert mock_async_client.chat.completions.create.await_count == 2
 
     @patch("app.services.llm_reasoning_service.OpenAI")
     def test_analyze_anomaly_with_root_cause(self, mock_openai_class):
@@ -179,6 +198,11 @@ class TestLLMReasoningService:
             assert len(result["root_causes"]) > 0
             assert len(result["remediation_steps"]) > 0
             mock_client.chat.completions.create.assert_called_once()
+            response_format = mock_client.chat.completions.create.call_args.kwargs[
+                "response_format"
+            ]
+            assert response_format["type"] == "json_schema"
+            assert response_format["json_schema"]["strict"] is True
 
     @patch("app.services.llm_reasoning_service.OpenAI")
     def test_analyze_anomaly_with_root_cause_json_error_fallback(self, mock_openai_class):
@@ -205,3 +229,337 @@ class TestLLMReasoningService:
                 assert result is not None
                 assert result["explanation"] == "Fallback explanation"
                 assert result["severity"] == "MEDIUM"
+
+    @patch("app.services.llm_reasoning_service.AsyncOpenAI")
+    @patch("app.services.llm_reasoning_service.OpenAI")
+    def test_analyze_anomalies_batch_deduplicates(self, mock_openai_class, mock_async_openai_class):
+        """Test identical anomalies in a batch trigger a single LLM call."""
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_choice = MagicMock()
+        mock_message = MagicMock()
+        mock_message.content = "Duplicate analysis result"
+        mock_choice.message = mock_message
+        mock_response.choices = [mock_choice]
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_async_openai_class.return_value = mock_async_client
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = LLMReasoningService()
+            anomalies = [
+                {"log_id": "1", "log_message": "Disk full", "log_level": "ERROR"},
+                {"log_id": "2", "log_message": "Disk full", "log_level": "ERROR"},
+            ]
+            results = service.analyze_anomalies_batch(anomalies)
+
+            assert results == {
+                "1": "Duplicate analysis result",
+                "2": "Duplicate analysis result",
+            }
+            mock_async_client.chat.completions.create.assert_awaited_once()
+
+            # A repeated single analysis is served from the cache
+            service.analyze_anomaly("Disk full", log_level="ERROR")
+            mock_client.chat.completions.create.assert_not_called()
+
+    @staticmethod
+    def _mock_classification(top_logprobs, content="A"):
+        """Build a mock 1-token classification response with top logprobs."""
+        response = MagicMock()
+        choice = MagicMock()
+        choice.message.content = content
+        candidates = []
+        for token, logprob in top_logprobs:
+            candidate = MagicMock()
+            candidate.token = token
+            candidate.logprob = logprob
+            candidates.append(candidate)
+        choice.logprobs.content = [MagicMock(top_logprobs=candidates)]
+        response.choices = [choice]
+        return response
+
+    @patch("app.services.llm_reasoning_service.OpenAI")
+    def test_detect_anomaly_logprobs_anomalous(self, mock_openai_class):
+        """Test detect_anomaly derives confidence from logprobs and explains anomalies."""
+        mock_client = MagicMock()
+        explanation = MagicMock()
+        explanation.choices = [MagicMock()]
+        explanation.choices[0].message.content = "Disk exhaustion is unusual."
+        mock_client.chat.completions.create.side_effect = [
+            self._mock_classification([("A", math.log(0.9)), ("N", math.log(0.1))]),
+            explanation,
+        ]
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = LLMReasoningService()
+            result = service.detect_anomaly("Error: disk full", log_level="ERROR")
+
+            assert result["is_anomaly"] is True
+            assert result["confidence"] == pytest.approx(0.9)
+            assert result["reasoning"] == "Disk exhaustion is unusual."
+            first_call = mock_client.chat.completions.create.call_args_list[0].kwargs
+            assert first_call["max_tokens"] == 1
+            assert first_call["logprobs"] is True
+
+    @patch("app.services.llm_reasoning_service.OpenAI")
+    def test_detect_anomaly_logprobs_normal_skips_explanation(self, mock_openai_class):
+        """Test normal classifications do not trigger a second LLM call."""
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = self._mock_classification(
+            [("N", math.log(0.8)), ("A", math.log(0.2))], content="N"
+        )
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = LLMReasoningService()
+            result = service.detect_anomaly("Request served")
+
+            assert result["is_anomaly"] is False
+            assert result["confidence"] == pytest.approx(0.8)
+            mock_client.chat.completions.create.assert_called_once()
+
+    @patch("app.services.llm_reasoning_service.OpenAI")
+    def test_prompts_share_static_system_prefix(self, mock_openai_class):
+        """Test per-log values stay out of the system message so the prefix is cacheable."""
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "analysis"
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = LLMReasoningService()
+            service.analyze_anomaly("Disk full on /var", log_level="ERROR")
+            service.analyze_anomaly("Connection reset by peer", log_level="WARN")
+
+            calls = mock_client.chat.completions.create.call_args_list
+            first, second = (call.kwargs["messages"] for call in calls)
+            assert first[0] == second[0]
+            assert first[0]["role"] == "system"
+            assert "Disk full" not in first[0]["content"]
+            assert "Disk full" in first[1]["content"]
+
+    @patch("app.services.llm_reasoning_service.OpenAI")
+    def test_detect_anomaly_cached_across_volatile_tokens(self, mock_openai_class):
+        """Test recurring logs that differ only in IDs and timestamps reuse one detection."""
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = self._mock_classification(
+            [("N", math.log(0.9)), ("A", math.log(0.1))], content="N"
+        )
+        mock_openai_class.return_value = mock_client
+
+        get_settings.cache_clear()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            service = LLMReasoningService()
+            first = service.detect_anomaly(
+                "2024-01-01T10:00:00Z request 5f0c1a2b-1111-2222-3333-444455556666 took 120ms"
+            )
+            second = service.detect_anomaly(
+                "2024-01-02T11:30:05Z request 9a8b7c6d-aaaa-bbbb-cccc-ddddeeeeffff took 120ms"
+            )
+
+            assert first == second
+            mock_client.chat.completions.create.assert_called_once()
+
+
+def test_normalize_log_message():
+    """Test volatile tokens are replaced with stable placeholders."""
+    normalized = _normalize_log_message(
+        "2024-01-01 10:00:00 conn from 10.0.0.1:5432 id=0xdeadbeef req 4815162342 retry 3"
+    )
+    assert normalized == "<TS> conn from <IP> id=<HEX> req <ID> retry 3"
+
+
+def test_analysis_cache_key_keeps_short_numbers():
+    """Test status codes and percentages stay part of the cache key."""
+    service = LLMReasoningService()
+
+    assert service._analysis_cache_key(
+        "HTTP status 200", None, None, None
+    ) != service._analysis_cache_key("HTTP status 503", None, None, None)
+    assert service._analysis_cache_key(
+        "disk usage 10%", None, None, None
+    ) != service._analysis_cache_key("disk usage 99%", None, None, None)
+
+
+@patch("app.services.llm_reasoning_service.time.sleep")
+@patch("app.services.llm_reasoning_service.OpenAI")
+def test_analyze_anomaly_retries_rate_limit(mock_openai_class, mock_sleep):
+    """Test a 429 is retried after at least the Retry-After delay instead of dropped."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    rate_limit_error = RateLimitError(
+        "rate limited",
+        response=httpx.Response(429, headers={"retry-after": "2"}, request=request),
+        body=None,
+    )
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "analysis"
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = [rate_limit_error, mock_response]
+    mock_openai_class.return_value = mock_client
+
+    get_settings.cache_clear()
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        service = LLMReasoningService()
+        assert service.analyze_anomaly("Database timeout") == "analysis"
+
+    assert mock_client.chat.completions.create.call_count == 2
+    assert mock_sleep.call_args.args[0] >= 2.0
+
+
+@patch("app.services.llm_reasoning_service.time.sleep")
+def test_rate_limiter_waits_when_window_full(mock_sleep):
+    """Test the throttle blocks once the per-window request budget is spent."""
+    limiter = _RateLimiter(max_requests=2, window_seconds=60.0)
+    limiter.acquire()
+    limiter.acquire()
+    mock_sleep.side_effect = lambda _: limiter._timestamps.clear()
+
+    limiter.acquire()
+
+    mock_sleep.assert_called_once()
+    assert 0 < mock_sleep.call_args.args[0] <= 60.0
+
+
+@patch("app.services.llm_reasoning_service.OpenAI")
+def test_detect_anomaly_coalesces_concurrent_calls(mock_openai_class):
+    """Test concurrent detections are classified with a single batched request."""
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = json.dumps(
+        {
+            "results": [
+                {"id": 1, "is_anomaly": True, "confidence": 0.9},
+                {"id": 2, "is_anomaly": False, "confidence": 0.8},
+            ]
+        }
+    )
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = mock_response
+    mock_openai_class.return_value = mock_client
+
+    get_settings.cache_clear()
+    env = {
+        "OPENAI_API_KEY": "test-key",
+        "LLM_DETECTION_BATCH_SIZE": "2",
+        "LLM_DETECTION_BATCH_WAIT_MS": "5000",
+    }
+    with patch.dict(os.environ, env):
+        service = LLMReasoningService()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(service.detect_anomaly, message, include_reasoning=False)
+                for message in ("Kernel panic", "User logged in")
+            ]
+            results = [future.result(timeout=5) for future in futures]
+
+    mock_client.chat.completions.create.assert_called_once()
+    assert sorted(r["is_anomaly"] for r in results) == [False, True]
+    get_settings.cache_clear()
+
+
+@patch("app.services.llm_reasoning_service.OpenAI")
+def test_analyze_anomaly_joins_in_flight_request(mock_openai_class):
+    """Test identical concurrent analyses share a single OpenAI request."""
+    called = threading.Event()
+    release = threading.Event()
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "analysis"
+
+    def slow_create(**_kwargs):
+        called.set()
+        release.wait(timeout=5)
+        return mock_response
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = slow_create
+    mock_openai_class.return_value = mock_client
+
+    get_settings.cache_clear()
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        service = LLMReasoningService()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(service.analyze_anomaly, "Disk full on /var")
+            assert called.wait(timeout=5)
+            follower = pool.submit(service.analyze_anomaly, "Disk full on /var")
+            time.sleep(0.1)
+            release.set()
+
+            assert leader.result(timeout=5) == "analysis"
+            assert follower.result(timeout=5) == "analysis"
+
+    mock_client.chat.completions.create.assert_called_once()
+
+
+@patch("app.services.llm_reasoning_service.AsyncOpenAI")
+@patch("app.services.llm_reasoning_service.OpenAI")
+async def test_analyze_anomaly_async_joins_in_flight_request(_mock_openai, mock_async_openai):
+    """Test identical concurrent async analyses share a single OpenAI request."""
+    release = asyncio.Event()
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "analysis"
+
+    async def slow_create(**_kwargs):
+        await release.wait()
+        return mock_response
+
+    mock_async_client = MagicMock()
+    mock_async_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    mock_async_openai.return_value = mock_async_client
+
+    get_settings.cache_clear()
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        service = LLMReasoningService()
+        tasks = [
+            asyncio.create_task(service._analyze_anomaly_async("Disk full on /var"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+    assert results == ["analysis"] * 3
+    mock_async_client.chat.completions.create.assert_called_once()
+    assert service._inflight_async == {}
+
+
+@patch("app.services.llm_reasoning_service.AsyncOpenAI")
+@patch("app.services.llm_reasoning_service.OpenAI")
+async def test_stream_anomaly_analysis_yields_and_caches(_mock_openai, mock_async_openai):
+    """Test streamed chunks are yielded in order and the joined text is cached."""
+
+    def event(content):
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = content
+        return chunk
+
+    async def fake_stream():
+        for content in ("Disk ", None, "full"):
+            yield event(content)
+
+    mock_async_client = MagicMock()
+    mock_async_client.chat.completions.create = AsyncMock(return_value=fake_stream())
+    mock_async_openai.return_value = mock_async_client
+
+    get_settings.cache_clear()
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        service = LLMReasoningService()
+        chunks = [chunk async for chunk in service.stream_anomaly_analysis("Disk full")]
+        cached = [chunk async for chunk in service.stream_anomaly_analysis("Disk full")]
+
+    assert chunks == ["Disk ", "full"]
+    assert cached == ["Disk full"]
+    assert mock_async_client.chat.completions.create.call_args.kwargs["stream"] is True
+    mock_async_client.chat.completions.create.assert_called_once()
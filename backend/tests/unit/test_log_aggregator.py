@@ -0,0 +1,122 @@
+"""Unit tests for log aggregator."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services.log_aggregator import LogAggregator
+
+
+class TestLogAggregator:
+    """Unit tests for multiline log aggregation."""
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "INFO: server started",
+            "2024-01-01T10:00:00 request handled",
+            "2024-01-01 10:00:00,123 request handled",
+            "[2024-01-01 10:00:00] request handled",
+            "[ERROR] request failed",
+        ],
+    )
+    def test_is_new_entry(self, line):
+        """Test lines that begin a new log entry are recognized."""
+        assert LogAggregator()._is_new_entry(line)
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            '  File "app.py", line 10, in main',
+            'File "app.py", line 10',
+            "ValueError: bad input",
+            "requests.exceptions.ConnectionException: refused",
+            "During handling of the above exception, another exception occurred:",
+            "    ^^^^^^",
+            "  | sub-exception",
+        ],
+    )
+    def test_is_continuation(self, line):
+        """Test stack trace lines are recognized as continuations."""
+        assert LogAggregator()._is_continuation(line)
+
+    def test_plain_line_is_neither_new_nor_continuation(self):
+        """Test an unstructured line matches no pattern family."""
+        aggregator = LogAggregator()
+        assert not aggregator._is_new_entry("request handled")
+        assert not aggregator._is_continuation("request handled")
+
+    def test_has_error_indicators(self):
+        """Test error indicators match at line starts in multiline text only."""
+        aggregator = LogAggregator()
+        assert aggregator._has_error_indicators("INFO: ok\nERROR: failed")
+        assert aggregator._has_error_indicators("    raise KeyError('x')")
+        assert not aggregator._has_error_indicators("INFO: no ERROR: here")
+
+    def test_aggregates_traceback(self):
+        """Test a traceback is buffered and flushed as a single error entry."""
+        aggregator = LogAggregator()
+        source = {"container_name": "api", "container_id": "abc"}
+        lines = [
+            "Traceback (most recent call last):",
+            '  File "app.py", line 10, in main',
+            "ValueError: bad input",
+        ]
+        for line in lines:
+            assert aggregator.process({**source, "log": line}) == []
+
+        results = aggregator.process({**source, "log": "INFO: next request"})
+
+        assert len(results) == 2
+        assert results[0]["message"] == "\n".join(lines)
+        assert "log" not in results[0]
+        assert results[0]["level"] == "ERROR"
+        assert results[0]["_line_count"] == 3
+        assert results[1]["log"] == "INFO: next request"
+
+    def test_flush_all_covers_every_stripe(self):
+        """Test buffers from different containers are kept apart and all flushed."""
+        aggregator = LogAggregator()
+        for name in ("api", "worker", "scheduler"):
+            aggregator.process({"container_name": name, "log": "ERROR: failed"})
+            aggregator.process({"container_name": name, "log": f"  detail for {name}"})
+
+        results = aggregator.flush_all()
+
+        assert sorted(r["container_name"] for r in results) == ["api", "scheduler", "worker"]
+        assert all(r["_line_count"] == 2 for r in results)
+        assert aggregator.flush_all() == []
+
+    def test_passthrough_lines_do_not_allocate_buffers(self):
+        """Test single-line logs are returned directly without creating a buffer."""
+        aggregator = LogAggregator()
+        raw = {"container_name": "api", "log": "INFO: request handled"}
+
+        assert aggregator.process(raw) == [raw]
+        assert not any(aggregator._buffers)
+
+    def test_error_detected_in_continuation_line(self):
+        """Test an error appearing mid-buffer marks the flushed entry as ERROR."""
+        aggregator = LogAggregator()
+        aggregator.process({"container_name": "api", "log": "WARNING: retrying"})
+        aggregator.process({"container_name": "api", "log": "  raise TimeoutError('db')"})
+
+        results = aggregator.flush_all()
+
+        assert results[0]["level"] == "ERROR"
+        assert results[0]["_detected_error"] is True
+
+    def test_flush_expired_uses_monotonic_clock(self):
+        """Test buffers expire by monotonic time, independent of wall-clock jumps."""
+        aggregator = LogAggregator(flush_timeout=2.0)
+        with patch("app.services.log_aggregator.time") as mock_time:
+            mock_time.monotonic_ns.return_value = 0
+            aggregator.process({"container_name": "api", "log": "ERROR: failed"})
+
+            mock_time.monotonic_ns.return_value = 1_000_000_000
+            assert aggregator.flush_expired() == []
+
+            mock_time.monotonic_ns.return_value = 3_000_000_000
+            assert len(aggregator.flush_expired()) == 1
+
+        mock_time.time.assert_not_called()
@@ -0,0 +1,32 @@
+"""Unit tests for log models."""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.log import RawLogEntry
+
+
+class TestRawLogEntry:
+    """Unit tests for raw log timestamp parsing."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            ("2024-01-15T10:30:45.123", datetime(2024, 1, 15, 10, 30, 45, 123000)),
+            ("2024-01-15T10:30:45", datetime(2024, 1, 15, 10, 30, 45)),
+            ("2024-01-15 10:30:45", datetime(2024, 1, 15, 10, 30, 45)),
+            ("Jan 15 10:30:45", datetime(1900, 1, 15, 10, 30, 45)),
+        ],
+    )
+    def test_parse_timestamp_formats(self, value, expected):
+        """Test supported timestamp formats parse to naive datetimes."""
+        assert RawLogEntry(timestamp=value, message="m", raw_log="m").timestamp == expected
+
+    @pytest.mark.parametrize(
+        "value",
+        ["2024-01-15T10:30:45Z", "2024-01-15", "2024-13-15T10:30:45", "not a timestamp"],
+    )
+    def test_parse_timestamp_rejects_unsupported_values(self, value):
+        """Test values outside the supported formats are dropped, not guessed."""
+        assert RawLogEntry(timestamp=value, message="m", raw_log="m").timestamp is None
@@ -0,0 +1,235 @@
+"""Unit tests for metadata extractor."""
+
+import re
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.models.log import RawLogEntry
+from app.services.metadata_extractor import MetadataExtractor, _trie_regex
+
+
+class TestMetadataExtractor:
+    """Unit tests for log metadata extraction."""
+
+    @pytest.mark.parametrize(
+        ("message", "expected"),
+        [
+            ("ERROR:app.db:connection lost", "ERROR"),
+            ("critical: disk failure", "ERROR"),
+            ("WARNING: slow query", "WARN"),
+            ("INFO: 127.0.0.1:8000 - GET /health", "INFO"),
+            ("trace: entering handler", "DEBUG"),
+            ("[FATAL] out of memory", "ERROR"),
+            ("[Information] cache warmed", "INFO"),
+            ("WARN - retrying request", "WARN"),
+            ("2024-01-01 12:00:00 - ERROR worker crashed", "ERROR"),
+            ("2024-01-01t12:00:00 [debug] polling", "DEBUG"),
+        ],
+    )
+    def test_extract_level_from_message_start(self, message, expected):
+        """Test the log level is detected from common message prefixes."""
+        assert MetadataExtractor().extract_level(message, {}) == expected
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "User reported an ERROR in the UI",
+            "TRACE - request id",
+            "2024-01-01 12:00:00 INFORMATION only",
+        ],
+    )
+    def test_extract_level_ignores_non_prefix_mentions(self, message):
+        """Test level words that are not a recognized prefix default to INFO."""
+        assert MetadataExtractor().extract_level(message, {}) == "INFO"
+
+    def test_extract_level_skips_regex_for_unmatchable_first_char(self):
+        """Test messages that cannot start with a level prefix bypass the regex."""
+        extractor = MetadataExtractor()
+        with patch.object(MetadataExtractor, "LEVEL_START_PATTERN") as mock_pattern:
+            assert extractor.extract_level('{"msg": "ERROR: not a prefix"}', {}) == "INFO"
+            mock_pattern.match.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "Traceback (most recent call last):",
+            '  File "app.py", line 10, in main',
+            "requests.exceptions.ConnectionException: refused",
+            "During handling of the above exception, another exception occurred:",
+            "    raise KeyError('missing')",
+        ],
+    )
+    def test_extract_level_stack_trace(self, message):
+        """Test any stack trace indicator classifies the message as ERROR."""
+        assert MetadataExtractor().extract_level(f"INFO: handled\n{message}", {}) == "ERROR"
+
+    def test_is_stack_trace_skips_regex_without_markers(self):
+        """Test messages without any stack trace marker bypass the regex."""
+        extractor = MetadataExtractor()
+        with patch.object(MetadataExtractor, "STACK_TRACE_PATTERN") as mock_pattern:
+            assert not extractor._is_stack_trace("GET /health 200")
+            mock_pattern.search.assert_not_called()
+
+    @pytest.mark.parametrize(
+        ("level", "metadata", "expected"),
+        [
+            ("ERROR", {}, "ERROR"),
+            ("warning", {}, "WARN"),
+            ("verbose", {"level": "Fatal"}, "FATAL"),
+            (None, {"level": "WARNING"}, "WARN"),
+            (None, {"level": "notice"}, "INFO"),
+        ],
+    )
+    def test_extract_level_explicit(self, level, metadata, expected):
+        """Test explicit and metadata levels are normalized before message parsing."""
+        assert MetadataExtractor().extract_level("plain text", metadata, level) == expected
+
+    @pytest.mark.parametrize(
+        ("status", "expected"),
+        [("101", "DEBUG"), ("200", "INFO"), ("304", "INFO"), ("404", "WARN"), ("503", "ERROR")],
+    )
+    def test_extract_level_from_http_status(self, status, expected):
+        """Test HTTP status codes in access logs map to levels by class."""
+        message = f'10.0.0.1 - "GET /api HTTP/1.1" {status} 512'
+        assert MetadataExtractor().extract_level(message, {}) == expected
+
+    def test_extract_level_empty_message(self):
+        """Test an empty message defaults to INFO while metadata still wins."""
+        extractor = MetadataExtractor()
+        assert extractor.extract_level("", {}) == "INFO"
+        assert extractor.extract_level("", {"level": "warning"}) == "WARN"
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "2024-03-05T10:20:30 request handled",
+            "[2024-03-05 10:20:30] request handled",
+        ],
+    )
+    def test_extract_timestamp_from_message(self, message):
+        """Test ISO-like timestamps are parsed with either separator."""
+        raw_log = RawLogEntry(message=message, raw_log=message)
+        assert MetadataExtractor().extract_timestamp(raw_log) == datetime(2024, 3, 5, 10, 20, 30)
+
+    def test_extract_timestamp_defaults_to_naive_utc_now(self):
+        """Test logs without a timestamp get the current UTC time."""
+        raw_log = RawLogEntry(message="no timestamp here", raw_log="no timestamp here")
+        timestamp = MetadataExtractor().extract_timestamp(raw_log)
+        assert timestamp.tzinfo is None
+        assert abs(timestamp - datetime.now(UTC).replace(tzinfo=None)) < timedelta(seconds=5)
+
+    def test_extract_timestamp_uses_supplied_now(self):
+        """Test a caller-supplied fallback time is used instead of the clock."""
+        raw_log = RawLogEntry(message="no timestamp here", raw_log="no timestamp here")
+        now = datetime(2024, 6, 1, 12, 0, 0)
+        assert MetadataExtractor().extract_timestamp(raw_log, now=now) == now
+
+    @pytest.mark.parametrize(
+        ("message", "log_type", "expected"),
+        [
+            ("request done service=checkout latency=3ms", None, "checkout"),
+            ("App: billing-worker started", None, "billing-worker"),
+            ("component=scheduler tick", "json", "scheduler"),
+            ("app=frontend forwarded to service=payments", None, "payments"),
+            ("component=db-pool checked by app=frontend", None, "frontend"),
+            ("Database connection refused", None, "postgres"),
+            ("Kafka broker unavailable", None, "kafka"),
+            ("Kafka broker unavailable", "syslog", "syslog"),
+            ("kafka lag while NGINX proxies", None, "nginx"),
+            ("Kafka consumer wrote to database", None, "postgres"),
+            ("nothing to see", None, "unknown"),
+        ],
+    )
+    def test_extract_service(self, message, log_type, expected):
+        """Test service names come from key/value pairs, log type, then keywords."""
+        assert MetadataExtractor().extract_service(message, {}, log_type) == expected
+
+
+def test_trie_regex_factors_shared_prefixes():
+    """Test the trie builder merges prefixes and matches exactly the given words."""
+    words = ("WARN", "WARNING", "INFO", "ERROR")
+    pattern = _trie_regex(words)
+
+    assert pattern == "(?:WARN(?:ING)?|INFO|ERROR)"
+    assert all(re.fullmatch(pattern, word) for word in words)
+    assert not re.fullmatch(pattern, "WARNI")
+
+
+class TestMessageScan:
+    """Unit tests for the fused message field scan."""
+
+    def test_scan_message_finds_first_of_each_field(self):
+        """Test one scan returns the first timestamp and HTTP status and the top service marker."""
+        message = (
+            'app:web 2024-03-05 10:20:30 "GET / HTTP/1.1" 503 '
+            'service=api 2024-03-06T00:00:00 "GET /x HTTP/1.1" 200'
+        )
+
+        assert MetadataExtractor()._scan_message(message) == {
+            "service": "api",
+            "timestamp": "2024-03-05 10:20:30",
+            "http_status": "503",
+        }
+
+    @pytest.mark.parametrize(
+        ("message", "expected"),
+        [
+            ("app=frontend forwarded to service=payments", "payments"),
+            ("component=db-pool checked by app=frontend", "frontend"),
+            ("app=service=payments", "payments"),
+        ],
+    )
+    def test_scan_message_service_marker_priority(self, message, expected):
+        """Test the scan and the direct search agree on service marker priority."""
+        extractor = MetadataExtractor()
+
+        assert extractor._scan_message(message)["service"] == expected
+        assert extractor.extract_service(message, {}) == expected
+
+    def test_extract_metadata_scans_message_once(self):
+        """Test extract_metadata reuses one scan for timestamp, level and service."""
+        message = '10.0.0.1 - "GET /api HTTP/1.1" 502 service=gateway at 2024-03-05T10:20:30'
+        raw_log = RawLogEntry(message=message, raw_log=message)
+        extractor = MetadataExtractor()
+
+        with patch.object(
+            MetadataExtractor, "_scan_message", wraps=extractor._scan_message
+        ) as mock_scan:
+            extracted = extractor.extract_metadata(raw_log)
+
+        mock_scan.assert_called_once_with(message)
+        assert extracted["timestamp"] == datetime(2024, 3, 5, 10, 20, 30)
+        assert extracted["level"] == "ERROR"
+        assert extracted["service"] == "gateway"
+
+    def test_extract_metadata_does_not_mutate_raw_metadata(self):
+        """Test extracted fields are merged into a copy of the raw metadata."""
+        raw_log = RawLogEntry(message="ok", raw_log="{}", metadata={"request_id": "r1"})
+
+        extracted = MetadataExtractor().extract_metadata(raw_log)
+
+        assert raw_log.metadata == {"request_id": "r1"}
+        assert extracted["metadata"] == {
+            "request_id": "r1",
+            "extracted_level": "INFO",
+            "extracted_service": "unknown",
+            "log_type": "unknown",
+        }
+
+    def test_extract_metadata_skips_scan_when_fields_are_explicit(self):
+        """Test no message scan happens when the raw log supplies every field."""
+        raw_log = RawLogEntry(
+            message="service=ignored 2024-03-05T10:20:30",
+            raw_log="{}",
+            timestamp=datetime(2024, 1, 1),
+            level="WARN",
+            service="api",
+        )
+
+        with patch.object(MetadataExtractor, "_scan_message") as mock_scan:
+            extracted = MetadataExtractor().extract_metadata(raw_log)
+
+        mock_scan.assert_not_called()
+        assert (extracted["level"], extracted["service"]) == ("WARN", "api")
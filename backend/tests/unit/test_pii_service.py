@@ -1,11 +1,29 @@
 """Unit tests for PII service."""
 
-from app.services.pii_service import pii_service
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.pii_service import (
+    REDACTION_CACHE_MAX_TEXT_LENGTH,
+    PIIService,
+    _create_analyzer,
+    pii_service,
+)
 
 
 class TestPIIService:
     """Unit tests for PII service functionality."""
 
+    @pytest.fixture(autouse=True)
+    def clear_redaction_cache(self):
+        """Keep cached redactions from leaking between tests."""
+        pii_service._redaction_cache.clear()
+        yield
+        pii_service._redaction_cache.clear()
+
     def test_analyzer_lazy_initialization(self):
         """Test that analyzer is lazily initialized."""
         # First access should create the analyzer
@@ -61,3 +79,232 @@ class TestPIIService:
         assert "CREDIT_CARD" in operator_config
         assert "IP_ADDRESS" in operator_config
         assert "DEFAULT" in operator_config
+
+    def test_operator_config_is_reused(self):
+        """Test that the operator configuration is built once and shared."""
+        assert pii_service._get_operator_config() is pii_service._get_operator_config()
+
+    def test_is_kernel_log(self):
+        """Test kernel log detection with and without the literal prefilter."""
+        assert pii_service._is_kernel_log("kernel: [12345.678] eth0: link up")
+        assert pii_service._is_kernel_log("audit: PID=4242 exited")
+        assert not pii_service._is_kernel_log("kernel module loaded")
+        assert not pii_service._is_kernel_log("request_id=abc [done]")
+
+    def test_redact_pii_skips_analyzer_without_pii_candidates(self):
+        """Test that text without "@" or digit runs never reaches Presidio."""
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            redacted, entities = pii_service.redact_pii("ERROR: Connection refused by upstream")
+
+        mock_analyzer.assert_not_called()
+        assert redacted == "ERROR: Connection refused by upstream"
+        assert entities == {}
+
+    def test_redact_pii_runs_analyzer_on_pii_candidates(self):
+        """Test that text with an email-like token is still analyzed."""
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = []
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            mock_analyzer.return_value = analyzer
+            pii_service.redact_pii("login failed for user@example.com")
+
+        analyzer.analyze.assert_called_once_with(
+            text="login failed for user@example.com", language="en"
+        )
+
+    def test_redact_pii_analyzes_wallet_addresses_without_digit_runs(self):
+        """Test a crypto address with no three-digit run still reaches Presidio."""
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = []
+        text = "paid to 1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2"
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            mock_analyzer.return_value = analyzer
+            pii_service.redact_pii(text)
+
+        analyzer.analyze.assert_called_once_with(text=text, language="en")
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "callback to +33 1 23 45 67 89 failed",
+            "customer phone +44 20 79 46 09 58",
+            "contact (55) 12 34 56 78 after hours",
+        ],
+    )
+    def test_redact_pii_analyzes_phone_numbers_in_short_groups(self, text):
+        """Test phone numbers written in one- and two-digit groups reach Presidio."""
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = []
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            mock_analyzer.return_value = analyzer
+            pii_service.redact_pii(text)
+
+        analyzer.analyze.assert_called_once_with(text=text, language="en")
+
+    def test_redact_pii_batch_analyzes_only_candidates(self):
+        """Test batch redaction sends only PII candidates through one batched pass."""
+        email = MagicMock(entity_type="EMAIL_ADDRESS", start=8, end=24, score=0.9)
+        batch_analyzer = MagicMock()
+        batch_analyzer.analyze_iterator.return_value = [[email]]
+        texts = ["GET /health ok", "mail to user@example.com"]
+        with patch.object(
+            PIIService, "batch_analyzer", new_callable=PropertyMock
+        ) as mock_batch_analyzer:
+            mock_batch_analyzer.return_value = batch_analyzer
+            results = pii_service.redact_pii_batch(texts)
+
+        batch_analyzer.analyze_iterator.assert_called_once()
+        assert batch_analyzer.analyze_iterator.call_args[0][0] == ["mail to user@example.com"]
+        assert results[0] == ("GET /health ok", {})
+        assert results[1] == ("mail to [EMAIL]", {"EMAIL_ADDRESS": 1})
+
+    def test_redact_pii_batch_handles_errors_gracefully(self):
+        """Test batch redaction keeps regex-redacted text when Presidio fails."""
+        batch_analyzer = MagicMock()
+        batch_analyzer.analyze_iterator.side_effect = RuntimeError("spaCy model missing")
+        with patch.object(
+            PIIService, "batch_analyzer", new_callable=PropertyMock
+        ) as mock_batch_analyzer:
+            mock_batch_analyzer.return_value = batch_analyzer
+            results = pii_service.redact_pii_batch(["host 10.0.0.1 user@example.com"])
+
+        assert results == [("host [IP] user@example.com", {"IP_ADDRESS": 1})]
+
+    def test_redact_pii_batch_splits_large_batches_across_workers(self):
+        """Test large batches are redacted in pii_batch_size chunks by the worker pool."""
+        batch_analyzer = MagicMock()
+        batch_analyzer.analyze_iterator.side_effect = lambda texts, **_: [[] for _ in texts]
+        texts = [f"user{i}@example.com" for i in range(5)]
+        with (
+            patch("app.services.pii_service.settings") as mock_settings,
+            patch.object(PIIService, "batch_analyzer", new_callable=PropertyMock) as mock_ba,
+            patch.object(PIIService, "worker_pool", new_callable=PropertyMock) as mock_pool,
+            ThreadPoolExecutor(max_workers=2) as pool,
+        ):
+            mock_settings.pii_workers = 2
+            mock_settings.pii_batch_size = 2
+            mock_ba.return_value = batch_analyzer
+            mock_pool.return_value = pool
+            results = pii_service.redact_pii_batch(texts)
+
+        chunks = [c[0][0] for c in batch_analyzer.analyze_iterator.call_args_list]
+        assert sorted(chunks) == [texts[0:2], texts[2:4], texts[4:]]
+        assert results == [(text, {}) for text in texts]
+
+    def test_redact_patterns_single_pass(self):
+        """Test IPs, UUIDs and cloud hosts are replaced and counted in one pass."""
+        redacted, summary = pii_service._redact_patterns(
+            "upstream 10.0.0.5:8080 failed, retrying 192.168.1.20 then 10.0.0.6:123456 "
+            "for 3F2504E0-4F89-11D3-9A0C-0305E82C3301 at db.eu.qdrant.io:6333 or Idx.PINECONE.IO"
+        )
+
+        assert redacted == (
+            "upstream [IP]:[PORT] failed, retrying [IP] then [IP]:123456 "
+            "for [UUID] at [CLOUD_HOST] or [CLOUD_HOST]"
+        )
+        assert summary == {"IP_ADDRESS": 3, "UUID": 1, "CLOUD_HOST": 2}
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("1.2.3.4", ("[IP]", {"IP_ADDRESS": 1})),
+            ("OK", ("OK", {})),
+            ("no separators here", ("no separators here", {})),
+            ("v1.2 build-42", ("v1.2 build-42", {})),
+            (
+                "id 3f2504e0-4f89-11d3-9a0c-0305e82c3301",
+                ("id [UUID]", {"UUID": 1}),
+            ),
+            ("via X.Milvus.IO", ("via [CLOUD_HOST]", {"CLOUD_HOST": 1})),
+        ],
+    )
+    def test_redact_patterns_selects_applicable_kinds(self, text, expected):
+        """Test redaction is unchanged when only some kinds can occur in the text."""
+        assert pii_service._redact_patterns(text) == expected
+
+    def test_redact_pii_counts_each_entity(self):
+        """Test the entity summary counts every redacted occurrence per type."""
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = [
+            MagicMock(entity_type="EMAIL_ADDRESS", start=0, end=5, score=0.9),
+            MagicMock(entity_type="EMAIL_ADDRESS", start=10, end=15, score=0.9),
+        ]
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            mock_analyzer.return_value = analyzer
+            redacted, entities = pii_service.redact_pii("a@b.c and d@e.f at 10.0.0.1")
+
+        assert redacted == "[EMAIL] and [EMAIL] at [IP]"
+        assert entities == {"IP_ADDRESS": 1, "EMAIL_ADDRESS": 2}
+
+    def test_analyzer_created_once_under_concurrency(self):
+        """Test that concurrent first access builds a single AnalyzerEngine."""
+
+        def slow_engine():
+            time.sleep(0.05)
+            return MagicMock()
+
+        with (
+            patch.object(PIIService, "_analyzer", None),
+            patch(
+                "app.services.pii_service._create_analyzer", side_effect=slow_engine
+            ) as mock_engine,
+            ThreadPoolExecutor(max_workers=4) as executor,
+        ):
+            engines = list(executor.map(lambda _: pii_service.analyzer, range(4)))
+
+        mock_engine.assert_called_once()
+        assert all(engine is engines[0] for engine in engines)
+
+    def test_default_analyzer_uses_tokenizer_only_pipeline(self):
+        """Test the default analyzer detects pattern PII without spaCy NER."""
+        analyzer = _create_analyzer()
+
+        recognizers = {recognizer.name for recognizer in analyzer.registry.recognizers}
+        assert "SpacyRecognizer" not in recognizers
+        assert {"DateRecognizer", "UrlRecognizer", "IpRecognizer"}.isdisjoint(recognizers)
+        assert {"EmailRecognizer", "CreditCardRecognizer", "UsSsnRecognizer"} <= recognizers
+        assert analyzer.nlp_engine.nlp["en"].pipe_names == ["lowercase_lemmas"]
+
+        results = analyzer.analyze(text="Phone: (555) 123-4567", language="en")
+        assert [(r.entity_type, r.score >= 0.7) for r in results] == [("PHONE_NUMBER", True)]
+
+    def test_redact_pii_caches_presidio_result_per_template(self):
+        """Test texts that differ only in regex-redacted parts reuse one analysis."""
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = [
+            MagicMock(entity_type="EMAIL_ADDRESS", start=11, end=16, score=0.9)
+        ]
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            mock_analyzer.return_value = analyzer
+            first = pii_service.redact_pii("[IP] login a@b.c failed")
+            second = pii_service.redact_pii("10.0.0.9 login a@b.c failed")
+
+        analyzer.analyze.assert_called_once()
+        assert first == ("[IP] login [EMAIL] failed", {"EMAIL_ADDRESS": 1})
+        assert second == ("[IP] login [EMAIL] failed", {"IP_ADDRESS": 1, "EMAIL_ADDRESS": 1})
+
+    def test_redact_pii_does_not_cache_long_texts(self):
+        """Test texts above the cache length limit are analyzed every time."""
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = []
+        text = "user@example.com " + "x" * REDACTION_CACHE_MAX_TEXT_LENGTH
+        with patch.object(PIIService, "analyzer", new_callable=PropertyMock) as mock_analyzer:
+            mock_analyzer.return_value = analyzer
+            pii_service.redact_pii(text)
+            pii_service.redact_pii(text)
+
+        assert analyzer.analyze.call_count == 2
+        assert not pii_service._redaction_cache
+
+    def test_redact_pii_batch_analyzes_repeated_texts_once(self):
+        """Test duplicate texts in a batch are sent to Presidio only once."""
+        batch_analyzer = MagicMock()
+        batch_analyzer.analyze_iterator.return_value = [[]]
+        with patch.object(
+            PIIService, "batch_analyzer", new_callable=PropertyMock
+        ) as mock_batch_analyzer:
+            mock_batch_analyzer.return_value = batch_analyzer
+            results = pii_service.redact_pii_batch(["order 12345 shipped"] * 3)
+
+        assert batch_analyzer.analyze_iterator.call_args[0][0] == ["order 12345 shipped"]
+        assert results == [("order 12345 shipped", {})] * 3
@@ -1,9 +1,12 @@
 """Unit tests for Qdrant service."""
 
+import threading
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
-from app.services.qdrant_service import QdrantService
+import numpy as np
+
+from app.services.qdrant_service import DEFAULT_INDEXING_THRESHOLD, QdrantService
 
 
 class TestQdrantService:
@@ -36,6 +39,7 @@ class TestQdrantService:
         mock_settings.qdrant_collection = "log_embeddings"
         mock_settings.qdrant_timeout = 30
         mock_settings.qdrant_scroll_batch_size = 100
+        mock_settings.qdrant_prefer_grpc = False
         mock_get_settings.return_value = mock_settings
 
         service = QdrantService()
@@ -44,6 +48,53 @@ class TestQdrantService:
             url="https://test.qdrant.io", api_key="test-key", timeout=30
         )
 
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_init_prefers_grpc_with_rest_fallback(self, mock_qdrant_client, mock_get_settings):
+        """Test gRPC is requested when enabled and REST is used if it fails."""
+        rest_client = MagicMock()
+        mock_qdrant_client.side_effect = [Exception("grpc unavailable"), rest_client]
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_timeout = 30
+        mock_settings.qdrant_prefer_grpc = True
+        mock_settings.qdrant_grpc_port = 6334
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+
+        assert service.client is rest_client
+        grpc_call, rest_call = mock_qdrant_client.call_args_list
+        assert grpc_call[1]["prefer_grpc"] is True
+        assert grpc_call[1]["grpc_port"] == 6334
+        assert "prefer_grpc" not in rest_call[1]
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_init_falls_back_to_rest_when_grpc_unreachable(
+        self, mock_qdrant_client, mock_get_settings
+    ):
+        """Test the lazily-connecting gRPC client is probed and replaced by REST on failure."""
+        grpc_client = MagicMock()
+        grpc_client.get_collections.side_effect = Exception("grpc port unreachable")
+        rest_client = MagicMock()
+        mock_qdrant_client.side_effect = [grpc_client, rest_client]
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_timeout = 30
+        mock_settings.qdrant_prefer_grpc = True
+        mock_settings.qdrant_grpc_port = 6334
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+
+        assert service.client is rest_client
+        grpc_client.close.assert_called_once()
+
     @patch("app.services.qdrant_service.get_settings")
     @patch("app.services.qdrant_service.QdrantClient")
     def test_ensure_collection_exists(self, mock_qdrant_client, mock_get_settings):
@@ -61,6 +112,7 @@ class TestQdrantService:
         mock_settings.qdrant_url = "https://test.qdrant.io"
         mock_settings.qdrant_api_key = "test-key"
         mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_prefer_grpc = False
         mock_get_settings.return_value = mock_settings
 
         service = QdrantService()
@@ -94,6 +146,37 @@ class TestQdrantService:
         call_args = mock_client.create_collection.call_args
         assert call_args[1]["collection_name"] == "log_embeddings"
         assert call_args[1]["vectors_config"].size == 1536
+        assert call_args[1]["quantization_config"].scalar.type == "int8"
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_ensure_collection_cached_until_error(self, mock_qdrant_client, mock_get_settings):
+        """Test the collection is verified once and re-checked after a failed operation."""
+        mock_client = MagicMock()
+        mock_collection = MagicMock()
+        mock_collection.name = "log_embeddings"
+        mock_client.get_collections.return_value = MagicMock(collections=[mock_collection])
+        mock_client.query_points.side_effect = [
+            MagicMock(points=[]),
+            Exception("collection not found"),
+            MagicMock(points=[]),
+        ]
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_prefer_grpc = False
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        service.search_vectors([0.1] * 1536)
+        service.search_vectors([0.1] * 1536)
+        assert mock_client.get_collections.call_count == 1
+
+        service.search_vectors([0.1] * 1536)
+        assert mock_client.get_collections.call_count == 2
 
     @patch("app.services.qdrant_service.get_settings")
     @patch("app.services.qdrant_service.QdrantClient")
@@ -124,6 +207,137 @@ class TestQdrantService:
         assert result is True
         mock_client.upsert.assert_called_once()
 
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_store_vectors_single_upsert(self, mock_qdrant_client, mock_get_settings):
+        """Test storing a batch of vectors with one upsert call."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(
+            collections=[MagicMock(name="log_embeddings")]
+        )
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_upsert_batch_size = 64
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        log_ids = [uuid4() for _ in range(3)]
+        items = [(log_id, [0.1] * 1536, {"level": "ERROR"}) for log_id in log_ids]
+
+        stored = service.store_vectors(items)
+
+        assert stored == [True, True, True]
+        mock_client.upsert.assert_called_once()
+        assert mock_client.upsert.call_args[1]["wait"] is True
+        points = mock_client.upsert.call_args[1]["points"]
+        assert [point.id for point in points] == [str(log_id) for log_id in log_ids]
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_store_vectors_upsert_error(self, mock_qdrant_client, mock_get_settings):
+        """Test a failed batch upsert reports no stored vectors."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        mock_client.upsert.side_effect = Exception("connection reset")
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_upsert_batch_size = 64
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+
+        assert service.store_vectors([(uuid4(), [0.1] * 1536, None)]) == [False]
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_store_vectors_chunks_and_reports_failed_chunk(
+        self, mock_qdrant_client, mock_get_settings
+    ):
+        """Test upserts are chunked and only the failed chunk is reported unstored."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(
+            collections=[MagicMock(name="log_embeddings")]
+        )
+        mock_client.upsert.side_effect = [None, Exception("timeout"), None]
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_upsert_batch_size = 2
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        items = [(uuid4(), [0.1] * 1536, None) for _ in range(5)]
+
+        stored = service.store_vectors(items)
+
+        assert stored == [True, True, False, False, True]
+        assert [len(call[1]["points"]) for call in mock_client.upsert.call_args_list] == [2, 2, 1]
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_bulk_ingest_pauses_indexing_until_last_exit(
+        self, mock_qdrant_client, mock_get_settings
+    ):
+        """Test indexing is paused once and the saved threshold restored after the last ingest."""
+        mock_client = MagicMock()
+        mock_client.get_collection.return_value.config.optimizer_config.indexing_threshold = 20000
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        with service.bulk_ingest():
+            with service.bulk_ingest():
+                pass
+            assert mock_client.update_collection.call_count == 1
+
+        thresholds = [
+            call[1]["optimizers_config"].indexing_threshold
+            for call in mock_client.update_collection.call_args_list
+        ]
+        assert thresholds == [0, 20000]
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_bulk_ingest_restores_default_when_threshold_unset(
+        self, mock_qdrant_client, mock_get_settings
+    ):
+        """Test indexing resumes with Qdrant's default when no threshold was reported."""
+        mock_client = MagicMock()
+        mock_client.get_collection.return_value.config.optimizer_config.indexing_threshold = None
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        with service.bulk_ingest():
+            pass
+
+        thresholds = [
+            call[1]["optimizers_config"].indexing_threshold
+            for call in mock_client.update_collection.call_args_list
+        ]
+        assert thresholds == [0, DEFAULT_INDEXING_THRESHOLD]
+
     @patch("app.services.qdrant_service.get_settings")
     def test_store_vector_without_client(self, mock_get_settings):
         """Test storing vector without client."""
@@ -157,7 +371,7 @@ class TestQdrantService:
         mock_result.id = str(uuid4())
         mock_result.score = 0.95
         mock_result.payload = {"level": "INFO"}
-        mock_client.search.return_value = [mock_result]
+        mock_client.query_points.return_value = MagicMock(points=[mock_result])
         mock_qdrant_client.return_value = mock_client
 
         mock_settings = MagicMock()
@@ -175,7 +389,36 @@ class TestQdrantService:
         assert results[0]["id"] == mock_result.id
         assert results[0]["score"] == 0.95
         assert results[0]["payload"] == {"level": "INFO"}
-        mock_client.search.assert_called_once()
+        mock_client.query_points.assert_called_once()
+        assert mock_client.query_points.call_args[1]["with_payload"] is True
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_search_vectors_server_side_threshold_and_projection(
+        self, mock_qdrant_client, mock_get_settings
+    ):
+        """Test the threshold and payload projection are passed to query_points."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        mock_client.query_points.return_value = MagicMock(points=[])
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        service.search_vectors([0.1] * 1536, score_threshold=0.8, payload_fields=["level"])
+        service.search_vectors([0.1] * 1536, payload_fields=[])
+
+        first, second = (call[1] for call in mock_client.query_points.call_args_list)
+        assert first["score_threshold"] == 0.8
+        assert first["with_payload"].include == ["level"]
+        assert first["with_vectors"] is False
+        assert second["score_threshold"] is None
+        assert second["with_payload"] is False
 
     @patch("app.services.qdrant_service.get_settings")
     def test_search_vectors_without_client(self, mock_get_settings):
@@ -255,3 +498,136 @@ class TestQdrantService:
         info = service.get_collection_info()
 
         assert info is None
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_iter_embedding_batches_streams_pages(self, mock_qdrant_client, mock_get_settings):
+        """Test embeddings are yielded per scroll page as packed arrays."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        pages = [
+            [MagicMock(id=f"id-{i}", vector=[float(i)] * 4, payload={"i": i}) for i in range(3)],
+            [
+                MagicMock(id="id-3", vector=None, payload=None),
+                MagicMock(id="id-4", vector=[4.0] * 4, payload=None),
+                MagicMock(id="id-5", vector=[5.0] * 4, payload=None),
+            ],
+        ]
+        mock_client.scroll.side_effect = [(pages[0], "next"), (pages[1], None)]
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_scroll_batch_size = 3
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        batches = list(service.iter_embedding_batches(limit=5, dtype=np.float16))
+
+        assert [ids for ids, _, _ in batches] == [["id-0", "id-1", "id-2"], ["id-4"]]
+        assert batches[0][1].dtype == np.float16
+        assert batches[0][1].shape == (3, 4)
+        assert batches[0][2] == [{"i": 0}, {"i": 1}, {"i": 2}]
+        assert batches[1][2] == [{}]
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_get_all_embeddings_applies_limit(self, mock_qdrant_client, mock_get_settings):
+        """Test scrolling stops once the limit is reached."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        page = [MagicMock(id=f"id-{i}", vector=[0.1], payload={}) for i in range(3)]
+        mock_client.scroll.return_value = (page, "next")
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_settings.qdrant_scroll_batch_size = 3
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        results = service.get_all_embeddings(limit=4)
+
+        assert [result["id"] for result in results] == ["id-0", "id-1", "id-2", "id-0"]
+        assert mock_client.scroll.call_count == 2
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_get_embedding_matrix_concatenates_pages(self, mock_qdrant_client, mock_get_settings):
+        """Test scroll pages are stacked into a single (n, dim) array."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        mock_client.scroll.side_effect = [
+            ([MagicMock(id="a", vector=[1.0, 2.0], payload={})], "next"),
+            ([MagicMock(id="b", vector=[3.0, 4.0], payload={})], None),
+        ]
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        ids, vectors = service.get_embedding_matrix()
+
+        assert ids == ["a", "b"]
+        assert vectors.dtype == np.float32
+        np.testing.assert_array_equal(vectors, [[1.0, 2.0], [3.0, 4.0]])
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_get_embedding_matrix_error_returns_empty(self, mock_qdrant_client, mock_get_settings):
+        """Test a failed scroll yields an empty matrix instead of raising."""
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        mock_client.scroll.side_effect = Exception("timeout")
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        ids, vectors = service.get_embedding_matrix()
+
+        assert ids == []
+        assert vectors.shape == (0, 1536)
+
+    @patch("app.services.qdrant_service.get_settings")
+    @patch("app.services.qdrant_service.QdrantClient")
+    def test_scroll_prefetches_next_page(self, mock_qdrant_client, mock_get_settings):
+        """Test the next page is requested while the caller holds the current one."""
+        next_page_requested = threading.Event()
+
+        def scroll(**kwargs):
+            if kwargs["offset"] is None:
+                return [MagicMock(id="a", vector=[1.0], payload={})], "next"
+            next_page_requested.set()
+            return [MagicMock(id="b", vector=[2.0], payload={})], None
+
+        mock_client = MagicMock()
+        mock_client.get_collections.return_value = MagicMock(collections=[])
+        mock_client.scroll.side_effect = scroll
+        mock_qdrant_client.return_value = mock_client
+
+        mock_settings = MagicMock()
+        mock_settings.qdrant_url = "https://test.qdrant.io"
+        mock_settings.qdrant_api_key = "test-key"
+        mock_settings.qdrant_collection = "log_embeddings"
+        mock_get_settings.return_value = mock_settings
+
+        service = QdrantService()
+        batches = service.iter_embedding_batches()
+
+        first_ids, _, _ = next(batches)
+        assert first_ids == ["a"]
+        assert next_page_requested.wait(timeout=5)
+        assert [ids for ids, _, _ in batches] == [["b"]]
@@ -0,0 +1,28 @@
+"""Unit tests for regex helpers."""
+
+import re
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.regex import compile_pattern
+
+
+def test_compile_pattern_falls_back_to_stdlib_re():
+    """Test patterns compile with stdlib re when RE2 is not installed."""
+    with patch("app.utils.regex.re2", None):
+        pattern = compile_pattern(r"(?m)^ERROR:")
+
+    assert isinstance(pattern, re.Pattern)
+    assert pattern.search("INFO: ok\nERROR: failed")
+
+
+def test_compile_pattern_uses_re2_when_installed():
+    """Test patterns compile with RE2 when the optional google-re2 extra is installed."""
+    re2 = pytest.importorskip("re2")
+
+    pattern = compile_pattern(r"(?m)^ERROR:")
+
+    assert not isinstance(pattern, re.Pattern)
+    assert isinstance(pattern, re2._Regexp)
+    assert pattern.search("INFO: ok\nERROR: failed")